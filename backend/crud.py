@@ -1,5 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from . import models, schemas
+from .services import cache_reportes
 import random
 from datetime import datetime
 
@@ -106,12 +107,49 @@ def get_productos(db: Session, skip: int = 0, limit: int = 100):
 
 def get_productos_by_cliente(db: Session, cliente_id: int, skip: int = 0, limit: int = 100):
     """Obtiene una lista de productos para un cliente específico."""
+    # selectinload: todos los documentos en UNA consulta extra (evita N+1)
     return db.query(models.Producto)\
+             .options(selectinload(models.Producto.documentos))\
              .filter(models.Producto.id_cliente == cliente_id)\
              .offset(skip)\
              .limit(limit)\
              .all()
 
+# Columnas del documento que viajan en el historial ligero (sin analisis_ia)
+COLUMNAS_RESUMEN_DOCUMENTO = (
+    models.Documento.id_documento,
+    models.Documento.id_producto,
+    models.Documento.nombre,
+    models.Documento.archivo_url,
+    models.Documento.fecha_subida,
+    models.Documento.estado_analisis,
+    models.Documento.total_hallazgos,
+    models.Documento.criterios_cumplidos,
+    models.Documento.criterios_totales,
+    models.Documento.porcentaje_cumplimiento,
+)
+
+def get_historial_cliente(db: Session, cliente_id: int, cursor: int = None, limit: int = 20):
+    """
+    Página del historial de un cliente, de lo más reciente a lo más antiguo.
+    Paginación por cursor (id_producto del último elemento de la página anterior).
+    Siempre son 2 consultas: productos + sus documentos (solo columnas de resumen).
+    Retorna (productos, siguiente_cursor).
+    """
+    query = db.query(models.Producto)\
+              .options(selectinload(models.Producto.documentos).load_only(*COLUMNAS_RESUMEN_DOCUMENTO))\
+              .filter(models.Producto.id_cliente == cliente_id)
+    if cursor is not None:
+        query = query.filter(models.Producto.id_producto < cursor)
+
+    # Pedimos uno de más para saber si hay otra página
+    productos = query.order_by(models.Producto.id_producto.desc()).limit(limit + 1).all()
+    siguiente_cursor = None
+    if len(productos) > limit:
+        productos = productos[:limit]
+        siguiente_cursor = productos[-1].id_producto
+    return productos, siguiente_cursor
+
 def create_producto(db: Session, producto: schemas.ProductoCreate, cliente_id: int):
     """Crea un nuevo producto asociado a un cliente."""
     db_producto = models.Producto(**producto.dict(), id_cliente=cliente_id)
@@ -139,10 +177,11 @@ def create_documento(db: Session, documento: schemas.DocumentoCreate, archivo_ur
     db.refresh(db_doc)
     return db_doc
 
-def update_documento_analisis(db: Session, documento_id: int, analisis_resultados: list):
+def update_documento_analisis(db: Session, documento_id: int, analisis_resultados: list, resumen: dict = None):
     """
     Guarda los resultados del análisis de IA en la base de datos
     para que estén disponibles en el historial.
+    resumen: columnas de cumplimiento ya calculadas (ver services/cumplimiento.py).
     """
     # 1. Buscamos el documento
     db_doc = db.query(models.Documento).filter(models.Documento.id_documento == documento_id).first()
@@ -150,7 +189,13 @@ def update_documento_analisis(db: Session, documento_id: int, analisis_resultado
     if db_doc:
         # 2. Guardamos los datos (SQLAlchemy maneja la conversión a JSON automáticamente)
         db_doc.analisis_ia = analisis_resultados
+        # Un índice anterior ya no corresponde; el resumen trae el nuevo
+        db_doc.indice_cumplimiento = None
+        for campo, valor in (resumen or {}).items():
+            setattr(db_doc, campo, valor)
         db.commit()
         db.refresh(db_doc)
+        # El reporte PDF guardado ya no corresponde al análisis nuevo
+        cache_reportes.invalidar(documento_id)
         
     return db_doc
\ No newline at end of file
@@ -0,0 +1,110 @@
+# Exporta el detector YOLO (models/best.pt) a ONNX para inferencia en CPU
+# con ONNX Runtime y, opcionalmente, lo cuantiza a int8.
+# Uso (desde la raíz del proyecto):
+#   python -m backend.exportar_modelo                # models/best.onnx
+#   python -m backend.exportar_modelo --int8         # + models/best.int8.onnx
+# Después se activa con NOPRO_YOLO_BACKEND=onnx (o onnx-int8).
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from backend.services import ia_vision
+
+TAMANO_ENTRADA = 640
+MAX_IMAGENES_CALIBRACION = 16
+
+
+def letterbox(pil_image, tamano=TAMANO_ENTRADA):
+    """Imagen -> tensor (1, 3, tamano, tamano) float32 igual que el preprocesado de YOLO."""
+    from PIL import Image
+
+    escala = tamano / max(pil_image.width, pil_image.height)
+    nuevo = (max(1, round(pil_image.width * escala)), max(1, round(pil_image.height * escala)))
+    lienzo = Image.new("RGB", (tamano, tamano), (114, 114, 114))
+    lienzo.paste(pil_image.convert("RGB").resize(nuevo, Image.Resampling.BILINEAR),
+                 ((tamano - nuevo[0]) // 2, (tamano - nuevo[1]) // 2))
+    arreglo = np.asarray(lienzo, dtype=np.float32) / 255.0
+    return arreglo.transpose(2, 0, 1)[None]
+
+
+def imagenes_calibracion(carpeta, tamano=TAMANO_ENTRADA, maximo=MAX_IMAGENES_CALIBRACION):
+    """Páginas renderizadas de los PDFs de `carpeta` (etiquetas reales) ya preprocesadas."""
+    tensores = []
+    for ruta_pdf in sorted(glob.glob(os.path.join(carpeta, "*.pdf"))):
+        for _, imagen in ia_vision.renderizar_paginas(ruta_pdf, max_paginas=2):
+            tensores.append(letterbox(imagen, tamano))
+            if len(tensores) >= maximo:
+                return tensores
+    return tensores
+
+
+def exportar_onnx(tamano=TAMANO_ENTRADA):
+    from ultralytics import YOLO
+
+    if not os.path.exists(ia_vision.MODEL_PATH):
+        raise SystemExit(f"❌ No existe {ia_vision.MODEL_PATH}")
+    # dynamic=True: el eje de lote queda libre para procesar varias páginas por pasada
+    ruta = YOLO(ia_vision.MODEL_PATH).export(format="onnx", imgsz=tamano, dynamic=True)
+    if os.path.abspath(ruta) != os.path.abspath(ia_vision.MODEL_ONNX_PATH):
+        shutil.move(ruta, ia_vision.MODEL_ONNX_PATH)
+    print(f"✅ ONNX exportado: {ia_vision.MODEL_ONNX_PATH}")
+
+
+def cuantizar_int8(carpeta_calibracion, tamano=TAMANO_ENTRADA):
+    """
+    Cuantización estática (QDQ, pesos int8 por canal) calibrada con etiquetas reales.
+    La dinámica (quantize_dynamic) resultó más lenta que fp32 en este modelo
+    convolucional, por eso se usa la estática.
+    """
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    tensores = imagenes_calibracion(carpeta_calibracion, tamano)
+    if not tensores:
+        raise SystemExit(f"❌ No hay PDFs para calibrar en {carpeta_calibracion}")
+
+    original = onnx.load(ia_vision.MODEL_ONNX_PATH)
+    nombre_entrada = original.graph.input[0].name
+
+    class LectorCalibracion(CalibrationDataReader):
+        def __init__(self):
+            self._datos = iter({nombre_entrada: t} for t in tensores)
+
+        def get_next(self):
+            return next(self._datos, None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        preprocesado = os.path.join(tmp, "pre.onnx")
+        quant_pre_process(ia_vision.MODEL_ONNX_PATH, preprocesado, skip_symbolic_shape=True)
+        quantize_static(
+            preprocesado, ia_vision.MODEL_ONNX_INT8_PATH, LectorCalibracion(),
+            quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8, per_channel=True,
+        )
+
+    # Conservamos los metadatos de ultralytics (names, stride, imgsz) para poder cargarlo con YOLO()
+    cuantizado = onnx.load(ia_vision.MODEL_ONNX_INT8_PATH)
+    del cuantizado.metadata_props[:]
+    cuantizado.metadata_props.extend(original.metadata_props)
+    onnx.save(cuantizado, ia_vision.MODEL_ONNX_INT8_PATH)
+    print(f"✅ Modelo int8 ({len(tensores)} imágenes de calibración): {ia_vision.MODEL_ONNX_INT8_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta models/best.pt a ONNX (y opcionalmente int8)")
+    parser.add_argument("--int8", action="store_true", help="Genera también la versión cuantizada int8")
+    parser.add_argument("--calibracion", default=os.path.join("backend", "uploads"),
+                        help="Carpeta con PDFs de etiquetas para calibrar la cuantización")
+    parser.add_argument("--imgsz", type=int, default=TAMANO_ENTRADA)
+    parser.add_argument("--solo-int8", action="store_true", help="No reexporta; cuantiza el best.onnx existente")
+    args = parser.parse_args()
+
+    if not args.solo_int8:
+        exportar_onnx(args.imgsz)
+    if args.int8 or args.solo_int8:
+        cuantizar_int8(args.calibracion, args.imgsz)
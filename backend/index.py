@@ -1,4 +1,8 @@
 import os
+import time
+from contextlib import asynccontextmanager
+_t_inicio = time.perf_counter()
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -9,15 +13,45 @@ from fastapi.staticfiles import StaticFiles
 from backend.routers import clientes, productos, documentos, auth, soporte
 from backend.database import Base, engine
 from backend import models
+from backend.migraciones import aplicar_migraciones
+from backend.services import modelos, cola_analisis, cache_analisis, cache_reportes, ia_analisis, catalogo_criterios, pdf_report, render_reportes
 
+# Desglose del tiempo de arranque (segundos), visible en GET /estado
+TIEMPOS_ARRANQUE = {"imports": round(time.perf_counter() - _t_inicio, 3)}
 
 #Base.metadata.drop_all(bind=engine) 
 
 # 2. Esta línea CREARÁ las tablas de nuevo (con la columna 'marca')
 # Base.metadata.create_all(bind=engine)
 # Crear tablas sólo si no existen
+_t = time.perf_counter()
 Base.metadata.create_all(bind=engine)
-app = FastAPI(title="Backend NOPRO")
+aplicar_migraciones(engine)
+TIEMPOS_ARRANQUE["base_datos"] = round(time.perf_counter() - _t, 3)
+
+@asynccontextmanager
+async def lifespan(app):
+    # El catálogo de criterios se valida y compila al arrancar: un patrón
+    # inválido detiene el arranque en lugar de aparecer en un análisis
+    _t = time.perf_counter()
+    catalogo_criterios.obtener()
+    TIEMPOS_ARRANQUE["catalogo_criterios"] = round(time.perf_counter() - _t, 3)
+    # Hook de calentamiento: solo los workers de análisis precargan modelos
+    # (NOPRO_PRECARGAR_MODELOS=spacy,yolo). Los demás arrancan sin ellos.
+    _t = time.perf_counter()
+    modelos.precargar(modelos.modelos_a_precargar())
+    TIEMPOS_ARRANQUE["precarga_modelos"] = round(time.perf_counter() - _t, 3)
+    TIEMPOS_ARRANQUE["total"] = round(time.perf_counter() - _t_inicio, 3)
+    print(f"⏱️ Arranque: {TIEMPOS_ARRANQUE}")
+    # Pool de análisis en segundo plano dentro de este proceso (NOPRO_COLA_MODO=local)
+    cola_analisis.iniciar_pool_local()
+    yield
+    cola_analisis.detener_pool_local()
+    ia_analisis.cerrar_pool_extraccion()
+    render_reportes.cerrar()
+    pdf_report.cerrar_pool_reportes()
+
+app = FastAPI(title="Backend NOPRO", lifespan=lifespan)
 
 # Configuración de CORS para permitir solicitudes desde el frontend
 origins = [
@@ -46,3 +80,15 @@ app.include_router(soporte.router)
 @app.get("/")
 def root():
     return {"mensaje": "Backend NOPRO corriendo con uploads"}
+
+@app.get("/estado")
+def estado():
+    return {
+        "arranque": TIEMPOS_ARRANQUE,
+        "modelos": modelos.estado(),
+        "cache_analisis": cache_analisis.estadisticas(),
+        "busqueda_criterios": ia_analisis.estadisticas_busqueda(),
+        "catalogo_criterios": catalogo_criterios.estado(),
+        "cache_reportes": cache_reportes.estadisticas(),
+        "render_reportes": render_reportes.estadisticas(),
+    }
@@ -0,0 +1,33 @@
+from sqlalchemy import text
+
+# =========================================================================
+#  MIGRACIONES LIGERAS
+# =========================================================================
+# create_all() solo crea tablas que no existen; NO agrega columnas nuevas a
+# tablas existentes. Aquí van los ALTER idempotentes para las bases de datos
+# que ya estaban en producción. Se ejecutan al arrancar (index.py) y en el
+# worker de análisis.
+
+MIGRACIONES = [
+    # Cola de análisis en segundo plano
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS estado_analisis VARCHAR(20)",
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS progreso_analisis INTEGER DEFAULT 0",
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS error_analisis VARCHAR(500)",
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS parametros_analisis JSON",
+    "CREATE INDEX IF NOT EXISTS ix_documentos_estado_analisis ON documentos (estado_analisis)",
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS reclamado_en TIMESTAMP WITH TIME ZONE",
+    # Resumen de cumplimiento para el historial paginado
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS total_hallazgos INTEGER",
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS criterios_cumplidos INTEGER",
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS criterios_totales INTEGER",
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS porcentaje_cumplimiento DOUBLE PRECISION",
+    # Índice de cumplimiento (checklist precalculado)
+    "ALTER TABLE documentos ADD COLUMN IF NOT EXISTS indice_cumplimiento JSON",
+]
+
+
+def aplicar_migraciones(engine):
+    """Ejecuta todas las migraciones (son idempotentes)."""
+    with engine.begin() as conn:
+        for sentencia in MIGRACIONES:
+            conn.execute(text(sentencia))
@@ -0,0 +1,68 @@
+# Mueve las imágenes base64 que ya están guardadas en documentos.analisis_ia
+# al almacén de artefactos y deja solo la referencia (ImagenRef/ImagenUrl).
+# Uso (desde la raíz del proyecto):
+#   python -m backend.migrar_evidencias            # aplica los cambios
+#   python -m backend.migrar_evidencias --simular  # solo mide, no escribe
+import argparse
+import json
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import String, cast
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import artefactos
+
+TAMANO_LOTE = 100
+
+
+def _tamano_json(valor):
+    return len(json.dumps(valor, ensure_ascii=False).encode("utf-8"))
+
+
+def migrar(simular=False):
+    db = SessionLocal()
+    documentos = imagenes = bytes_antes = bytes_despues = 0
+    ultimo_id = 0
+    try:
+        while True:
+            # Solo filas que todavía contienen base64, por lotes para acotar memoria
+            lote = db.query(models.Documento)\
+                     .filter(models.Documento.id_documento > ultimo_id)\
+                     .filter(cast(models.Documento.analisis_ia, String).contains("ImagenBase64"))\
+                     .order_by(models.Documento.id_documento)\
+                     .limit(TAMANO_LOTE)\
+                     .all()
+            if not lote:
+                break
+
+            for doc in lote:
+                ultimo_id = doc.id_documento
+                nuevos, movidas = artefactos.externalizar_resultados(doc.analisis_ia, escribir=not simular)
+                if not movidas:
+                    continue
+                bytes_antes += _tamano_json(doc.analisis_ia)
+                bytes_despues += _tamano_json(nuevos)
+                documentos += 1
+                imagenes += movidas
+                if not simular:
+                    doc.analisis_ia = nuevos
+
+            if not simular:
+                db.commit()
+            db.expunge_all()
+    finally:
+        db.close()
+
+    modo = "SIMULACIÓN" if simular else "MIGRACIÓN"
+    print(f"✅ {modo}: {documentos} documentos, {imagenes} imágenes movidas al almacén.")
+    print(f"   analisis_ia: {bytes_antes / 1024:.1f} KB -> {bytes_despues / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mueve ImagenBase64 de analisis_ia al almacén de artefactos")
+    parser.add_argument("--simular", action="store_true", help="No escribe nada, solo reporta")
+    args = parser.parse_args()
+    migrar(simular=args.simular)
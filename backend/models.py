@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, TIMESTAMP, JSON
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Boolean, ForeignKey, TIMESTAMP, JSON
 from sqlalchemy.orm import relationship
 from .database import Base
 from sqlalchemy.sql import func
@@ -42,5 +42,31 @@ class Documento(Base):
     archivo_url = Column(String(255))
     fecha_subida = Column(TIMESTAMP, server_default=func.now())
     analisis_ia = Column(JSON, nullable=True)
+    # Cola de análisis en segundo plano (el id del trabajo es id_documento)
+    estado_analisis = Column(String(20), nullable=True, index=True) # pendiente | procesando | completado | error
+    progreso_analisis = Column(Integer, default=0)
+    error_analisis = Column(String(500), nullable=True)
+    parametros_analisis = Column(JSON, nullable=True) # {"tipo", "categoria", "marca", "sha256", "modo", "catalogo"}
+    reclamado_en = Column(TIMESTAMP(timezone=True), nullable=True) # latido del worker que lo procesa (lease)
+    # Resumen del análisis (historial ligero sin leer analisis_ia)
+    total_hallazgos = Column(Integer, nullable=True)
+    criterios_cumplidos = Column(Integer, nullable=True)
+    criterios_totales = Column(Integer, nullable=True)
+    porcentaje_cumplimiento = Column(Float, nullable=True)
+    # Checklist ya resuelto para reportes y API (ver services/cumplimiento.py)
+    indice_cumplimiento = Column(JSON(none_as_null=True), nullable=True)
     cliente = relationship("Cliente", back_populates="documentos")
     producto = relationship("Producto", back_populates="documentos")
+
+class CacheAnalisis(Base):
+    """Resultados de análisis reutilizables, direccionados por contenido (ver services/cache_analisis.py)."""
+    __tablename__ = "cache_analisis"
+
+    clave = Column(String(64), primary_key=True) # sha256(archivo + categoria + tipo + marca + version)
+    sha256_archivo = Column(String(64), nullable=False, index=True)
+    version = Column(String(64), nullable=False)
+    resultados = Column(JSON, nullable=False)
+    tamano_bytes = Column(BigInteger, nullable=False, default=0)
+    hits = Column(Integer, default=0)
+    fecha_creacion = Column(TIMESTAMP, server_default=func.now())
+    ultimo_acceso = Column(TIMESTAMP, server_default=func.now(), index=True)
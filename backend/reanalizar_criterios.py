@@ -0,0 +1,196 @@
+# Re-análisis incremental de los documentos ya analizados cuando cambia el
+# catálogo de criterios (backend/data/criterios.json).
+# Por cada documento se compara la versión del catálogo con la que se analizó
+# (parametros_analisis["catalogo"]) contra la actual y solo se evalúan los
+# patrones agregados o editados, sobre el texto normalizado ya guardado
+# (artefactos/textos). Los hallazgos de patrones eliminados se quitan.
+# No se vuelve a subir nada ni se repite la visión (las etiquetas no tienen criterios de texto).
+# Uso (desde la raíz del proyecto):
+#   python -m backend.reanalizar_criterios                  # documentos con otra versión del catálogo
+#   python -m backend.reanalizar_criterios --simular        # solo cuenta lo que cambiaría
+#   python -m backend.reanalizar_criterios --desde <huella> # versión a asumir en documentos sin versión
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import os
+import time
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import (
+    artefactos, cache_analisis, cache_reportes, catalogo_criterios, cumplimiento, extraccion_texto, ia_analisis, motor_criterios
+)
+
+TAMANO_LOTE = 200
+
+
+def _clave(item):
+    return (item.get("Norma"), item.get("Categoria"), item.get("Hallazgo"))
+
+
+def criterios_a_evaluar(conjunto, cambios, modo):
+    """
+    Qué criterios del catálogo nuevo hay que evaluar y qué hallazgos guardados
+    quitar. Retorna (criterios, quitar(item) -> bool).
+    cambios=None: no se conoce la versión anterior, se re-evalúa todo el texto.
+    """
+    if cambios is None:
+        return list(conjunto.criterios), lambda item: True
+
+    grupos = set(cambios)
+    if modo == motor_criterios.MODO_CHECKLIST:
+        # En modo checklist los patrones de un requisito dependen entre sí
+        # (basta el primero que se cumpla): se re-evalúa el requisito completo
+        criterios = [c for c in conjunto.criterios if (c.norma, c.categoria) in grupos]
+        return criterios, lambda item: (item.get("Norma"), item.get("Categoria")) in grupos
+
+    agregados = {(grupo, p) for grupo, c in cambios.items() for p in c["agregados"]}
+    # El hallazgo solo guarda el patrón recortado; si un patrón vigente se ve
+    # igual que uno eliminado, se quitan ambos y se re-evalúa el vigente
+    eliminados = {
+        (norma, requisito, ia_analisis.texto_hallazgo(p))
+        for (norma, requisito), c in cambios.items() for p in c["eliminados"]
+    }
+    criterios = [
+        c for c in conjunto.criterios
+        if ((c.norma, c.categoria), c.patron) in agregados
+        or (c.norma, c.categoria, ia_analisis.texto_hallazgo(c.patron)) in eliminados
+    ]
+    return criterios, lambda item: _clave(item) in eliminados
+
+
+def reevaluar(resultados, paginas, conjunto, cambios, modo, estadisticas=None):
+    """
+    Resultados actualizados: los hallazgos que siguen valiendo más los de los
+    criterios re-evaluados, en el orden del catálogo nuevo (criterio, página).
+    Retorna (resultados, numero_de_patrones_evaluados).
+    estadisticas: dict opcional con las estadísticas de la búsqueda (busquedas_cortadas...).
+    """
+    criterios, quitar = criterios_a_evaluar(conjunto, cambios, modo)
+    conservados = [item for item in resultados or [] if not quitar(item)]
+    nuevos = [
+        ia_analisis.crear_hallazgo_texto(c.norma, c.categoria, c.patron, pagina, texto, match)
+        for c, pagina, texto, match in motor_criterios.ConjuntoCriterios(criterios).buscar(
+            paginas, modo=modo, estadisticas=estadisticas
+        )
+    ]
+
+    orden = {}
+    for i, c in enumerate(conjunto.criterios):
+        orden.setdefault((c.norma, c.categoria, ia_analisis.texto_hallazgo(c.patron)), i)
+    fusion = conservados + nuevos
+    fusion.sort(key=lambda item: (orden.get(_clave(item), len(orden)), item.get("Pagina") or 0))
+    return fusion, len(criterios)
+
+
+def texto_documento(doc, sha256_archivo):
+    """Texto normalizado por página: el guardado o, si no existe, extraído del PDF (y se guarda)."""
+    extractor = extraccion_texto.nombre_extractor()
+    paginas = artefactos.leer_texto_paginas(sha256_archivo, extractor)
+    if paginas is not None:
+        return paginas, False
+    if not doc.archivo_url or not os.path.exists(doc.archivo_url):
+        return None, False
+    paginas = [(p["pagina"], p["texto"]) for p in ia_analisis.extraer_paginas_texto(doc.archivo_url)]
+    artefactos.guardar_texto_paginas(sha256_archivo, extractor, paginas)
+    return paginas, True
+
+
+def reanalizar(desde=None, simular=False):
+    catalogo = catalogo_criterios.obtener()
+    db = SessionLocal()
+    cuentas = {"revisados": 0, "actualizados": 0, "sin_cambios": 0, "texto_extraido": 0,
+               "sin_version": 0, "errores": 0, "cortados": 0, "patrones_evaluados": 0}
+    t0 = time.perf_counter()
+    ultimo_id = 0
+    try:
+        while True:
+            lote = db.query(models.Documento)\
+                     .filter(models.Documento.id_documento > ultimo_id)\
+                     .filter(models.Documento.analisis_ia.isnot(None))\
+                     .order_by(models.Documento.id_documento)\
+                     .limit(TAMANO_LOTE).all()
+            if not lote:
+                break
+
+            for doc in lote:
+                ultimo_id = doc.id_documento
+                params = doc.parametros_analisis or {}
+                # Misma deducción que recalcular_resumenes para documentos sin parámetros
+                categoria = params.get("categoria") or ia_analisis.normalizar_categoria(
+                    doc.producto.nombre if doc.producto else "Laptop"
+                )
+                tipo = params.get("tipo") or ia_analisis.normalizar_tipo_documento(doc.nombre)
+                if tipo == "Etiqueta" or params.get("catalogo") == catalogo.huella:
+                    continue
+                cuentas["revisados"] += 1
+
+                huella_anterior = params.get("catalogo") or desde
+                anterior = catalogo_criterios.por_huella(huella_anterior) if huella_anterior else None
+                if anterior is None:
+                    cuentas["sin_version"] += 1
+                    cambios = None
+                else:
+                    cambios = catalogo_criterios.diferencias(anterior, catalogo, categoria, tipo)
+
+                if cambios == {}:
+                    # Nada cambió para su categoría y tipo: solo se marca la versión
+                    cuentas["sin_cambios"] += 1
+                else:
+                    try:
+                        sha256_archivo = params.get("sha256") or cache_analisis.calcular_sha256(doc.archivo_url)
+                        paginas, extraido = texto_documento(doc, sha256_archivo)
+                    except (OSError, TypeError) as e:
+                        print(f"❌ Documento {doc.id_documento}: {e}")
+                        paginas, extraido = None, False
+                    if paginas is None:
+                        print(f"❌ Documento {doc.id_documento}: no hay texto guardado ni archivo PDF.")
+                        cuentas["errores"] += 1
+                        continue
+                    cuentas["texto_extraido"] += int(extraido)
+
+                    modo = ia_analisis.normalizar_modo_busqueda(params.get("modo"))
+                    stats = {}
+                    resultados, evaluados = reevaluar(
+                        doc.analisis_ia, paginas, catalogo.conjunto(categoria, tipo), cambios, modo, stats
+                    )
+                    cuentas["patrones_evaluados"] += evaluados
+                    if stats.get("busquedas_cortadas"):
+                        # Podrían faltar hallazgos: no se guarda ni se marca la versión (se reintenta)
+                        print(f"⚠️ Documento {doc.id_documento}: {stats['busquedas_cortadas']} búsquedas cortadas por tiempo, se omite.")
+                        cuentas["cortados"] += 1
+                        continue
+                    cuentas["actualizados"] += 1
+                    params = {**params, "sha256": sha256_archivo}
+                    if not simular:
+                        doc.analisis_ia = resultados
+                        cumplimiento.aplicar_resumen(doc, resultados, categoria, tipo)
+                        cache_reportes.invalidar(doc.id_documento)
+
+                if not simular:
+                    doc.parametros_analisis = {
+                        **params, "categoria": categoria, "tipo": tipo, "catalogo": catalogo.huella
+                    }
+
+            # Un commit por lote: los UPDATE viajan juntos
+            if simular:
+                db.rollback()
+            else:
+                db.commit()
+            db.expunge_all()
+    finally:
+        db.close()
+
+    segundos = time.perf_counter() - t0
+    print(f"{'🔎 Simulación' if simular else '✅ Re-análisis'} con el catálogo v{catalogo.version} "
+          f"({catalogo.huella[:12]}) en {segundos:.1f}s: {cuentas}")
+    return cuentas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualiza analisis_ia evaluando solo los criterios que cambiaron")
+    parser.add_argument("--desde", help="Huella del catálogo a asumir para documentos analizados sin versión registrada")
+    parser.add_argument("--simular", action="store_true", help="No guarda cambios, solo reporta")
+    args = parser.parse_args()
+    reanalizar(desde=args.desde, simular=args.simular)
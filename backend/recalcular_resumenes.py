@@ -0,0 +1,63 @@
+# Calcula el resumen de cumplimiento (total_hallazgos, criterios_cumplidos, ...)
+# y el índice de cumplimiento de los documentos analizados antes de que
+# existieran esas columnas.
+# Uso (desde la raíz del proyecto):
+#   python -m backend.recalcular_resumenes           # solo los que no tienen resumen o índice
+#   python -m backend.recalcular_resumenes --todos   # recalcula todos
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+
+from sqlalchemy import or_
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services import cumplimiento, ia_analisis
+
+TAMANO_LOTE = 100
+
+
+def recalcular(todos=False):
+    db = SessionLocal()
+    actualizados = 0
+    ultimo_id = 0
+    try:
+        while True:
+            consulta = db.query(models.Documento)\
+                         .filter(models.Documento.id_documento > ultimo_id)\
+                         .filter(models.Documento.analisis_ia.isnot(None))
+            if not todos:
+                consulta = consulta.filter(or_(
+                    models.Documento.total_hallazgos.is_(None),
+                    models.Documento.indice_cumplimiento.is_(None)
+                ))
+            lote = consulta.order_by(models.Documento.id_documento).limit(TAMANO_LOTE).all()
+            if not lote:
+                break
+
+            for doc in lote:
+                ultimo_id = doc.id_documento
+                # Misma deducción que el endpoint de reporte: categoría por el
+                # producto, tipo por el nombre del documento (o lo que se pidió al encolar)
+                params = doc.parametros_analisis or {}
+                categoria = params.get("categoria") or ia_analisis.normalizar_categoria(
+                    doc.producto.nombre if doc.producto else "Laptop"
+                )
+                tipo = params.get("tipo") or ia_analisis.normalizar_tipo_documento(doc.nombre)
+                cumplimiento.aplicar_resumen(doc, doc.analisis_ia, categoria, tipo)
+                actualizados += 1
+
+            db.commit()
+            db.expunge_all()
+    finally:
+        db.close()
+
+    print(f"✅ Resumen de cumplimiento calculado para {actualizados} documentos.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rellena el resumen de cumplimiento de documentos ya analizados")
+    parser.add_argument("--todos", action="store_true", help="Recalcula también los que ya tienen resumen")
+    args = parser.parse_args()
+    recalcular(todos=args.todos)
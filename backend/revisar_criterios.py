@@ -0,0 +1,172 @@
+# Revisa el rendimiento de los patrones del catálogo de criterios:
+#   1. revisión estática (motor_criterios.revisar_patron): cuantificadores
+#      anidados, comodines encadenados, patrones sin literal para el prefiltro;
+#   2. tiempo de cada patrón sobre un corpus de páginas reales (peor página y total);
+#   3. prueba de estrés: texto sintético que repite el literal del patrón a
+#      dos tamaños; si el tiempo crece mucho más que el texto, hay backtracking.
+# Uso (desde la raíz del proyecto):
+#   python -m backend.revisar_criterios                      # corpus: backend/uploads/*.pdf
+#   python -m backend.revisar_criterios doc1.pdf doc2.pdf --motor regex
+#   python -m backend.revisar_criterios --estricto           # código 1 si hay patrones marcados
+import argparse
+import glob
+import os
+import sys
+import time
+
+from backend.services import catalogo_criterios, ia_analisis, motor_criterios
+
+# Tamaños del texto de estrés (caracteres); una página densa ronda los 5-10 mil
+TAMANO_ESTRES = 10_000
+FACTOR_ESTRES = 4
+# Crecimiento tolerado: lineal sería FACTOR_ESTRES; el doble ya es sospechoso
+MAX_CRECIMIENTO = 2 * FACTOR_ESTRES
+# Por debajo de esto el crecimiento es ruido de medición
+MIN_MS_CRECIMIENTO = 1.0
+# Límite de cada búsqueda de estrés (con el módulo `regex`, para no colgar la revisión)
+TIMEOUT_ESTRES = 1.0
+REPETICIONES_ESTRES = 3
+
+
+def leer_corpus(rutas):
+    paginas = []
+    for ruta in rutas:
+        for pag in ia_analisis.extraer_paginas_texto(ruta, workers=1):
+            paginas.append((os.path.basename(ruta), pag["pagina"], pag["texto"]))
+    return paginas
+
+
+def patrones_unicos(catalogo, motor):
+    """{patron: (criterio_compilado, [ubicaciones])} sin repetir patrones entre conjuntos."""
+    salida = {}
+    for (categoria, tipo), normas in sorted(
+        ((clave, catalogo.criterios(*clave)) for clave in catalogo.conjuntos), key=lambda x: x[0]
+    ):
+        conjunto = motor_criterios.compilar_conjunto(normas, motor)
+        for criterio in conjunto.criterios:
+            ubicacion = f"{categoria}/{tipo}/{criterio.norma}/{criterio.categoria}"
+            if criterio.patron in salida:
+                salida[criterio.patron][1].append(ubicacion)
+            else:
+                salida[criterio.patron] = (criterio, [ubicacion])
+    return salida
+
+
+def medir_corpus(criterio, paginas):
+    """(peor_ms, archivo, pagina, total_ms) de buscar el patrón en cada página del corpus."""
+    peor, donde, total = 0.0, None, 0.0
+    for archivo, numero, texto in paginas:
+        t0 = time.perf_counter()
+        try:
+            criterio.buscar(texto)
+        except TimeoutError:
+            pass
+        dt = time.perf_counter() - t0
+        total += dt
+        if dt > peor:
+            peor, donde = dt, (archivo, numero)
+    return peor * 1000, donde, total * 1000
+
+
+def _buscador_estres(criterio):
+    """
+    Con `re` la búsqueda no se puede interrumpir: se mide con el módulo `regex`
+    y un límite de tiempo (si está instalado). Los demás motores ya son
+    lineales (re2) o traen su propio límite (regex).
+    """
+    if criterio.motor != "re":
+        return criterio.buscar
+    try:
+        import regex
+    except ImportError:
+        return criterio.buscar
+    compilado = regex.compile(criterio.patron, regex.IGNORECASE | regex.V0)
+    return lambda texto: compilado.search(texto, timeout=TIMEOUT_ESTRES)
+
+
+def medir_estres(criterio):
+    """
+    Repite el literal requerido (más un carácter que rompe la coincidencia) y
+    compara el tiempo con un texto FACTOR_ESTRES veces más largo.
+    Retorna (ms_texto_grande, crecimiento o None si se cortó).
+    """
+    semilla = (criterio.literales or ["a"])[0] + " 0 "
+    buscar = _buscador_estres(criterio)
+    tiempos = []
+    for tamano in (TAMANO_ESTRES, TAMANO_ESTRES * FACTOR_ESTRES):
+        texto = (semilla * (tamano // len(semilla) + 1))[:tamano]
+        mejor = None
+        for _ in range(REPETICIONES_ESTRES):
+            t0 = time.perf_counter()
+            try:
+                buscar(texto)
+            except TimeoutError:
+                return (time.perf_counter() - t0) * 1000, None
+            dt = time.perf_counter() - t0
+            mejor = dt if mejor is None else min(mejor, dt)
+        tiempos.append(mejor)
+    return tiempos[1] * 1000, tiempos[1] / max(tiempos[0], 1e-6)
+
+
+def revisar(rutas, motor=None, umbral_ms=None, todos=False):
+    umbral_ms = umbral_ms or motor_criterios.PRESUPUESTO_MS
+    catalogo = catalogo_criterios.cargar()
+    motor = motor_criterios.nombre_motor(motor)
+    paginas = leer_corpus(rutas)
+    patrones = patrones_unicos(catalogo, motor)
+    print(f"📚 Catálogo v{catalogo.version}: {len(patrones)} patrones distintos | motor '{motor}' | "
+          f"corpus: {len(rutas)} PDFs, {len(paginas)} páginas | umbral {umbral_ms:g} ms\n")
+
+    marcados = []
+    filas = []
+    for patron, (criterio, ubicaciones) in patrones.items():
+        avisos = motor_criterios.revisar_patron(patron)
+        peor_ms, donde, total_ms = medir_corpus(criterio, paginas) if paginas else (0.0, None, 0.0)
+        estres_ms, crecimiento = medir_estres(criterio)
+
+        if peor_ms > umbral_ms:
+            avisos.append(f"{peor_ms:.1f} ms en {donde[0]} pág. {donde[1]} (umbral {umbral_ms:g} ms)")
+        if crecimiento is None:
+            avisos.append(f"estrés cortado por tiempo ({estres_ms:.0f} ms): backtracking catastrófico")
+        elif crecimiento > MAX_CRECIMIENTO and estres_ms >= MIN_MS_CRECIMIENTO:
+            avisos.append(f"estrés: texto x{FACTOR_ESTRES} -> tiempo x{crecimiento:.1f} (superlineal)")
+        elif estres_ms > umbral_ms:
+            avisos.append(f"estrés: {estres_ms:.1f} ms con {TAMANO_ESTRES * FACTOR_ESTRES} caracteres")
+        if criterio.motor != motor:
+            avisos.append(f"el motor '{motor}' no lo soporta; se evalúa con '{criterio.motor}'")
+
+        filas.append((peor_ms, total_ms, estres_ms, patron, ubicaciones, avisos))
+        # "sin literal" solo es informativo: no marca el patrón por sí solo
+        if any(not a.startswith("sin literal") for a in avisos):
+            marcados.append(patron)
+
+    filas.sort(key=lambda f: (f[0], f[2]), reverse=True)
+    print(f"{'Peor pág.':>10} {'Corpus':>10} {'Estrés':>10}  Patrón")
+    for peor_ms, total_ms, estres_ms, patron, ubicaciones, avisos in filas:
+        if not todos and patron not in marcados:
+            continue
+        print(f"{peor_ms:>8.2f}ms {total_ms:>8.1f}ms {estres_ms:>8.1f}ms  {patron[:70]}")
+        extra = f" (+{len(ubicaciones) - 1} conjuntos más)" if len(ubicaciones) > 1 else ""
+        print(f"{'':32}↳ {ubicaciones[0]}{extra}")
+        for aviso in avisos:
+            print(f"{'':32}⚠️ {aviso}")
+
+    total_corpus = sum(f[1] for f in filas)
+    print(f"\n{'⚠️' if marcados else '✅'} {len(marcados)} de {len(filas)} patrones marcados | "
+          f"tiempo total sobre el corpus (sin prefiltro): {total_corpus:.0f} ms")
+    return marcados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Revisión de rendimiento de los patrones de criterios")
+    parser.add_argument("pdfs", nargs="*", help="PDFs del corpus (por defecto backend/uploads/*.pdf)")
+    parser.add_argument("--motor", choices=sorted(motor_criterios.MOTORES), help="Motor de regex a medir")
+    parser.add_argument("--umbral-ms", type=float, help="Tiempo máximo por página (por defecto NOPRO_REGEX_PRESUPUESTO_MS)")
+    parser.add_argument("--todos", action="store_true", help="Lista también los patrones sin avisos")
+    parser.add_argument("--estricto", action="store_true", help="Termina con código 1 si hay patrones marcados")
+    args = parser.parse_args()
+
+    rutas = args.pdfs or sorted(glob.glob(os.path.join("backend", "uploads", "*.pdf")))
+    marcados = revisar(rutas, args.motor, args.umbral_ms, args.todos)
+    if args.estricto and marcados:
+        sys.exit(1)
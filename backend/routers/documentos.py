@@ -1,11 +1,14 @@
+import asyncio
 import os
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
-from fastapi.responses import StreamingResponse
+from types import SimpleNamespace
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
 from sqlalchemy.orm import Session
 from .. import crud, schemas, database, auth, models
 # IMPORTANTE: Asegúrate de importar pdf_report
-from ..services import ia_analisis, pdf_report 
-from typing import List
+from ..services import ia_analisis, pdf_report, cola_analisis, cache_analisis, subidas, artefactos, cumplimiento, catalogo_criterios, cache_reportes, render_reportes
+from typing import List, Optional
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/documentos", tags=["Documentos"])
@@ -17,6 +20,75 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 class ReporteGeneralRequest(BaseModel):
     ids_documentos: List[int]
 
+def _guardar_y_registrar(db, archivo, id_cliente, id_producto, nombre):
+    """
+    Guarda el archivo subido (en streaming, con nombre único) y crea su fila
+    en documentos. Retorna (doc_db, sha256 del archivo).
+    """
+    try:
+        file_path, sha256_archivo, _ = subidas.guardar_subida(archivo, UPLOAD_DIR)
+    except subidas.ArchivoDemasiadoGrande as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    documento_data = schemas.DocumentoCreate(
+        id_cliente=id_cliente,
+        id_producto=id_producto,
+        nombre=nombre
+    )
+    return crud.create_documento(db, documento_data, archivo_url=file_path), sha256_archivo
+
+def _trabajo_out(doc_db):
+    return schemas.TrabajoAnalisisOut(
+        id_trabajo=doc_db.id_documento,
+        id_documento=doc_db.id_documento,
+        estado=doc_db.estado_analisis,
+        progreso=doc_db.progreso_analisis or 0,
+        error=doc_db.error_analisis
+    )
+
+def _modo_busqueda(modo):
+    try:
+        return ia_analisis.normalizar_modo_busqueda(modo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _coincide_etag(request, etag):
+    """If-None-Match puede traer varias etiquetas separadas por comas (o *)."""
+    valor = request.headers.get("if-none-match")
+    if not valor:
+        return False
+    etiquetas = [e.strip().removeprefix("W/") for e in valor.split(",")]
+    return etag in etiquetas or "*" in etiquetas
+
+def _cabeceras_pdf(filename, clave):
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        # El navegador lo guarda pero revalida cada vez (el análisis puede cambiar)
+        "Cache-Control": "private, no-cache",
+    }
+    # La clave solo identifica los bytes si el archivo se conserva: sin caché,
+    # cada generación cambia (fechas internas del PDF) y un If-Range con ella
+    # mezclaría dos archivos. FileResponse pone entonces su propio ETag.
+    if cache_reportes.CACHE_ACTIVA:
+        headers["ETag"] = f'"{clave}"'
+    return headers
+
+def _respuesta_pdf(ruta, headers):
+    """
+    El PDF se envía desde disco: por bloques, con Content-Length y con Range
+    (descargas reanudables). Un temporal (caché apagada) no se borra aquí:
+    vive lo que su trabajo en render_reportes, para reintentos y reanudaciones.
+    """
+    return FileResponse(ruta, media_type="application/pdf", headers=headers)
+
+def _obtener_documento_propio(db, id_documento, current_user):
+    db_doc = db.query(models.Documento).filter(models.Documento.id_documento == id_documento).first()
+    if not db_doc:
+        raise HTTPException(status_code=404, detail="Documento no encontrado")
+    if db_doc.id_cliente != current_user.id_cliente:
+        raise HTTPException(status_code=403, detail="No autorizado")
+    return db_doc
+
 @router.post("/subir-analizar", response_model=schemas.DocumentoAnalisisOut)
 def subir_y_analizar(
     id_producto: int = Form(...),
@@ -26,59 +98,234 @@ def subir_y_analizar(
     marca: str = Form(""), 
     archivo: UploadFile = File(...),
     analizar: bool = Form(True),
+    modo_busqueda: Optional[str] = Form(None),
     db: Session = Depends(database.get_db),
     current_user: models.Cliente = Depends(auth.get_current_user)
 ):
+    modo_busqueda = _modo_busqueda(modo_busqueda)
     try:
-        id_cliente = current_user.id_cliente
-        file_path = os.path.join(UPLOAD_DIR, archivo.filename)
-        with open(file_path, "wb") as f:
-            f.write(archivo.file.read())
-
-        documento_data = schemas.DocumentoCreate(
-            id_cliente=id_cliente,
-            id_producto=id_producto,
-            nombre=nombre
-        )
-        doc_db = crud.create_documento(db, documento_data, archivo_url=file_path)
+        doc_db, sha256_archivo = _guardar_y_registrar(db, archivo, current_user.id_cliente, id_producto, nombre)
 
         resultados_ia = []
         if analizar and archivo.filename.lower().endswith(".pdf"):
-            cat_map = {"laptop": "Laptop", "smarttv": "SmartTV", "smart tv": "SmartTV", "tv": "SmartTV", "luminaria": "Luminaria"}
-            categoria_clean = cat_map.get(categoria.lower(), "Laptop")
-
-            tipo_clean = "Ficha"
-            if "manual" in tipo.lower(): tipo_clean = "Manual"
-            elif "etiqueta" in tipo.lower(): tipo_clean = "Etiqueta"
+            categoria_clean = ia_analisis.normalizar_categoria(categoria)
+            tipo_clean = ia_analisis.normalizar_tipo_documento(tipo)
 
             print(f"Analizando: {categoria_clean} - {tipo_clean}...")
             
-            resultados_ia = ia_analisis.analizar_documento(
-                file_path, tipo_clean, categoria_clean, marca_esperada=marca
+            catalogo = catalogo_criterios.obtener()
+            resultados_ia = cache_analisis.analizar_con_cache(
+                db, doc_db.archivo_url, tipo_clean, categoria_clean, marca_esperada=marca,
+                sha256_archivo=sha256_archivo, modo_busqueda=modo_busqueda, catalogo=catalogo
+            )
+            # Igual que la cola: permite re-analizarlo cuando cambien los criterios
+            doc_db.parametros_analisis = cola_analisis.parametros_analisis(
+                tipo_clean, categoria_clean, marca, sha256_archivo, modo_busqueda, catalogo.huella
             )
 
             if resultados_ia:
-                crud.update_documento_analisis(db, doc_db.id_documento, resultados_ia)
+                resumen = cumplimiento.calcular_resumen(resultados_ia, categoria_clean, tipo_clean)
+                crud.update_documento_analisis(db, doc_db.id_documento, resultados_ia, resumen=resumen)
                 doc_db.analisis_ia = resultados_ia
+            else:
+                db.commit()
 
         return doc_db
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+# --- ANÁLISIS ASÍNCRONO: responde de inmediato con el id del trabajo ---
+@router.post("/subir-analizar-async", response_model=schemas.TrabajoAnalisisOut, status_code=202)
+def subir_y_encolar_analisis(
+    id_producto: int = Form(...),
+    nombre: str = Form(...),
+    tipo: str = Form(...),
+    categoria: str = Form(...), 
+    marca: str = Form(""), 
+    archivo: UploadFile = File(...),
+    modo_busqueda: Optional[str] = Form(None),
+    db: Session = Depends(database.get_db),
+    current_user: models.Cliente = Depends(auth.get_current_user)
+):
+    if not archivo.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Solo se pueden analizar archivos PDF.")
+    modo_busqueda = _modo_busqueda(modo_busqueda)
+
+    try:
+        doc_db, sha256_archivo = _guardar_y_registrar(db, archivo, current_user.id_cliente, id_producto, nombre)
+        doc_db = cola_analisis.encolar(
+            db, doc_db, ia_analisis.normalizar_tipo_documento(tipo), ia_analisis.normalizar_categoria(categoria), marca,
+            sha256_archivo=sha256_archivo, modo_busqueda=modo_busqueda
+        )
+        return _trabajo_out(doc_db)
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@router.get("/{id_documento}/estado", response_model=schemas.TrabajoAnalisisOut)
+def estado_analisis(
+    id_documento: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.Cliente = Depends(auth.get_current_user)
+):
+    db_doc = _obtener_documento_propio(db, id_documento, current_user)
+    return _trabajo_out(db_doc)
+
+@router.get("/{id_documento}/resultado", response_model=schemas.DocumentoAnalisisOut)
+def resultado_analisis(
+    id_documento: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.Cliente = Depends(auth.get_current_user)
+):
+    db_doc = _obtener_documento_propio(db, id_documento, current_user)
+
+    if db_doc.estado_analisis == cola_analisis.ESTADO_ERROR:
+        raise HTTPException(status_code=500, detail=f"El análisis falló: {db_doc.error_analisis}")
+    if db_doc.estado_analisis in (cola_analisis.ESTADO_PENDIENTE, cola_analisis.ESTADO_PROCESANDO):
+        raise HTTPException(status_code=409, detail="El análisis aún no ha terminado.")
+    return schemas.DocumentoAnalisisOut(
+        id_documento=db_doc.id_documento,
+        nombre=db_doc.nombre,
+        archivo_url=db_doc.archivo_url,
+        analisis_ia=db_doc.analisis_ia or []
+    )
+
+# --- ÍNDICE DE CUMPLIMIENTO (checklist y porcentajes sin recorrer analisis_ia) ---
+@router.get("/{id_documento}/cumplimiento", response_model=schemas.CumplimientoOut)
+def cumplimiento_documento(
+    id_documento: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.Cliente = Depends(auth.get_current_user)
+):
+    db_doc = _obtener_documento_propio(db, id_documento, current_user)
+    if db_doc.analisis_ia is None:
+        raise HTTPException(status_code=400, detail="Este documento no ha sido analizado aún.")
+
+    # Misma deducción que recalcular_resumenes para documentos sin parámetros
+    params = db_doc.parametros_analisis or {}
+    categoria = params.get("categoria") or ia_analisis.normalizar_categoria(
+        db_doc.producto.nombre if db_doc.producto else "Laptop"
+    )
+    tipo = params.get("tipo") or ia_analisis.normalizar_tipo_documento(db_doc.nombre)
+
+    indice = db_doc.indice_cumplimiento
+    if not cumplimiento.indice_vigente(indice, db_doc.analisis_ia, categoria, tipo):
+        # Índice viejo (otro catálogo u otro análisis) o de antes de la columna: se calcula y se guarda
+        indice = cumplimiento.construir_indice(db_doc.analisis_ia, categoria, tipo)
+        db_doc.indice_cumplimiento = indice
+        db.commit()
+
+    return schemas.CumplimientoOut(
+        id_documento=db_doc.id_documento,
+        **{campo: indice[campo] for campo in schemas.CumplimientoOut.model_fields if campo != "id_documento"}
+    )
+
+# --- IMÁGENES DE EVIDENCIA (almacén de artefactos, contenido inmutable) ---
+@router.get("/evidencias/{ref}")
+def obtener_evidencia(ref: str, request: Request):
+    if not artefactos.ref_valida(ref):
+        raise HTTPException(status_code=404, detail="Evidencia no encontrada")
+
+    # La referencia es el hash del contenido: sirve directamente como ETag
+    etag = f'"{ref.rsplit(".", 1)[0]}"'
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": etag}
+    if _coincide_etag(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    ruta = artefactos.ruta_artefacto(ref)
+    if not os.path.exists(ruta):
+        raise HTTPException(status_code=404, detail="Evidencia no encontrada")
+    return FileResponse(ruta, media_type=artefactos.tipo_mime(ref), headers=headers)
+
 # --- CAMBIO IMPORTANTE: response_model con análisis incluido para el Historial ---
 @router.get("/", response_model=list[schemas.DocumentoAnalisisOut])
 def listar_documentos(db: Session = Depends(database.get_db)):
     return crud.get_documentos(db)
 
-# --- REPORTE INDIVIDUAL ---
-@router.get("/{id_documento}/reporte-pdf")
-def descargar_reporte_pdf(
-    id_documento: int,
-    db: Session = Depends(database.get_db),
+# --- GENERACIÓN DE REPORTES EN EL POOL DE RENDER ---
+# Los endpoints de reportes son async: consultas y caché corren en el
+# threadpool (rápido) y la maquetación en el pool acotado de
+# services/render_reportes.py, para que una ráfaga de reportes no deje sin
+# hilos al resto de la API. Cola llena -> 429; si tarda más de
+# NOPRO_RENDER_ESPERA_S -> 202 con un id para descargarlo después.
+
+def _instantanea_documento(db_doc):
+    """
+    Copia plana de lo que el render lee del documento. La generación corre en
+    el pool de render, con la sesión de la petición ya cerrada: no debe tocar
+    instancias ORM (una carga diferida lanzaría DetachedInstanceError).
+    """
+    return SimpleNamespace(
+        id_documento=db_doc.id_documento,
+        nombre=db_doc.nombre,
+        analisis_ia=db_doc.analisis_ia,
+        indice_cumplimiento=db_doc.indice_cumplimiento,
+    )
+
+def _respuesta_trabajo(trabajo):
+    url = f"/documentos/reportes-pdf/{trabajo.id_trabajo}"
+    return JSONResponse(
+        status_code=202,
+        content={"id_trabajo": trabajo.id_trabajo, "estado": trabajo.estado, "url": url},
+        headers={"Location": url, "Retry-After": str(render_reportes.REINTENTAR_S)}
+    )
+
+def _error_render(trabajo, detalle):
+    error = trabajo.futuro.exception()
+    print(f"Error generando PDF ({trabajo.id_trabajo}): {error}")
+    import traceback
+    traceback.print_exception(error)
+    raise HTTPException(status_code=500, detail=detalle.format(error=error))
+
+async def _entregar_reporte(preparado, id_cliente, detalle_error):
+    """preparado: una respuesta ya lista (304 o acierto de caché) o (clave, cabeceras, generar)."""
+    if isinstance(preparado, Response):
+        return preparado
+    clave, headers, generar = preparado
+    try:
+        trabajo = render_reportes.enviar(clave, id_cliente, generar, headers)
+    except render_reportes.RenderSaturado:
+        raise HTTPException(
+            status_code=429, detail="Hay demasiados reportes generándose. Intente de nuevo en unos segundos.",
+            headers={"Retry-After": str(render_reportes.REINTENTAR_S)}
+        )
+    try:
+        # shield: si se agota la espera el trabajo sigue y se descarga por su id
+        await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(trabajo.futuro)), timeout=render_reportes.ESPERA_S)
+    except asyncio.TimeoutError:
+        return _respuesta_trabajo(trabajo)
+    except Exception:
+        _error_render(trabajo, detalle_error)
+    ruta, _ = trabajo.futuro.result()
+    return _respuesta_pdf(ruta, headers)
+
+@router.get("/reportes-pdf/{id_trabajo}")
+def descargar_trabajo_reporte(
+    id_trabajo: str,
     current_user: models.Cliente = Depends(auth.get_current_user)
 ):
+    trabajo = render_reportes.obtener(id_trabajo)
+    if trabajo is None or trabajo.id_cliente != current_user.id_cliente:
+        raise HTTPException(status_code=404, detail="Trabajo de reporte no encontrado o vencido")
+    if not trabajo.futuro.done():
+        return _respuesta_trabajo(trabajo)
+    if trabajo.estado == render_reportes.ESTADO_ERROR:
+        _error_render(trabajo, "Error generando el PDF: {error}")
+    ruta, _ = trabajo.futuro.result()
+    if not os.path.exists(ruta):
+        # Reporte de caché desalojado o invalidado después de generarse
+        raise HTTPException(status_code=410, detail="El reporte ya no está disponible; vuelva a solicitarlo.")
+    return _respuesta_pdf(ruta, trabajo.cabeceras)
+
+# --- REPORTE INDIVIDUAL ---
+def _preparar_reporte_pdf(id_documento, request, db, current_user):
     db_doc = db.query(models.Documento).filter(models.Documento.id_documento == id_documento).first()
     if not db_doc:
         raise HTTPException(status_code=404, detail="Documento no encontrado")
@@ -100,47 +347,52 @@ def descargar_reporte_pdf(
         marca_prod = producto.marca if producto.marca else "Genérico"
         modelo_prod = producto.descripcion if producto.descripcion else "Sin Modelo"
 
-    cat_map = {"laptop": "Laptop", "smarttv": "SmartTV", "smart tv": "SmartTV", "tv": "SmartTV", "luminaria": "Luminaria"}
-    categoria_clean = cat_map.get(categoria_prod.lower(), "Laptop")
+    # Misma normalización que el análisis y el índice de cumplimiento
+    categoria_clean = ia_analisis.normalizar_categoria(categoria_prod)
+    tipo_clean = ia_analisis.normalizar_tipo_documento(db_doc.nombre)
 
-    tipo_clean = "Ficha"
-    nombre_doc = db_doc.nombre.lower()
-    if "manual" in nombre_doc:
-        tipo_clean = "Manual"
-    elif "etiqueta" in nombre_doc:
-        tipo_clean = "Etiqueta"
+    # Mismo reporte mientras no cambie el análisis, la plantilla, el catálogo ni la fecha
+    fecha = pdf_report.fecha_reporte()
+    clave = cache_reportes.construir_clave(
+        db_doc.id_documento, db_doc.analisis_ia, pdf_report.VERSION_PLANTILLA,
+        catalogo_criterios.obtener().huella, categoria_clean, tipo_clean, marca_prod, modelo_prod, fecha
+    )
+    filename = f"Reporte_{marca_prod}_{tipo_clean}.pdf"
+    filename = "".join([c for c in filename if c.isalnum() or c in (' ', '.', '_')]).strip()
+    headers = _cabeceras_pdf(filename, clave)
+    if "ETag" in headers and _coincide_etag(request, headers["ETag"]):
+        cache_reportes.contar_no_modificado()
+        return Response(status_code=304, headers=headers)
 
-    try:
-        pdf_buffer = pdf_report.generar_pdf_reporte(
-            documento_db=db_doc,
-            resultados_ia=db_doc.analisis_ia,
-            categoria_producto=categoria_clean,
-            tipo_documento=tipo_clean,
-            marca_producto=marca_prod,   
-            modelo_producto=modelo_prod  
-        )
-        
-        filename = f"Reporte_{marca_prod}_{tipo_clean}.pdf"
-        filename = "".join([c for c in filename if c.isalnum() or c in (' ', '.', '_')]).strip()
-        
-        return StreamingResponse(
-            pdf_buffer, 
-            media_type="application/pdf", 
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-    except Exception as e:
-        print(f"Error generando PDF: {e}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Error generando el PDF: {str(e)}")
+    ruta = cache_reportes.obtener(db_doc.id_documento, clave)
+    if ruta:
+        return _respuesta_pdf(ruta, headers)
 
-# --- NUEVO ENDPOINT PARA PDF GENERAL ---
-@router.post("/reporte-general-pdf")
-def descargar_reporte_general_pdf(
-    payload: ReporteGeneralRequest,
+    # Se escribe directo al archivo de la caché (no se arma en memoria)
+    doc = _instantanea_documento(db_doc)
+    return clave, headers, lambda: cache_reportes.generar(doc.id_documento, clave, lambda destino: pdf_report.generar_pdf_reporte(
+        documento_db=doc,
+        resultados_ia=doc.analisis_ia,
+        categoria_producto=categoria_clean,
+        tipo_documento=tipo_clean,
+        marca_producto=marca_prod,   
+        modelo_producto=modelo_prod,
+        fecha=fecha,
+        destino=destino
+    ))
+
+@router.get("/{id_documento}/reporte-pdf")
+async def descargar_reporte_pdf(
+    id_documento: int,
+    request: Request,
     db: Session = Depends(database.get_db),
     current_user: models.Cliente = Depends(auth.get_current_user)
 ):
+    preparado = await run_in_threadpool(_preparar_reporte_pdf, id_documento, request, db, current_user)
+    return await _entregar_reporte(preparado, current_user.id_cliente, "Error generando el PDF: {error}")
+
+# --- NUEVO ENDPOINT PARA PDF GENERAL ---
+def _preparar_reporte_general(payload, db, current_user):
     ids = payload.ids_documentos
     if not ids:
         raise HTTPException(status_code=400, detail="No se seleccionaron documentos para el reporte.")
@@ -162,9 +414,8 @@ def descargar_reporte_general_pdf(
     modelo_prod = producto.descripcion if (producto and producto.descripcion) else "Modelo no especificado"
     categoria_prod = producto.nombre if producto else "Laptop"
     
-    # Mapa de categorías (Normalización)
-    cat_map = {"laptop": "Laptop", "smarttv": "SmartTV", "smart tv": "SmartTV", "tv": "SmartTV", "luminaria": "Luminaria"}
-    categoria_clean = cat_map.get(categoria_prod.lower(), "Laptop")
+    # Misma normalización que el análisis y el índice de cumplimiento
+    categoria_clean = ia_analisis.normalizar_categoria(categoria_prod)
 
     # Preparar lista para el servicio PDF
     lista_para_pdf = []
@@ -172,33 +423,48 @@ def descargar_reporte_general_pdf(
         # Solo incluimos documentos que ya tengan análisis
         if d.analisis_ia: 
             lista_para_pdf.append({
-                'doc': d,
+                'doc': _instantanea_documento(d),
                 'resultados': d.analisis_ia
             })
 
     if not lista_para_pdf:
         raise HTTPException(status_code=400, detail="Ninguno de los documentos seleccionados ha sido analizado por la IA aún.")
 
+    filename = f"Reporte_General_{marca_prod}.pdf"
+    # Limpieza simple del nombre de archivo
+    filename = "".join([c for c in filename if c.isalnum() or c in (' ', '.', '_', '-')]).strip()
+
     try:
-        # Llamada a la función corregida en pdf_report.py
-        pdf_buffer = pdf_report.generar_pdf_reporte_general(
-            lista_docs=lista_para_pdf,
-            categoria_producto=categoria_clean,
-            marca_producto=marca_prod,
-            modelo_producto=modelo_prod
-        )
-        
-        filename = f"Reporte_General_{marca_prod}.pdf"
-        # Limpieza simple del nombre de archivo
-        filename = "".join([c for c in filename if c.isalnum() or c in (' ', '.', '_', '-')]).strip()
-        
-        return StreamingResponse(
-            pdf_buffer, 
-            media_type="application/pdf", 
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        # Secciones y clave (sin renderizar): misma selección y mismos análisis -> mismo archivo
+        secciones = pdf_report.planificar_reporte_general(lista_para_pdf, categoria_clean, marca_prod, modelo_prod)
+        clave = pdf_report.clave_reporte_general(secciones)
+        headers = _cabeceras_pdf(filename, clave)
+        # Un POST no se revalida con If-None-Match; el ETag sirve para If-Range al reanudar
+        ruta = cache_reportes.obtener_general(clave)
+        if ruta:
+            return _respuesta_pdf(ruta, headers)
     except Exception as e:
         print(f"Error generando PDF General: {e}")
         import traceback
         traceback.print_exc() # Esto ayudará a ver el error real en la consola del backend
-        raise HTTPException(status_code=500, detail="Ocurrió un error interno al generar el PDF unificado.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Ocurrió un error interno al generar el PDF unificado.")
+
+    return clave, headers, lambda: cache_reportes.generar_general(clave, lambda destino: pdf_report.generar_pdf_reporte_general(
+        lista_docs=lista_para_pdf,
+        categoria_producto=categoria_clean,
+        marca_producto=marca_prod,
+        modelo_producto=modelo_prod,
+        destino=destino,
+        secciones=secciones
+    ))
+
+@router.post("/reporte-general-pdf")
+async def descargar_reporte_general_pdf(
+    payload: ReporteGeneralRequest,
+    db: Session = Depends(database.get_db),
+    current_user: models.Cliente = Depends(auth.get_current_user)
+):
+    preparado = await run_in_threadpool(_preparar_reporte_general, payload, db, current_user)
+    return await _entregar_reporte(
+        preparado, current_user.id_cliente, "Ocurrió un error interno al generar el PDF unificado."
+    )
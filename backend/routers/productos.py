@@ -1,8 +1,10 @@
 import os
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query
+from typing import Optional
 from sqlalchemy.orm import Session
 # Importamos auth y models para el nuevo endpoint
 from backend import crud, schemas, database, auth, models 
+from backend.services import subidas
 
 router = APIRouter(prefix="/productos", tags=["Productos"])
 
@@ -37,6 +39,21 @@ def listar_productos_del_usuario(
     productos = crud.get_productos_by_cliente(db, cliente_id=current_user.id_cliente)
     return productos
 
+# --- HISTORIAL LIGERO Y PAGINADO ---
+# Solo resumen por documento (conteo de hallazgos y % de cumplimiento).
+# Los hallazgos completos se piden bajo demanda: GET /documentos/{id}/resultado
+@router.get("/me/historial", response_model=schemas.HistorialPaginaOut)
+def historial_del_usuario(
+    cursor: Optional[int] = None,
+    limite: int = Query(20, ge=1, le=100),
+    db: Session = Depends(database.get_db),
+    current_user: models.Cliente = Depends(auth.get_current_user)
+):
+    productos, siguiente_cursor = crud.get_historial_cliente(
+        db, cliente_id=current_user.id_cliente, cursor=cursor, limit=limite
+    )
+    return {"items": productos, "siguiente_cursor": siguiente_cursor}
+
 # --- ENDPOINT PARA LISTAR PRODUCTOS (Existente) ---
 # Este endpoint ahora solo debería ser para Administradores, pero por ahora lo dejamos como está.
 @router.get("/", response_model=list[schemas.ProductoOut])
@@ -56,10 +73,8 @@ def subir_documento(
     db: Session = Depends(database.get_db)
 ):
     try:
-        # Guardar archivo en carpeta /uploads
-        file_path = os.path.join(UPLOAD_DIR, archivo.filename)
-        with open(file_path, "wb") as f:
-            f.write(archivo.file.read())
+        # Guardar archivo en carpeta /uploads (en bloques, con nombre único)
+        file_path, _, _ = subidas.guardar_subida(archivo, UPLOAD_DIR)
 
         # Registrar documento en la BD
         # Ajustamos el schema create
@@ -71,6 +86,8 @@ def subir_documento(
         # Pasamos la URL del archivo por separado al CRUD
         return crud.create_documento(db, documento_data, archivo_url=file_path)
 
+    except subidas.ArchivoDemasiadoGrande as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al subir documento: {str(e)}")
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 # --- 1. SCHEMAS DE RESULTADOS IA Y DOCUMENTOS ---
@@ -9,7 +9,9 @@ class ResultadoIA(BaseModel):
     Hallazgo: Optional[str] = None
     Pagina: int
     Contexto: Optional[str] = None
-    ImagenBase64: Optional[str] = None
+    ImagenBase64: Optional[str] = None # Heredado: los análisis nuevos usan ImagenRef/ImagenUrl
+    ImagenRef: Optional[str] = None
+    ImagenUrl: Optional[str] = None
 
 class DocumentoBase(BaseModel):
     nombre: str
@@ -35,6 +37,37 @@ class DocumentoAnalisisOut(DocumentoOut):
     class Config:
         from_attributes = True
 
+# Estado de un trabajo de la cola de análisis (id_trabajo == id_documento)
+class TrabajoAnalisisOut(BaseModel):
+    id_trabajo: int
+    id_documento: int
+    estado: Optional[str] = None
+    progreso: int = 0
+    error: Optional[str] = None
+
+# Índice de cumplimiento: checklist ya resuelto y porcentajes (services/cumplimiento.py)
+class CriterioChecklistOut(BaseModel):
+    norma: str
+    requisito: str
+    hallazgos: int
+    cumple: bool
+
+class CumplimientoNormaOut(BaseModel):
+    cumplidos: int
+    totales: int
+    porcentaje: Optional[float] = None
+
+class CumplimientoOut(BaseModel):
+    id_documento: int
+    categoria: str
+    tipo: str
+    total_hallazgos: int
+    criterios_cumplidos: int
+    criterios_totales: int
+    porcentaje_cumplimiento: Optional[float] = None
+    por_norma: Dict[str, CumplimientoNormaOut] = {}
+    checklist: List[CriterioChecklistOut] = []
+
 # --- 2. SCHEMAS DE PRODUCTO ---
 class ProductoBase(BaseModel):
     nombre: str
@@ -56,6 +89,36 @@ class ProductoOut(BaseModel):
     class Config:
         from_attributes = True
 
+# Historial ligero: resumen por documento, sin la lista de hallazgos
+class DocumentoResumenOut(BaseModel):
+    id_documento: int
+    nombre: str
+    archivo_url: Optional[str] = None
+    fecha_subida: Optional[datetime] = None
+    estado_analisis: Optional[str] = None
+    total_hallazgos: Optional[int] = None
+    criterios_cumplidos: Optional[int] = None
+    criterios_totales: Optional[int] = None
+    porcentaje_cumplimiento: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class ProductoHistorialOut(BaseModel):
+    id_producto: int
+    nombre: str
+    marca: Optional[str]
+    descripcion: Optional[str]
+    fecha_registro: Optional[datetime]
+    documentos: List[DocumentoResumenOut] = []
+
+    class Config:
+        from_attributes = True
+
+class HistorialPaginaOut(BaseModel):
+    items: List[ProductoHistorialOut]
+    siguiente_cursor: Optional[int] = None
+
 # --- 3. SCHEMAS DE CLIENTE ---
 class ClienteBase(BaseModel):
     nombre: str
@@ -0,0 +1,189 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+# =========================================================================
+#  ALMACÉN DE ARTEFACTOS (IMÁGENES DE EVIDENCIA)
+# =========================================================================
+# Las imágenes de evidencia ya no viajan como base64 dentro de
+# Documento.analisis_ia. Se guardan en disco direccionadas por contenido
+# (sha256 del archivo) y el hallazgo solo lleva la referencia:
+#   {"ImagenRef": "<sha256>.jpg", "ImagenUrl": "/documentos/evidencias/<sha256>.jpg"}
+# Al ser inmutables se pueden servir con caché agresiva en el navegador.
+#
+# También guarda, para el re-análisis incremental (backend/reanalizar_criterios.py):
+#   textos/<sha256 del PDF>.<extractor>.json.gz  texto normalizado por página
+#   catalogos/<huella>.json                      cada versión del catálogo de criterios
+
+ARTEFACTOS_DIR = os.getenv(
+    "NOPRO_ARTEFACTOS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "artefactos")
+)
+URL_BASE = "/documentos/evidencias"
+
+_RE_REF = re.compile(r'^[0-9a-f]{64}\.(jpg|jpeg|png|webp)$')
+
+TIPOS_MIME = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+}
+
+
+def ref_valida(ref):
+    return bool(ref) and bool(_RE_REF.match(ref))
+
+
+def ruta_artefacto(ref):
+    """Ruta en disco de una referencia (subcarpeta por los 2 primeros caracteres)."""
+    if not ref_valida(ref):
+        raise ValueError(f"Referencia de artefacto inválida: {ref}")
+    return os.path.join(ARTEFACTOS_DIR, ref[:2], ref)
+
+
+def url_artefacto(ref):
+    return f"{URL_BASE}/{ref}"
+
+
+def tipo_mime(ref):
+    return TIPOS_MIME.get(ref.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+@contextmanager
+def escritura_atomica(ruta):
+    """
+    Ruta temporal junto a `ruta` para escribir un archivo grande por partes;
+    al salir sin error se renombra a `ruta`: nunca queda un archivo a medias.
+    """
+    carpeta = os.path.dirname(ruta)
+    os.makedirs(carpeta, exist_ok=True)
+    fd, ruta_tmp = tempfile.mkstemp(dir=carpeta, prefix=".art-")
+    os.close(fd)
+    try:
+        yield ruta_tmp
+        os.replace(ruta_tmp, ruta)
+    except BaseException:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
+
+
+def _escribir_atomico(ruta, datos):
+    """Escribe en un temporal y lo renombra: nunca queda un archivo a medias."""
+    with escritura_atomica(ruta) as ruta_tmp:
+        with open(ruta_tmp, "wb") as f:
+            f.write(datos)
+
+
+def guardar_imagen(datos, extension="jpg", escribir=True):
+    """
+    Guarda los bytes de la imagen y devuelve su referencia.
+    Si ya existe (mismo contenido) no se vuelve a escribir.
+    escribir=False solo calcula la referencia (simulaciones / mediciones).
+    """
+    ref = f"{hashlib.sha256(datos).hexdigest()}.{extension.lower()}"
+    if not escribir:
+        return ref
+
+    ruta = ruta_artefacto(ref)
+    if not os.path.exists(ruta):
+        _escribir_atomico(ruta, datos)
+    return ref
+
+
+def leer_imagen(ref):
+    with open(ruta_artefacto(ref), "rb") as f:
+        return f.read()
+
+
+def referencia_evidencia(ref):
+    """Campos que se guardan en el hallazgo en lugar del base64."""
+    return {"ImagenRef": ref, "ImagenUrl": url_artefacto(ref)}
+
+
+def externalizar_resultados(resultados, escribir=True):
+    """
+    Reemplaza cada ImagenBase64 de una lista de hallazgos por su referencia.
+    Retorna (nueva_lista, numero_de_imagenes_movidas). No modifica la original.
+    """
+    nuevos = []
+    movidas = 0
+    for item in resultados or []:
+        if isinstance(item, dict) and item.get("ImagenBase64"):
+            item = dict(item)
+            datos = base64.b64decode(item.pop("ImagenBase64"))
+            item.update(referencia_evidencia(guardar_imagen(datos, "jpg", escribir=escribir)))
+            movidas += 1
+        nuevos.append(item)
+    return nuevos, movidas
+
+
+def imagen_de_hallazgo(item):
+    """Bytes de la imagen de un hallazgo (referencia o base64 heredado), o None."""
+    get = item.get if isinstance(item, dict) else lambda k: getattr(item, k, None)
+    ref = get("ImagenRef")
+    if ref:
+        try:
+            return leer_imagen(ref)
+        except (OSError, ValueError):
+            return None
+    img_b64 = get("ImagenBase64")
+    if img_b64:
+        return base64.b64decode(img_b64)
+    return None
+
+
+# --- Texto por página y versiones del catálogo ----------------------------
+
+_RE_HEX = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _ruta_texto(sha256_archivo, extractor):
+    if not _RE_HEX.match(sha256_archivo or "") or not re.match(r'^[a-z0-9_]+$', extractor or ""):
+        raise ValueError(f"Texto de documento inválido: {sha256_archivo}.{extractor}")
+    return os.path.join(ARTEFACTOS_DIR, "textos", sha256_archivo[:2], f"{sha256_archivo}.{extractor}.json.gz")
+
+
+def guardar_texto_paginas(sha256_archivo, extractor, paginas):
+    """Guarda [(num_pagina, texto_normalizado)] de un PDF (mismo contenido -> mismo archivo)."""
+    ruta = _ruta_texto(sha256_archivo, extractor)
+    if not os.path.exists(ruta):
+        datos = json.dumps([[num, texto] for num, texto in paginas], ensure_ascii=False)
+        _escribir_atomico(ruta, gzip.compress(datos.encode("utf-8"), compresslevel=6))
+
+
+def leer_texto_paginas(sha256_archivo, extractor):
+    """[(num_pagina, texto_normalizado)] guardado para el PDF, o None si no existe."""
+    try:
+        with gzip.open(_ruta_texto(sha256_archivo, extractor), "rt", encoding="utf-8") as f:
+            return [(num, texto) for num, texto in json.load(f)]
+    except (OSError, ValueError):
+        return None
+
+
+def _ruta_catalogo(huella):
+    if not _RE_HEX.match(huella or ""):
+        raise ValueError(f"Huella de catálogo inválida: {huella}")
+    return os.path.join(ARTEFACTOS_DIR, "catalogos", f"{huella}.json")
+
+
+def guardar_catalogo(huella, datos):
+    """Archiva una versión del catálogo de criterios (una vez por huella)."""
+    ruta = _ruta_catalogo(huella)
+    if not os.path.exists(ruta):
+        _escribir_atomico(ruta, json.dumps(datos, ensure_ascii=False).encode("utf-8"))
+
+
+def leer_catalogo(huella):
+    """Contenido de una versión archivada del catálogo, o None."""
+    try:
+        with open(_ruta_catalogo(huella), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from backend import models
+from backend.services import catalogo_criterios, extraccion_texto, ia_analisis, ia_vision, motor_criterios, proveedor_vision
+
+# =========================================================================
+#  CACHÉ DE RESULTADOS DIRECCIONADA POR CONTENIDO
+# =========================================================================
+# Clave = sha256(archivo) + categoria + tipo + marca + modo de búsqueda + huella de versión
+# (criterios, lógica de análisis y pesos del modelo). Un acierto devuelve
+# los resultados guardados sin abrir el PDF, sin YOLO y sin Google Vision.
+# La tabla se limita por tamaño: al superar el límite se desalojan las
+# entradas con acceso más antiguo (LRU).
+
+CACHE_ACTIVA = os.getenv("NOPRO_CACHE_ANALISIS", "1").lower() not in ("0", "false", "no")
+CACHE_MAX_MB = float(os.getenv("NOPRO_CACHE_MAX_MB", "512"))
+CACHE_MAX_ENTRADAS = int(os.getenv("NOPRO_CACHE_MAX_ENTRADAS", "10000"))
+
+_CONTADORES = {"hits": 0, "misses": 0, "desalojos": 0}
+_LOCK = threading.Lock()
+_huella_version = None
+
+
+def _contar(nombre, n=1):
+    with _LOCK:
+        _CONTADORES[nombre] += n
+
+
+def calcular_sha256(ruta_archivo):
+    """Hash del archivo leyendo en bloques (no carga el PDF completo en memoria)."""
+    h = hashlib.sha256()
+    with open(ruta_archivo, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def huella_version(catalogo=None):
+    """
+    Huella de todo lo que influye en el resultado: criterios, código, modelos, extractor y proveedor de visión.
+    Se recalcula solo cuando cambia el catálogo de criterios (recarga en caliente).
+    """
+    global _huella_version
+    huella_criterios = (catalogo or catalogo_criterios.obtener()).huella
+    if _huella_version is None or _huella_version[0] != huella_criterios:
+        h = hashlib.sha256()
+        h.update(ia_analisis.VERSION_ANALISIS.encode("utf-8"))
+        h.update(huella_criterios.encode("utf-8"))
+        h.update(ia_vision.huella_modelo().encode("utf-8"))
+        h.update(ia_vision.huella_configuracion().encode("utf-8"))
+        # Los backends de texto pueden ordenar distinto las columnas
+        h.update(extraccion_texto.nombre_extractor().encode("utf-8"))
+        # Con "regex" una búsqueda cortada por tiempo cuenta como sin coincidencia
+        h.update(motor_criterios.nombre_motor().encode("utf-8"))
+        # Con el stub de visión los resultados no son reales: nunca se mezclan
+        h.update(proveedor_vision.PROVEEDOR.encode("utf-8"))
+        _huella_version = (huella_criterios, h.hexdigest())
+    return _huella_version[1]
+
+
+def construir_clave(sha256_archivo, categoria, tipo, marca, modo_busqueda=None, catalogo=None):
+    modo_busqueda = ia_analisis.normalizar_modo_busqueda(modo_busqueda)
+    partes = [sha256_archivo, categoria or "", tipo or "", (marca or "").strip().lower(), modo_busqueda, huella_version(catalogo)]
+    return hashlib.sha256("|".join(partes).encode("utf-8")).hexdigest()
+
+
+def obtener(db, clave):
+    """Devuelve los resultados guardados o None. Actualiza el acceso para el LRU."""
+    entrada = db.query(models.CacheAnalisis).filter(models.CacheAnalisis.clave == clave).first()
+    if entrada is None:
+        _contar("misses")
+        return None
+
+    resultados = entrada.resultados
+    entrada.hits = (entrada.hits or 0) + 1
+    entrada.ultimo_acceso = func.now()
+    db.commit()
+    _contar("hits")
+    return resultados
+
+
+def guardar(db, clave, sha256_archivo, resultados, catalogo=None):
+    """Guarda una entrada nueva y aplica el límite de tamaño."""
+    tamano = len(json.dumps(resultados, ensure_ascii=False).encode("utf-8"))
+    entrada = models.CacheAnalisis(
+        clave=clave,
+        sha256_archivo=sha256_archivo,
+        version=huella_version(catalogo),
+        resultados=resultados,
+        tamano_bytes=tamano,
+        hits=0
+    )
+    try:
+        db.add(entrada)
+        db.commit()
+    except IntegrityError:
+        # Otro worker guardó la misma clave al mismo tiempo
+        db.rollback()
+        return
+    desalojar(db)
+
+
+def desalojar(db, max_bytes=None, max_entradas=None):
+    """Elimina las entradas menos usadas recientemente hasta cumplir los límites."""
+    if max_bytes is None:
+        max_bytes = int(CACHE_MAX_MB * 1024 * 1024)
+    if max_entradas is None:
+        max_entradas = CACHE_MAX_ENTRADAS
+
+    total_entradas, total_bytes = db.query(
+        func.count(models.CacheAnalisis.clave),
+        func.coalesce(func.sum(models.CacheAnalisis.tamano_bytes), 0)
+    ).one()
+
+    if total_entradas <= max_entradas and total_bytes <= max_bytes:
+        return 0
+
+    eliminadas = 0
+    candidatas = db.query(models.CacheAnalisis.clave, models.CacheAnalisis.tamano_bytes)\
+                   .order_by(models.CacheAnalisis.ultimo_acceso.asc())\
+                   .all()
+    claves = []
+    for clave, tamano in candidatas:
+        if total_entradas <= max_entradas and total_bytes <= max_bytes:
+            break
+        claves.append(clave)
+        total_entradas -= 1
+        total_bytes -= tamano or 0
+        eliminadas += 1
+
+    if claves:
+        db.query(models.CacheAnalisis).filter(models.CacheAnalisis.clave.in_(claves)).delete(synchronize_session=False)
+        db.commit()
+        _contar("desalojos", eliminadas)
+    return eliminadas
+
+
+def analizar_con_cache(db, ruta_pdf, tipo_doc, categoria_producto, marca_esperada=None, progreso=None, sha256_archivo=None, modo_busqueda=None, catalogo=None):
+    """
+    Igual que ia_analisis.analizar_documento, pero consulta primero la caché.
+    sha256_archivo: hash ya calculado (p. ej. durante la subida) para no releer el archivo.
+    catalogo: catálogo de criterios a usar; quien llama lo pasa para saber con
+    qué versión quedó analizado el documento.
+    """
+    # Mismo catálogo para la clave y para el análisis, aunque se recargue a la mitad
+    catalogo = catalogo or catalogo_criterios.obtener()
+    if not CACHE_ACTIVA:
+        return ia_analisis.analizar_documento(
+            ruta_pdf, tipo_doc, categoria_producto, marca_esperada=marca_esperada, progreso=progreso,
+            modo_busqueda=modo_busqueda, catalogo=catalogo, sha256_archivo=sha256_archivo
+        )
+
+    sha256_archivo = sha256_archivo or calcular_sha256(ruta_pdf)
+    clave = construir_clave(sha256_archivo, categoria_producto, tipo_doc, marca_esperada, modo_busqueda, catalogo)
+
+    resultados = obtener(db, clave)
+    if resultados is not None:
+        print(f"⚡ Caché de análisis: acierto ({sha256_archivo[:12]}... {categoria_producto}/{tipo_doc})")
+        return resultados
+
+    estadisticas = {}
+    resultados = ia_analisis.analizar_documento(
+        ruta_pdf, tipo_doc, categoria_producto, marca_esperada=marca_esperada, progreso=progreso,
+        modo_busqueda=modo_busqueda, catalogo=catalogo, sha256_archivo=sha256_archivo,
+        estadisticas=estadisticas
+    )
+
+    # No guardamos análisis con fallos del sistema (incluida la visión en la
+    # nube caída o degradada) ni con búsquedas cortadas por tiempo: pueden
+    # faltar hallazgos y deben poder reintentarse
+    if estadisticas.get("busquedas_cortadas"):
+        print(f"⏩ Caché de análisis: no se guarda ({estadisticas['busquedas_cortadas']} búsquedas cortadas por tiempo).")
+    elif not any(r.get("Norma") == "Error Sistema" for r in resultados):
+        guardar(db, clave, sha256_archivo, resultados, catalogo)
+    return resultados
+
+
+def estadisticas():
+    with _LOCK:
+        datos = dict(_CONTADORES)
+    total = datos["hits"] + datos["misses"]
+    datos["tasa_aciertos"] = round(datos["hits"] / total, 3) if total else None
+    datos["activa"] = CACHE_ACTIVA
+    return datos
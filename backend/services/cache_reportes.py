@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+from backend.services import artefactos
+
+# =========================================================================
+#  CACHÉ DE REPORTES PDF RENDERIZADOS
+# =========================================================================
+# El reporte individual (GET /documentos/{id}/reporte-pdf) se genera una vez
+# y se sirve desde disco mientras no cambie nada de lo que lo determina:
+#   id del documento + sha256 de analisis_ia + versión de la plantilla
+#   (pdf_report.VERSION_PLANTILLA) + huella del catálogo (checklist) +
+#   categoría, tipo, marca, modelo y la fecha impresa en el encabezado.
+# La clave sirve también como ETag: el navegador revalida con If-None-Match
+# y recibe 304 sin que se lea el archivo.
+#
+# Archivos: artefactos/reportes/<id_documento>/<clave>.pdf
+# Cada documento conserva solo su reporte más reciente; al guardar el
+# análisis (crud, cola_analisis, reanalizar_criterios) se invalida.
+#
+# Secciones del reporte general (pdf_report, modo por secciones): cada
+# documento se renderiza como un PDF aparte direccionado por su contenido
+# (título, analisis_ia, criterios, plantilla...), en
+# artefactos/reportes/secciones/<clave[:2]>/<clave>.pdf. Se conservan como
+# mucho NOPRO_CACHE_SECCIONES_MAX; se desalojan las de uso más antiguo.
+# El reporte general completo se guarda igual (clave = claves de sus
+# secciones) en artefactos/reportes/generales, hasta NOPRO_CACHE_GENERALES_MAX.
+#
+# Los PDF se generan directo a un archivo (nunca completos en memoria) y se
+# envían desde disco con FileResponse: por bloques, con Content-Length y con
+# soporte de Range para reanudar descargas. Con la caché apagada se usa un
+# temporal que se conserva mientras exista su trabajo de render
+# (render_reportes lo borra al vencer el trabajo).
+
+REPORTES_DIR = os.path.join(artefactos.ARTEFACTOS_DIR, "reportes")
+CACHE_ACTIVA = os.getenv("NOPRO_CACHE_REPORTES", "1").lower() not in ("0", "false", "no")
+SECCIONES_DIR = os.path.join(REPORTES_DIR, "secciones")
+SECCIONES_MAX = int(os.getenv("NOPRO_CACHE_SECCIONES_MAX", "5000"))
+GENERALES_DIR = os.path.join(REPORTES_DIR, "generales")
+GENERALES_MAX = int(os.getenv("NOPRO_CACHE_GENERALES_MAX", "200"))
+
+_RE_CLAVE = re.compile(r'^[0-9a-f]{64}$')
+
+_CONTADORES = {"hits": 0, "misses": 0, "no_modificados": 0, "invalidaciones": 0,
+               "secciones_hits": 0, "secciones_misses": 0, "secciones_desalojadas": 0,
+               "generales_hits": 0, "generales_misses": 0, "generales_desalojados": 0}
+_LOCK = threading.Lock()
+
+
+def _contar(nombre, n=1):
+    with _LOCK:
+        _CONTADORES[nombre] += n
+
+
+def huella_analisis(resultados):
+    """sha256 del analisis_ia en forma canónica (mismo contenido -> misma huella)."""
+    canonico = json.dumps(resultados, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+def construir_clave(id_documento, resultados, version_plantilla, huella_catalogo,
+                    categoria, tipo, marca, modelo, fecha):
+    partes = {
+        "documento": id_documento,
+        "analisis": huella_analisis(resultados),
+        "plantilla": version_plantilla,
+        "catalogo": huella_catalogo,
+        "categoria": categoria,
+        "tipo": tipo,
+        "marca": marca,
+        "modelo": modelo,
+        "fecha": fecha,
+    }
+    return hashlib.sha256(json.dumps(partes, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _validar_clave(clave):
+    if not _RE_CLAVE.match(clave or ""):
+        raise ValueError(f"Clave de reporte inválida: {clave}")
+    return clave
+
+
+def _carpeta(id_documento):
+    return os.path.join(REPORTES_DIR, str(int(id_documento)))
+
+
+def ruta_reporte(id_documento, clave):
+    return os.path.join(_carpeta(id_documento), f"{_validar_clave(clave)}.pdf")
+
+
+def contar_no_modificado():
+    """Revalidación con If-None-Match resuelta con 304 (no se leyó el archivo)."""
+    _contar("no_modificados")
+
+
+def _generar_en(ruta, generar_pdf):
+    """
+    Llama generar_pdf(ruta_destino) sobre un temporal y lo publica en `ruta`.
+    Con la caché apagada deja el temporal. Retorna (ruta, temporal).
+    """
+    if not CACHE_ACTIVA:
+        fd, ruta_tmp = tempfile.mkstemp(prefix="nopro-reporte-", suffix=".pdf")
+        os.close(fd)
+        try:
+            generar_pdf(ruta_tmp)
+        except BaseException:
+            os.remove(ruta_tmp)
+            raise
+        return ruta_tmp, True
+    with artefactos.escritura_atomica(ruta) as ruta_tmp:
+        generar_pdf(ruta_tmp)
+    return ruta, False
+
+
+def obtener(id_documento, clave):
+    """Ruta del reporte guardado, o None si hay que generarlo."""
+    if not CACHE_ACTIVA:
+        return None
+    ruta = ruta_reporte(id_documento, clave)
+    if os.path.exists(ruta):
+        _contar("hits")
+        return ruta
+    _contar("misses")
+    return None
+
+
+def generar(id_documento, clave, generar_pdf):
+    """
+    Genera el reporte con generar_pdf(ruta_destino), lo guarda y borra los
+    reportes anteriores del documento. Retorna (ruta, temporal): temporal=True
+    si hay que borrarlo después de enviarlo (caché apagada).
+    """
+    ruta, temporal = _generar_en(ruta_reporte(id_documento, clave), generar_pdf)
+    if not temporal:
+        carpeta, nombre = os.path.split(ruta)
+        for otro in os.listdir(carpeta):
+            if otro != nombre and not otro.startswith("."):
+                try:
+                    os.remove(os.path.join(carpeta, otro))
+                except OSError:
+                    pass
+    return ruta, temporal
+
+
+def invalidar(id_documento):
+    """Borra los reportes guardados de un documento (su análisis cambió)."""
+    carpeta = _carpeta(id_documento)
+    if os.path.isdir(carpeta):
+        shutil.rmtree(carpeta, ignore_errors=True)
+        _contar("invalidaciones")
+
+
+# --- Archivos direccionados por contenido (secciones y reportes generales) --
+
+def _ruta_contenido(carpeta, clave):
+    return os.path.join(carpeta, clave[:2], f"{_validar_clave(clave)}.pdf")
+
+
+def _obtener_contenido(carpeta, clave, contador):
+    """Ruta del archivo si existe (y marca su uso para el desalojo LRU), o None."""
+    if not CACHE_ACTIVA:
+        return None
+    ruta = _ruta_contenido(carpeta, clave)
+    try:
+        # La fecha de modificación marca el último uso
+        os.utime(ruta)
+    except OSError:
+        _contar(f"{contador}_misses")
+        return None
+    _contar(f"{contador}_hits")
+    return ruta
+
+
+def _desalojar(carpeta, maximo, contador):
+    """Borra los archivos de uso más antiguo por encima del límite. Retorna cuántos borró."""
+    archivos = []
+    for actual, _, nombres in os.walk(carpeta):
+        for nombre in nombres:
+            if nombre.endswith(".pdf") and not nombre.startswith("."):
+                ruta = os.path.join(actual, nombre)
+                try:
+                    archivos.append((os.path.getmtime(ruta), ruta))
+                except OSError:
+                    pass
+    if len(archivos) <= maximo:
+        return 0
+    archivos.sort()
+    borrados = 0
+    for _, ruta in archivos[:len(archivos) - maximo]:
+        try:
+            os.remove(ruta)
+            borrados += 1
+        except OSError:
+            pass
+    _contar(contador, borrados)
+    return borrados
+
+
+def obtener_seccion(clave):
+    """Ruta del PDF de la sección, o None si hay que renderizarla."""
+    return _obtener_contenido(SECCIONES_DIR, clave, "secciones")
+
+
+def ruta_seccion(clave):
+    """Dónde se guarda la sección (el proceso que la renderiza escribe ahí)."""
+    return _ruta_contenido(SECCIONES_DIR, clave)
+
+
+def desalojar_secciones(max_secciones=None):
+    max_secciones = SECCIONES_MAX if max_secciones is None else max_secciones
+    return _desalojar(SECCIONES_DIR, max_secciones, "secciones_desalojadas")
+
+
+def obtener_general(clave):
+    """Ruta del reporte general guardado, o None si hay que generarlo."""
+    return _obtener_contenido(GENERALES_DIR, clave, "generales")
+
+
+def generar_general(clave, generar_pdf):
+    """Como generar(), para el reporte general. Retorna (ruta, temporal)."""
+    ruta, temporal = _generar_en(_ruta_contenido(GENERALES_DIR, clave), generar_pdf)
+    if not temporal:
+        _desalojar(GENERALES_DIR, GENERALES_MAX, "generales_desalojados")
+    return ruta, temporal
+
+
+def estadisticas():
+    with _LOCK:
+        datos = dict(_CONTADORES)
+    total = datos["hits"] + datos["misses"] + datos["no_modificados"]
+    datos["tasa_aciertos"] = round((datos["hits"] + datos["no_modificados"]) / total, 3) if total else None
+    datos["activa"] = CACHE_ACTIVA
+    return datos
@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from backend.services import artefactos, motor_criterios
+
+# =========================================================================
+#  CATÁLOGO DE CRITERIOS (ARCHIVO DE DATOS VERSIONADO)
+# =========================================================================
+# Los patrones normativos viven en backend/data/criterios.json, no en código:
+#   {"version": "2025.11",
+#    "productos": {categoria: {tipo_doc: {norma: {requisito: [patrones]}}}}}
+#
+# Al cargar se valida la estructura y se compilan TODOS los conjuntos
+# (categoria, tipo_doc) con motor_criterios. Un patrón que no compila es un
+# error de carga que se reporta con su ruta completa; ya no se omite en
+# silencio.
+#
+# La huella (sha256 del contenido canónico) identifica al catálogo; la caché
+# de resultados la incluye en su clave.
+#
+# Recarga en caliente: obtener() revisa la fecha de modificación del archivo
+# como mucho cada NOPRO_CRITERIOS_INTERVALO segundos. Si cambió, se valida y
+# compila la versión nueva y solo entonces reemplaza a la actual; si no es
+# válida se sigue usando la anterior. Así la API y los procesos de
+# worker_analisis toman el catálogo nuevo sin reiniciarse.
+#
+# Cada versión activada se archiva en el almacén de artefactos por su
+# huella; el re-análisis incremental compara la versión con la que se
+# analizó un documento contra la actual (diferencias()).
+
+RUTA_CATALOGO = os.getenv(
+    "NOPRO_CRITERIOS_RUTA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "criterios.json")
+)
+# Segundos entre revisiones del archivo (0 = sin recarga automática)
+INTERVALO_RECARGA = float(os.getenv("NOPRO_CRITERIOS_INTERVALO", "5"))
+
+
+class ErrorCatalogo(ValueError):
+    """El catálogo no se pudo leer, tiene una estructura inválida o patrones que no compilan."""
+
+
+class Catalogo:
+    """Catálogo ya validado: criterios en crudo y sus conjuntos compilados."""
+
+    __slots__ = ("version", "huella", "productos", "conjuntos", "total_patrones", "ruta", "mtime")
+
+    def __init__(self, version, huella, productos, conjuntos, ruta=None, mtime=None):
+        self.version = version
+        self.huella = huella
+        self.productos = productos
+        self.conjuntos = conjuntos
+        self.total_patrones = sum(len(c) for c in conjuntos.values())
+        self.ruta = ruta
+        self.mtime = mtime
+
+    def criterios(self, categoria_producto, tipo_doc):
+        """{norma: {requisito: [patrones]}} de un par (categoria, tipo_doc); {} si no hay."""
+        return self.productos.get(categoria_producto, {}).get(tipo_doc, {})
+
+    def conjunto(self, categoria_producto, tipo_doc):
+        """ConjuntoCriterios precompilado (vacío si la combinación no existe)."""
+        return self.conjuntos.get((categoria_producto, tipo_doc)) or _CONJUNTO_VACIO
+
+    def datos(self):
+        """Contenido en el formato del archivo (para archivarlo)."""
+        return {"version": self.version, "productos": self.productos}
+
+
+_CONJUNTO_VACIO = motor_criterios.ConjuntoCriterios([])
+
+
+def _validar_estructura(datos):
+    """Lista de errores de forma (vacía si el documento es válido)."""
+    if not isinstance(datos, dict):
+        return ["la raíz debe ser un objeto con 'version' y 'productos'"]
+
+    errores = []
+    if not isinstance(datos.get("version"), str) or not datos["version"].strip():
+        errores.append("'version' debe ser un texto no vacío")
+    productos = datos.get("productos")
+    if not isinstance(productos, dict) or not productos:
+        return errores + ["'productos' debe ser un objeto no vacío"]
+
+    for categoria, tipos in productos.items():
+        if not isinstance(tipos, dict):
+            errores.append(f"{categoria}: se esperaba un objeto {{tipo_doc: normas}}")
+            continue
+        for tipo, normas in tipos.items():
+            if not isinstance(normas, dict):
+                errores.append(f"{categoria}/{tipo}: se esperaba un objeto {{norma: requisitos}}")
+                continue
+            for norma, requisitos in normas.items():
+                if not isinstance(requisitos, dict):
+                    errores.append(f"{categoria}/{tipo}/{norma}: se esperaba un objeto {{requisito: patrones}}")
+                    continue
+                for requisito, patrones in requisitos.items():
+                    ruta = f"{categoria}/{tipo}/{norma}/{requisito}"
+                    if not isinstance(patrones, list) or not patrones:
+                        errores.append(f"{ruta}: se esperaba una lista no vacía de patrones")
+                        continue
+                    for i, patron in enumerate(patrones):
+                        if not isinstance(patron, str) or not patron.strip():
+                            errores.append(f"{ruta}[{i}]: el patrón debe ser un texto no vacío")
+    return errores
+
+
+def calcular_huella(datos):
+    """sha256 del contenido canónico (independiente de espacios y orden de llaves)."""
+    canonico = json.dumps(datos, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+def construir(datos, ruta=None, mtime=None):
+    """Valida y compila un catálogo ya leído. Lanza ErrorCatalogo con todos los errores juntos."""
+    errores = _validar_estructura(datos)
+    if errores:
+        raise ErrorCatalogo("Catálogo de criterios inválido:\n  - " + "\n  - ".join(errores))
+
+    conjuntos = {}
+    for categoria, tipos in datos["productos"].items():
+        for tipo, normas in tipos.items():
+            try:
+                conjuntos[(categoria, tipo)] = motor_criterios.compilar_conjunto(normas)
+            except motor_criterios.ErrorPatron as e:
+                errores.extend(f"{categoria}/{tipo}/{detalle}" for detalle in e.detalles)
+    if errores:
+        raise ErrorCatalogo("Patrones que no compilan en el catálogo de criterios:\n  - " + "\n  - ".join(errores))
+
+    return Catalogo(datos["version"], calcular_huella(datos), datos["productos"], conjuntos, ruta, mtime)
+
+
+def cargar(ruta=None):
+    """Lee, valida y compila el archivo del catálogo (no lo activa)."""
+    ruta = ruta or RUTA_CATALOGO
+    try:
+        mtime = os.path.getmtime(ruta)
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ErrorCatalogo(f"No se pudo leer el catálogo de criterios {ruta}: {e}") from e
+    return construir(datos, ruta, mtime)
+
+
+# --- Catálogo activo -------------------------------------------------------
+
+_actual = None
+_mtime_revisado = None
+_ultima_revision = 0.0
+_recargas = 0
+_ultimo_error = None
+_LOCK = threading.Lock()
+
+
+def recargar(ruta=None):
+    """
+    Carga el archivo y, si es válido, lo activa. Lanza ErrorCatalogo si no lo
+    es (el catálogo activo no cambia).
+    """
+    global _actual, _mtime_revisado, _ultima_revision, _recargas, _ultimo_error
+    with _LOCK:
+        try:
+            nuevo = cargar(ruta)
+        except ErrorCatalogo as e:
+            _ultimo_error = str(e)
+            raise
+        try:
+            artefactos.guardar_catalogo(nuevo.huella, nuevo.datos())
+        except OSError as e:
+            print(f"⚠️ No se pudo archivar el catálogo {nuevo.huella[:12]}: {e}")
+        anterior = _actual
+        _actual = nuevo
+        _mtime_revisado = nuevo.mtime
+        _ultima_revision = time.monotonic()
+        _ultimo_error = None
+        if anterior is not None:
+            _recargas += 1
+    print(f"📚 Catálogo de criterios v{nuevo.version} ({nuevo.huella[:12]}): "
+          f"{nuevo.total_patrones} patrones en {len(nuevo.conjuntos)} conjuntos.")
+    return nuevo
+
+
+def _revisar_cambios():
+    """Recarga si el archivo cambió desde la última revisión; si falla, conserva el actual."""
+    global _ultima_revision, _mtime_revisado
+    _ultima_revision = time.monotonic()
+    ruta = _actual.ruta or RUTA_CATALOGO
+    try:
+        mtime = os.path.getmtime(ruta)
+    except OSError:
+        return
+    if mtime == _mtime_revisado:
+        return
+    try:
+        recargar(ruta)
+    except ErrorCatalogo as e:
+        # No volvemos a intentarlo hasta que el archivo cambie otra vez
+        _mtime_revisado = mtime
+        print(f"❌ {e}\n⚠️ Se sigue usando el catálogo v{_actual.version} ({_actual.huella[:12]}).")
+
+
+def obtener():
+    """
+    Catálogo activo. La primera llamada lo carga (y propaga ErrorCatalogo,
+    por eso index.py y worker_analisis lo piden al arrancar).
+    """
+    if _actual is None:
+        return recargar()
+    if INTERVALO_RECARGA > 0 and time.monotonic() - _ultima_revision >= INTERVALO_RECARGA:
+        _revisar_cambios()
+    return _actual
+
+
+# --- Versiones y diferencias (re-análisis incremental) -----------------------
+
+_VERSIONES = {}
+
+
+def por_huella(huella):
+    """Catálogo de una versión anterior (archivada), o None si no se conserva."""
+    actual = obtener()
+    if huella == actual.huella:
+        return actual
+    if huella not in _VERSIONES:
+        datos = artefactos.leer_catalogo(huella) if huella else None
+        _VERSIONES[huella] = construir(datos) if datos is not None else None
+    return _VERSIONES[huella]
+
+
+def diferencias(anterior, nuevo, categoria_producto, tipo_doc):
+    """
+    Requisitos (norma, requisito) de un par (categoria, tipo_doc) cuyos
+    patrones cambiaron entre dos catálogos:
+        {(norma, requisito): {"agregados": [...], "eliminados": [...]}}
+    Un patrón editado aparece como eliminado (el texto viejo) y agregado (el nuevo).
+    """
+    viejos = anterior.criterios(categoria_producto, tipo_doc)
+    nuevos = nuevo.criterios(categoria_producto, tipo_doc)
+    cambios = {}
+    for norma in set(viejos) | set(nuevos):
+        requisitos_viejos = viejos.get(norma, {})
+        requisitos_nuevos = nuevos.get(norma, {})
+        for requisito in set(requisitos_viejos) | set(requisitos_nuevos):
+            antes = requisitos_viejos.get(requisito, [])
+            despues = requisitos_nuevos.get(requisito, [])
+            agregados = [p for p in despues if p not in antes]
+            eliminados = [p for p in antes if p not in despues]
+            if agregados or eliminados:
+                cambios[(norma, requisito)] = {"agregados": agregados, "eliminados": eliminados}
+    return cambios
+
+
+def estado():
+    """Resumen para GET /estado."""
+    catalogo = _actual
+    return {
+        "version": catalogo.version if catalogo else None,
+        "huella": catalogo.huella if catalogo else None,
+        "patrones": catalogo.total_patrones if catalogo else 0,
+        "conjuntos": len(catalogo.conjuntos) if catalogo else 0,
+        "recargas": _recargas,
+        "ultimo_error": _ultimo_error,
+    }
+
+
+if __name__ == "__main__":
+    # Validación previa al despliegue:
+    #   python -m backend.services.catalogo_criterios [ruta.json]
+    try:
+        cargado = cargar(sys.argv[1] if len(sys.argv) > 1 else None)
+    except ErrorCatalogo as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Catálogo v{cargado.version} válido ({cargado.huella[:12]}): "
+          f"{cargado.total_patrones} patrones en {len(cargado.conjuntos)} conjuntos.")
@@ -0,0 +1,275 @@
+import os
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_
+
+from backend import database, models
+from backend.services import cache_analisis, cache_reportes, catalogo_criterios, cumplimiento
+
+# =========================================================================
+#  COLA DE ANÁLISIS EN SEGUNDO PLANO (SIN BROKER EXTERNO)
+# =========================================================================
+# La propia tabla `documentos` es la cola: un documento con
+# estado_analisis = "pendiente" es un trabajo por hacer. Los workers lo
+# reclaman con SELECT ... FOR UPDATE SKIP LOCKED, así varios hilos o
+# procesos pueden consumir la misma cola sin pisarse.
+#
+# Modos (NOPRO_COLA_MODO):
+#   "local"   -> la API levanta un pool de hilos que procesa los trabajos.
+#   "externo" -> la API solo encola; se procesan con:
+#                   python -m backend.worker_analisis --procesos 2
+#
+# Lease: al reclamar un trabajo se guarda documentos.reclamado_en y, mientras
+# se procesa, un latido lo renueva cada LATIDO_S segundos. Si el worker muere
+# (o se apaga sin terminar) el latido se detiene; pasados LEASE_S segundos la
+# fila "procesando" se vuelve a reclamar como si estuviera pendiente. Al
+# arrancar el pool local y el worker, las filas con lease vencido se regresan
+# a "pendiente".
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_PROCESANDO = "procesando"
+ESTADO_COMPLETADO = "completado"
+ESTADO_ERROR = "error"
+
+MODO_COLA = os.getenv("NOPRO_COLA_MODO", "local").lower()
+WORKERS_LOCALES = int(os.getenv("NOPRO_COLA_WORKERS", "1"))
+# Segundos entre sondeos cuando no hay trabajos (modo externo o tras reinicios)
+INTERVALO_SONDEO = float(os.getenv("NOPRO_COLA_INTERVALO", "2"))
+# Sin latido durante LEASE_S segundos, un trabajo "procesando" se da por abandonado
+LEASE_S = float(os.getenv("NOPRO_COLA_LEASE_S", "600"))
+LATIDO_S = max(1.0, LEASE_S / 4)
+
+
+def _ahora():
+    return datetime.now(timezone.utc)
+
+
+def _lease_vencido():
+    """Filas "procesando" cuyo worker dejó de dar latidos (o de antes del lease)."""
+    return (models.Documento.estado_analisis == ESTADO_PROCESANDO) & or_(
+        models.Documento.reclamado_en.is_(None),
+        models.Documento.reclamado_en < _ahora() - timedelta(seconds=LEASE_S)
+    )
+
+
+def reclamar_siguiente(db):
+    """
+    Toma el trabajo pendiente (o con lease vencido) más antiguo y lo marca
+    como "procesando". Retorna el id_documento o None si la cola está vacía.
+    """
+    doc = db.query(models.Documento)\
+            .filter(or_(models.Documento.estado_analisis == ESTADO_PENDIENTE, _lease_vencido()))\
+            .order_by(models.Documento.id_documento)\
+            .with_for_update(skip_locked=True)\
+            .limit(1)\
+            .first()
+
+    if doc is None:
+        db.rollback()
+        return None
+
+    if doc.estado_analisis == ESTADO_PROCESANDO:
+        print(f"♻️ Trabajo {doc.id_documento} abandonado (sin latido): se vuelve a procesar.")
+    doc.estado_analisis = ESTADO_PROCESANDO
+    doc.progreso_analisis = 0
+    doc.reclamado_en = _ahora()
+    db.commit()
+    return doc.id_documento
+
+
+def liberar_abandonados():
+    """Al arrancar: regresa a "pendiente" los trabajos con lease vencido. Retorna cuántos."""
+    db = database.SessionLocal()
+    try:
+        liberados = db.query(models.Documento)\
+                      .filter(_lease_vencido())\
+                      .update({models.Documento.estado_analisis: ESTADO_PENDIENTE,
+                               models.Documento.progreso_analisis: 0,
+                               models.Documento.reclamado_en: None}, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        print(f"⚠️ No se pudieron liberar trabajos abandonados: {e}")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+    if liberados:
+        print(f"♻️ {liberados} trabajo(s) abandonados regresaron a la cola.")
+    return liberados
+
+
+def _latir(id_documento, terminado):
+    """Renueva el lease del trabajo hasta que `terminado` se active."""
+    while not terminado.wait(LATIDO_S):
+        db = database.SessionLocal()
+        try:
+            db.query(models.Documento)\
+              .filter(models.Documento.id_documento == id_documento,
+                      models.Documento.estado_analisis == ESTADO_PROCESANDO)\
+              .update({models.Documento.reclamado_en: _ahora()}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            print(f"⚠️ Latido del trabajo {id_documento} falló: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+def procesar_documento(id_documento):
+    """Ejecuta el análisis de un documento y persiste progreso y resultado en su fila."""
+    terminado = threading.Event()
+    threading.Thread(target=_latir, args=(id_documento, terminado), name=f"latido-{id_documento}", daemon=True).start()
+    db = database.SessionLocal()
+    try:
+        doc = db.query(models.Documento).filter(models.Documento.id_documento == id_documento).first()
+        if doc is None:
+            return
+
+        params = doc.parametros_analisis or {}
+        ultimo = {"pct": 0}
+
+        def progreso(pct):
+            # Limitamos las escrituras a la BD: solo cada 5% de avance
+            if pct - ultimo["pct"] >= 5:
+                ultimo["pct"] = pct
+                doc.progreso_analisis = pct
+                db.commit()
+
+        print(f"⚙️ Procesando trabajo {id_documento}: {params.get('categoria')} - {params.get('tipo')}...")
+        catalogo = catalogo_criterios.obtener()
+        resultados = cache_analisis.analizar_con_cache(
+            db,
+            doc.archivo_url,
+            params.get("tipo", "Ficha"),
+            params.get("categoria", "Laptop"),
+            marca_esperada=params.get("marca"),
+            progreso=progreso,
+            sha256_archivo=params.get("sha256"),
+            modo_busqueda=params.get("modo"),
+            catalogo=catalogo
+        )
+
+        doc.analisis_ia = resultados
+        # Versión de criterios con la que quedó el análisis (re-análisis incremental)
+        doc.parametros_analisis = {**params, "catalogo": catalogo.huella}
+        cumplimiento.aplicar_resumen(doc, resultados, params.get("categoria", "Laptop"), params.get("tipo", "Ficha"))
+        doc.estado_analisis = ESTADO_COMPLETADO
+        doc.progreso_analisis = 100
+        doc.error_analisis = None
+        doc.reclamado_en = None
+        db.commit()
+        cache_reportes.invalidar(id_documento)
+        print(f"✅ Trabajo {id_documento} completado ({len(resultados)} hallazgos).")
+
+    except Exception as e:
+        print(f"❌ Error en trabajo {id_documento}: {e}")
+        traceback.print_exc()
+        db.rollback()
+        doc = db.query(models.Documento).filter(models.Documento.id_documento == id_documento).first()
+        if doc is not None:
+            doc.estado_analisis = ESTADO_ERROR
+            doc.error_analisis = str(e)[:500]
+            doc.reclamado_en = None
+            db.commit()
+    finally:
+        terminado.set()
+        db.close()
+
+
+class PoolAnalisis:
+    """Pool de hilos que consumen la cola de documentos pendientes."""
+
+    def __init__(self, num_workers=1, intervalo=INTERVALO_SONDEO):
+        self.num_workers = num_workers
+        self.intervalo = intervalo
+        self._hay_trabajo = threading.Event()
+        self._detener = threading.Event()
+        self._hilos = []
+
+    def notificar(self):
+        """Despierta a los workers (se llama al encolar en el mismo proceso)."""
+        self._hay_trabajo.set()
+
+    def iniciar(self):
+        for i in range(self.num_workers):
+            hilo = threading.Thread(target=self.ejecutar, name=f"analisis-{i+1}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+        print(f"🧵 Pool de análisis iniciado con {self.num_workers} worker(s).")
+
+    def esperar(self):
+        """Bloquea hasta que todos los hilos terminen (uso en el worker dedicado)."""
+        for hilo in self._hilos:
+            hilo.join()
+
+    def detener(self, timeout=5):
+        self._detener.set()
+        self._hay_trabajo.set()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+
+    def ejecutar(self):
+        """Bucle de un worker: reclama, procesa y espera si no hay trabajos."""
+        while not self._detener.is_set():
+            db = database.SessionLocal()
+            try:
+                id_documento = reclamar_siguiente(db)
+            except Exception as e:
+                print(f"⚠️ Error consultando la cola: {e}")
+                id_documento = None
+            finally:
+                db.close()
+
+            if id_documento is None:
+                self._hay_trabajo.wait(self.intervalo)
+                self._hay_trabajo.clear()
+                continue
+
+            procesar_documento(id_documento)
+
+
+_pool_local = None
+
+
+def iniciar_pool_local():
+    """Arranca el pool dentro del proceso de la API (solo en modo "local")."""
+    global _pool_local
+    if MODO_COLA != "local" or _pool_local is not None:
+        return None
+    liberar_abandonados()
+    _pool_local = PoolAnalisis(num_workers=WORKERS_LOCALES)
+    _pool_local.iniciar()
+    return _pool_local
+
+
+def detener_pool_local():
+    global _pool_local
+    if _pool_local is not None:
+        _pool_local.detener()
+        _pool_local = None
+
+
+def parametros_analisis(tipo, categoria, marca, sha256_archivo=None, modo_busqueda=None, catalogo=None):
+    """Lo que se guarda en Documento.parametros_analisis (catalogo: huella de los criterios usados)."""
+    return {
+        "tipo": tipo, "categoria": categoria, "marca": marca, "sha256": sha256_archivo,
+        "modo": modo_busqueda, "catalogo": catalogo
+    }
+
+
+def encolar(db, doc_db, tipo, categoria, marca, sha256_archivo=None, modo_busqueda=None):
+    """Marca el documento como trabajo pendiente y despierta al pool local."""
+    doc_db.estado_analisis = ESTADO_PENDIENTE
+    doc_db.progreso_analisis = 0
+    doc_db.error_analisis = None
+    doc_db.reclamado_en = None
+    doc_db.parametros_analisis = parametros_analisis(tipo, categoria, marca, sha256_archivo, modo_busqueda)
+    db.commit()
+    db.refresh(doc_db)
+
+    if _pool_local is not None:
+        _pool_local.notificar()
+    return doc_db
@@ -0,0 +1,113 @@
+from collections import Counter
+
+from backend.services import cache_reportes, catalogo_criterios
+
+# =========================================================================
+#  RESUMEN DE CUMPLIMIENTO POR DOCUMENTO
+# =========================================================================
+# Se calcula una sola vez al guardar el análisis y se persiste en columnas
+# de `documentos`, para que el historial no tenga que leer (ni serializar)
+# el JSON completo de analisis_ia.
+#
+# El índice de cumplimiento (documentos.indice_cumplimiento) es el checklist
+# ya resuelto: estatus y número de hallazgos de cada requisito del catálogo
+# y porcentajes por norma. Se arma con una sola pasada sobre los hallazgos;
+# los reportes PDF y GET /documentos/{id}/cumplimiento lo leen en lugar de
+# recorrer analisis_ia por cada requisito. Lleva la huella del catálogo y la
+# del analisis_ia con los que se calculó: si cualquiera cambió (aunque quien
+# escribió analisis_ia no haya limpiado el índice) se vuelve a calcular.
+
+
+def _par(item):
+    """(Norma, Categoria) de un hallazgo (dict guardado o ResultadoIA)."""
+    if isinstance(item, dict):
+        return item.get("Norma", ""), item.get("Categoria", "")
+    return item.Norma, item.Categoria
+
+
+def _porcentaje(cumplidos, totales):
+    return round(100.0 * cumplidos / totales, 1) if totales else None
+
+
+def construir_indice(resultados, categoria_producto, tipo_doc, catalogo=None):
+    """
+    Índice de cumplimiento de un análisis:
+        {"catalogo", "analisis", "categoria", "tipo", "total_hallazgos", "criterios_cumplidos",
+         "criterios_totales", "porcentaje_cumplimiento",
+         "por_norma": {norma: {"cumplidos", "totales", "porcentaje"}},
+         "checklist": [{"norma", "requisito", "hallazgos", "cumple"}]}
+    El checklist sigue el orden del catálogo. Un requisito se cumple si hay al
+    menos un hallazgo con su (Norma, Categoria).
+    """
+    catalogo = catalogo or catalogo_criterios.obtener()
+    resultados = resultados or []
+    conteo = Counter(_par(item) for item in resultados)
+
+    checklist = []
+    por_norma = {}
+    for norma, requisitos in catalogo.criterios(categoria_producto, tipo_doc).items():
+        cumplidos = 0
+        for requisito in requisitos:
+            hallazgos = conteo.get((norma, requisito), 0)
+            cumplidos += hallazgos > 0
+            checklist.append({"norma": norma, "requisito": requisito, "hallazgos": hallazgos, "cumple": hallazgos > 0})
+        por_norma[norma] = {
+            "cumplidos": cumplidos, "totales": len(requisitos), "porcentaje": _porcentaje(cumplidos, len(requisitos))
+        }
+
+    cumplidos = sum(1 for c in checklist if c["cumple"])
+    return {
+        "catalogo": catalogo.huella,
+        "analisis": cache_reportes.huella_analisis(resultados),
+        "categoria": categoria_producto,
+        "tipo": tipo_doc,
+        "total_hallazgos": len(resultados),
+        "criterios_cumplidos": cumplidos,
+        "criterios_totales": len(checklist),
+        "porcentaje_cumplimiento": _porcentaje(cumplidos, len(checklist)),
+        "por_norma": por_norma,
+        "checklist": checklist,
+    }
+
+
+def indice_vigente(indice, resultados, categoria_producto, tipo_doc, catalogo=None):
+    """True si el índice guardado se calculó con estos resultados, categoría, tipo y versión del catálogo."""
+    if not isinstance(indice, dict):
+        return False
+    catalogo = catalogo or catalogo_criterios.obtener()
+    return (indice.get("catalogo") == catalogo.huella
+            and indice.get("categoria") == categoria_producto
+            and indice.get("tipo") == tipo_doc
+            and indice.get("analisis") == cache_reportes.huella_analisis(resultados or []))
+
+
+def obtener_indice(doc_db, resultados, categoria_producto, tipo_doc, catalogo=None):
+    """El índice guardado en el documento si sigue vigente; si no, se calcula (sin guardarlo)."""
+    catalogo = catalogo or catalogo_criterios.obtener()
+    indice = getattr(doc_db, "indice_cumplimiento", None)
+    if indice_vigente(indice, resultados, categoria_producto, tipo_doc, catalogo):
+        return indice
+    return construir_indice(resultados, categoria_producto, tipo_doc, catalogo)
+
+
+def calcular_resumen(resultados, categoria_producto, tipo_doc):
+    """
+    Retorna las columnas de resumen {"total_hallazgos", "criterios_cumplidos",
+    "criterios_totales", "porcentaje_cumplimiento", "indice_cumplimiento"}
+    con la misma regla que el checklist del reporte.
+    """
+    indice = construir_indice(resultados, categoria_producto, tipo_doc)
+    return {
+        "total_hallazgos": indice["total_hallazgos"],
+        "criterios_cumplidos": indice["criterios_cumplidos"],
+        "criterios_totales": indice["criterios_totales"],
+        "porcentaje_cumplimiento": indice["porcentaje_cumplimiento"],
+        "indice_cumplimiento": indice,
+    }
+
+
+def aplicar_resumen(doc_db, resultados, categoria_producto, tipo_doc):
+    """Copia el resumen calculado a las columnas del documento (sin hacer commit)."""
+    for campo, valor in calcular_resumen(resultados, categoria_producto, tipo_doc).items():
+        setattr(doc_db, campo, valor)
+    return doc_db
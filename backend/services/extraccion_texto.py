@@ -0,0 +1,110 @@
+import os
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+# =========================================================================
+#  EXTRACTORES DE TEXTO (BACKENDS INTERCAMBIABLES)
+# =========================================================================
+# Cada backend sabe contar páginas y extraer el texto crudo de un rango
+# [inicio, fin) como [(num_pagina, texto_o_None)]. La normalización y la
+# búsqueda de criterios se quedan en ia_analisis.
+#
+#   NOPRO_EXTRACTOR_TEXTO=pdfplumber   (por defecto, reconstrucción por posición)
+#   NOPRO_EXTRACTOR_TEXTO=pymupdf      (capa de texto en C, ~40x más rápido)
+#
+# pdfplumber sigue siendo el de por defecto porque los hallazgos dependen del
+# orden del texto: en maquetaciones a varias columnas (p. ej. el manual K4000
+# de uploads/) PyMuPDF une las frases por bloque y pdfplumber por renglón, y
+# los criterios caen en otras páginas. PyMuPDF solo debe volverse el de por
+# defecto cuando benchmarks/bench_extractores.py no reporte diferencias en el
+# corpus de muestra.
+#
+# Con pymupdf, las páginas cuyo texto sale ilegible (fuentes sin mapa
+# Unicode -> caracteres de reemplazo) se vuelven a extraer con pdfplumber,
+# que resuelve mejor esos casos de maquetación.
+
+EXTRACTOR_POR_DEFECTO = os.getenv("NOPRO_EXTRACTOR_TEXTO", "pdfplumber").strip().lower()
+# Proporción de caracteres de reemplazo (U+FFFD) a partir de la cual se usa el respaldo
+UMBRAL_ILEGIBLE = float(os.getenv("NOPRO_EXTRACTOR_UMBRAL_ILEGIBLE", "0.05"))
+
+
+def _texto_ilegible(texto):
+    if not texto:
+        return False
+    return texto.count("�") / len(texto) >= UMBRAL_ILEGIBLE
+
+
+# --- pdfplumber ----------------------------------------------------------
+
+def _contar_pdfplumber(ruta_pdf):
+    with pdfplumber.open(ruta_pdf) as pdf:
+        return len(pdf.pages)
+
+
+def _iterar_pdfplumber(ruta_pdf, inicio, fin):
+    with pdfplumber.open(ruta_pdf) as pdf:
+        for i in range(inicio, fin):
+            pagina = pdf.pages[i]
+            texto = pagina.extract_text()
+            # Liberamos los caracteres/objetos cacheados de la página
+            pagina.close()
+            yield i+1, texto
+
+
+# --- PyMuPDF -------------------------------------------------------------
+
+def _contar_pymupdf(ruta_pdf):
+    with fitz.open(ruta_pdf) as doc:
+        return doc.page_count
+
+
+def _iterar_pymupdf(ruta_pdf, inicio, fin):
+    with fitz.open(ruta_pdf) as doc:
+        for i in range(inicio, fin):
+            texto = doc.load_page(i).get_text("text")
+            if _texto_ilegible(texto):
+                # Respaldo por página con pdfplumber
+                print(f"↩️ Página {i+1}: texto ilegible con PyMuPDF, se usa pdfplumber.")
+                yield from _iterar_pdfplumber(ruta_pdf, i, i+1)
+            else:
+                yield i+1, texto
+
+
+EXTRACTORES = {
+    "pdfplumber": {"contar": _contar_pdfplumber, "iterar": _iterar_pdfplumber},
+    "pymupdf": {"contar": _contar_pymupdf, "iterar": _iterar_pymupdf},
+}
+
+
+def nombre_extractor(extractor=None):
+    """Normaliza el nombre pedido; si no existe se usa pdfplumber."""
+    extractor = (extractor or EXTRACTOR_POR_DEFECTO).lower()
+    return extractor if extractor in EXTRACTORES else "pdfplumber"
+
+
+def contar_paginas(ruta_pdf, extractor=None):
+    return EXTRACTORES[nombre_extractor(extractor)]["contar"](ruta_pdf)
+
+
+def iterar_paginas(ruta_pdf, inicio=0, fin=None, extractor=None):
+    """
+    Genera (num_pagina, texto_crudo_o_None) para las páginas [inicio, fin).
+    Si PyMuPDF no puede abrir el archivo se reintenta completo con pdfplumber.
+    """
+    extractor = nombre_extractor(extractor)
+    if extractor == "pymupdf":
+        try:
+            # Abrimos antes de generar para detectar archivos que PyMuPDF no lee
+            _contar_pymupdf(ruta_pdf)
+        except Exception as e:
+            print(f"⚠️ PyMuPDF no pudo abrir el PDF ({e}); se usa pdfplumber.")
+            extractor = "pdfplumber"
+    if fin is None:
+        fin = contar_paginas(ruta_pdf, extractor)
+    yield from EXTRACTORES[extractor]["iterar"](ruta_pdf, inicio, fin)
+
+
+def extraer_rango(ruta_pdf, inicio, fin, extractor=None):
+    """Texto crudo de las páginas [inicio, fin) como [(num_pagina, texto_o_None)]."""
+    return list(iterar_paginas(ruta_pdf, inicio, fin, extractor))
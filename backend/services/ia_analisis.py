@@ -1,661 +1,181 @@
 import pdfplumber
 import re
-import spacy
 from unidecode import unidecode
 from backend.services import ia_vision
+from backend.services import motor_criterios
+from backend.services import catalogo_criterios
+from backend.services import modelos
+from backend.services import artefactos
+from backend.services import extraccion_texto
+import math
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
 # =========================================================================
 #  CONFIGURACIÓN SPACY
 # =========================================================================
-# Cargamos el modelo una sola vez. Deshabilitamos NER y Tagger para velocidad
-# ya que tus criterios se basan en reglas y no en entidades pre-entrenadas.
-try:
-    print("⏳ Cargando modelo spaCy...")
-    nlp = spacy.load("es_core_news_md", disable=["ner", "tagger"])
+# El modelo se carga bajo demanda (ver services/modelos.py), no al importar.
+# Deshabilitamos NER y Tagger para velocidad ya que tus criterios se basan
+# en reglas y no en entidades pre-entrenadas.
+def _cargar_spacy():
+    import spacy
+    try:
+        print("⏳ Cargando modelo spaCy...")
+        nlp = spacy.load("es_core_news_md", disable=["ner", "tagger"])
+    except OSError:
+        print("⚠️ Modelo Spacy no encontrado. Ejecutando descarga...")
+        from spacy.cli import download
+        download("es_core_news_md")
+        nlp = spacy.load("es_core_news_md", disable=["ner", "tagger"])
     nlp.add_pipe("sentencizer") # Vital para detectar oraciones completas
-    print("✅ Modelo spaCy cargado correctamente.")
-except OSError:
-    print("⚠️ Modelo Spacy no encontrado. Ejecutando descarga...")
-    from spacy.cli import download
-    download("es_core_news_md")
-    nlp = spacy.load("es_core_news_md", disable=["ner", "tagger"])
-    nlp.add_pipe("sentencizer")
+    return nlp
 
-# =========================================================================
-#  BASE DE DATOS DE CRITERIOS (CEREBRO MAESTRO)
-# =========================================================================
-# Se mantiene intacta tu base de datos de patrones
-CRITERIOS_POR_PRODUCTO = {
-    "Laptop": {
-        "Ficha": {
-            "NMX-I-60950-1-NYCE-2015": {
-                "Seguridad eléctrica y desempeño": [
-                    r"resistencia (diel[ée]ctrica|de aislamiento).{0,20}3[,\.]000 ?v",
-                    r"prueba(s)? (diel[ée]ctrica|de aislamiento).{0,20}1 ?minuto",
-                    r"material(es)? ign[íi]fug(os|a).{0,10}ul[- ]?94 ?v-0",
-                    r"distancia (mínima )?de aislamiento.{0,10}2\.?5 ?mm",
-                    r"protecci[oó]n t[ée]rmica.{0,20}(sensor|desconexi[oó]n|interruptor)",
-                    r"desconect(a|e).{0,10}70 ?°c",
-                    r"prueba(s)? de (corto ?circuito|sobrecorriente|fuga de corriente)",
-                    r"prueba(s)? de estabilidad mec[aá]nica.{0,20}ca[ií]da libre",
-                    r"(sin|no presenta) da[ñn]o (funcional|estructural)"
-                ]
-            },
-            "NOM-008-SCFI-2002": {
-                "Unidades y etiquetado comercial": [
-                    r"unidad(es)? de medida.{0,20}(kg|g|°c|v|w|%|hz)",
-                    r"(longitud|masa|temperatura|tiempo|corriente|voltaje).{0,20}(expresad[ao]s?|indicad[ao]s?) en",
-                    r"etiqueta.*(unidad(es)? de medida|valores nominales)",
-                    r"valores nominales?.{0,20}(voltaje|corriente|frecuencia|potencia)",
-                    r"informaci[oó]n cuantitativa.*?(sistema internacional|s\.?i\.?)"
-                ]
-            },
-            "NOM-024-SCFI-2013": {
-                "Información técnica y comercial": [
-                    r"(procesador|cpu).{0,20}(intel|amd|apple|modelo|frecuencia|n[úu]cleos)",
-                    r"(gpu|gr[aá]ficos?).{0,20}(integrada|dedicada|modelo|frecuencia)",
-                    r"memoria.{0,20}(ram|ddr\d|capacidad|gb)",
-                    r"almacenamiento.{0,20}(ssd|hdd|sata|nvme|capacidad)",
-                    r"bater[ií]a.{0,30}(capacidad nominal|wh|ion de litio|li-ion|duraci[oó]n)",
-                    r"(dimensiones|peso).{0,20}\d+.*?(mm|g|cm)",
-                    r"certificaci[oó]n(es)?.{0,20}(nyce|ce|ul|energy ?star|rohs|fcc)",
-                    r"(compatible|soporta).{0,20}(windows|linux|macos)",
-                    r"(perif[eé]rico|dock|monitor|adaptador usb[- ]?c)",
-                    r"manual de usuario|instrucciones de instalaci[oó]n",
-                    r"(nombre|raz[oó]n social) del (fabricante|importador)",
-                    r"n[uú]mero de serie|modelo del producto"
-                ]
-            }
-        },
-        "Manual": {
-            "NOM-019-SE-2021": {
-                "Marcado de seguridad": [
-                    "doble aislamiento", "aislamiento reforzado", "protección contra descargas",
-                    "marcado CE", "símbolo de tierra", "riesgo eléctrico", "descarga eléctrica",
-                    "seguridad eléctrica", "aislante", "pictograma de advertencia"
-                ],
-                "Especificaciones eléctricas": [
-                    "corriente máxima", "tensión nominal", "voltaje de operación", "frecuencia",
-                    "consumo de energía", "potencia nominal", "amperaje", "eficiencia energética",
-                    "capacidad de carga", "factor de potencia"
-                ],
-                "Advertencias visibles": [
-                    "alto voltaje", "no abrir", "precaución", "advertencia",
-                    "riesgo de choque eléctrico", "mantener fuera del alcance de niños",
-                    "riesgo de incendio", "superficie caliente", "no exponer al agua",
-                    "solo personal autorizado", "riesgo de descarga"
-                ]
-            },
-            "NMX-I-60950-1-NYCE-2015": {
-                "Instrucciones de seguridad": [
-                    "conexión a tierra", "toma de tierra", "puesta a tierra",
-                    "ventilación adecuada", "no bloquear rejillas", "mantener alejado de niños",
-                    "desconectar antes de limpiar", "evitar humedad", "no utilizar en exteriores",
-                    "instalación segura", "precauciones de seguridad"
-                ],
-                "Especificaciones técnicas": [
-                    "sobretensiones", "picos de voltaje", "protector contra sobrecarga",
-                    "fusible de protección", "compatibilidad con UPS", "supresor de picos",
-                    "corriente de fuga", "límites de potencia", "tolerancia térmica",
-                    "modo de fallo seguro"
-                ],
-                "Mantenimiento": [
-                    "mantener seco", "no abrir el equipo", "usar solo el cargador original",
-                    "limpieza con paño seco", "no utilizar solventes", "revisión periódica",
-                    "desconectar antes de mantenimiento", "revisión por técnico autorizado"
-                ]
-            },
-            "NOM-008-SCFI-2002": {
-                "Composición y vida útil": [
-                    "plástico ABS", "policarbonato", "vida útil estimada", "resistente a golpes",
-                    "material no tóxico", "carcasa ignífuga", "durabilidad", "resistencia mecánica",
-                    "reciclable", "cumple con RoHS"
-                ],
-                "Instrucciones de uso seguro": [
-                    "mantener al menos 10 cm", "uso en interiores", "no cubrir el equipo",
-                    "no exponer al sol", "no utilizar cerca de agua", "uso adecuado",
-                    "temperatura de operación", "colocar sobre superficie estable",
-                    "no insertar objetos extraños"
-                ],
-                "Limitaciones de modificación": [
-                    "no modificar", "sin autorización", "no manipular circuitos internos",
-                    "no cambiar piezas originales", "no reparar por cuenta propia"
-                ],
-                "Información de homologación": [
-                    "IFT", "cumple normativa", "certificación NOM", "cumple con estándares",
-                    "autorizado por NYCE", "registro ante autoridad", "cumple con regulaciones mexicanas"
-                ]
-            },
-            "Información complementaria requerida": {
-                "Especificaciones técnicas": [
-                    "procesador", "cpu", "chipset", "memoria ram", "almacenamiento",
-                    "disco duro", "ssd", "puertos", "entrada hdmi", "puerto usb",
-                    "bluetooth", "wifi", "pantalla", "resolución", "dimensiones", "peso",
-                    "consumo eléctrico", "batería", "voltaje de entrada", "eficiencia energética"
-                ],
-                "Condiciones de garantía": [
-                    "garantía", "cobertura", "servicio técnico", "manual de garantía",
-                    "centro autorizado", "condiciones de reparación", "plazo de garantía",
-                    "soporte posventa", "cambios y devoluciones", "política de servicio"
-                ],
-                "Instrucciones de uso y seguridad": [
-                    "advertencias", "precauciones", "configuración inicial", "instalación",
-                    "mantenimiento preventivo", "uso adecuado", "instrucciones del fabricante",
-                    "manual de usuario", "uso correcto", "operación segura"
-                ]
-            }
-        }
-    },
-    "SmartTV": {
-        "Ficha": {
-            "NOM-001-SCFI-2018": {
-                "Seguridad eléctrica": [
-                    r"100[-–]?240\s*v(ac)?",
-                    r"50\s*/\s*60\s*hz",
-                    r"potencia\s+nominal\s+160\s*w",
-                    r"≤?\s*0[.,]5\s*w",
-                    r"entrada\s+de\s+energ[ií]a",
-                    r"condici[oó]n\s+de\s+trabajo",
-                    r"clasificaci[oó]n\s+de\s+fuego\s+ul94[- ]?hb75",
-                    r"tensi[oó]n",
-                    r"corriente"
-                ]
-            },
-            "NMX-I-60065-NYCE-2015": {
-                "Seguridad térmica y ventilación": [
-                    r"temperatura\s+de\s+operaci[oó]n",
-                    r"temperatura\s+de\s+trabajo",
-                    r"5[°º]\s*c\s*[-–~]\s*40[°º]\s*c",
-                    r"humedad\s*20%\s*[-–~]\s*80%",
-                    r"temperatura\s+de\s+almacenamiento",
-                    r"condici[oó]n\s+de\s+trabajo"
-                ]
-            },
-            "NMX-I-60950-1-NYCE-2015": {
-                "Conexión de periféricos": [
-                    r"hdmi\s*2\.0",
-                    r"hdcp\s*2\.2",
-                    r"usb\s*2\.0",
-                    r"rj[- ]?45",
-                    r"salida\s+spdif",
-                    r"entrada\s+av",
-                    r"uhd\s*\(3840\s*x\s*2160\)",
-                    r"audio\s+digital",
-                    r"video\s+compuesto"
-                ],
-                "Seguridad en interfaces": [
-                    r"interferencia\s+electromagn[eé]tica",
-                    r"emisi[oó]n\s+radiada",
-                    r"compatibilidad\s+electromagn[eé]tica",
-                    r"filtro\s+emi"
-                ]
-            },
-            "NOM-032-ENER-2013": {
-                "Eficiencia energética": [
-                    r"potencia\s+nominal\s+160\s*w",
-                    r"≤?\s*0[.,]5\s*w",
-                    r"modo\s+espera",
-                    r"stand[- ]?by",
-                    r"consumo\s+de\s+energ[ií]a"
-                ]
-            },
-            "NOM-192-SCFI/SCT1-2013": {
-                "Conectividad inalámbrica": [
-                    r"wi[-]?\s?fi",
-                    r"ieee\s*802\.11[a-z/]+",
-                    r"2t2r",
-                    r"bluetooth\s*5\.1",
-                    r"2\.4\s*(ghz)?",
-                    r"5[.,]15\s*(ghz)?",
-                    r"5[.,]85\s*(ghz)?"
-                ],
-                "Advertencias RF": [
-                    r"interferencia\s+de\s+radio",
-                    r"potencia\s+de\s+transmisi[oó]n",
-                    r"cumple\s+con\s+ift"
-                ]
-            },
-            "NMX-J-606-ANCE-2008": {
-                "Componentes y fusibles": [
-                    r"ul94[- ]?hb75",
-                    r"clasificaci[oó]n\s+de\s+fuego",
-                    r"protecci[oó]n\s+t[eé]rmica",
-                    r"resistencia\s+diel[eé]ctrica",
-                    r"circuito\s+interno"
-                ]
-            },
-            "NMX-J-640-ANCE-2010": {
-                "Identificación y etiquetas": [
-                    r"lanix",
-                    r"x\s*smart\s*tv\s*mod\.\s*x65",
-                    r"etiqueta",
-                    r"informaci[oó]n\s+t[eé]cnica"
-                ],
-                "Durabilidad de marcaje": [
-                    r"marcado\s+permanente",
-                    r"etiqueta\s+durable",
-                    r"marcado\s+indeleble"
-                ]
-            },
-            "NMX-J-551-ANCE-2012": {
-                "Cableado y alimentación": [
-                    r"cable\s+de\s+poder",
-                    r"alimentaci[oó]n",
-                    r"entrada\s+de\s+energ[ií]a",
-                    r"100[-–]?240\s*v(ac)?"
-                ],
-                "Recomendaciones de seguridad": [
-                    r"no\s+sobrecargue",
-                    r"verifique\s+el\s+cableado",
-                    r"reemplazo\s+de\s+cable"
-                ]
-            }
-        },
-        "Manual": {
-            "NOM-001-SCFI-2018": {
-                "Seguridad eléctrica": [
-                    r"riesgo de descarga",
-                    r"riesgo de choque",
-                    r"desconecte el televisor",
-                    r"no conecte el equipo si esta danado",
-                    r"utilice un tomacorriente adecuado",
-                    r"no retire la tapa",
-                    r"no desensamble el producto",
-                    r"conecte el cable de alimentacion",
-                    r"proteccion contra sobre(carga|corriente)",
-                    r"no modifique el cable",
-                    r"no utilice enchufes sueltos"
-                ],
-                "Advertencias al usuario": [
-                    r"no moje el televisor",
-                    r"mantenga alejado del agua",
-                    r"no exponer el equipo a humedad",
-                    r"no coloque objetos encima",
-                    r"mantener fuera del alcance de ninos",
-                    r"desconecte antes de limpiar",
-                    r"utilice accesorios originales",
-                    r"no utilizar cerca del calor",
-                    r"no introducir objetos en las ranuras"
-                ],
-                "Servicio y soporte": [
-                    r"servicio tecnico autorizado",
-                    r"no intente reparar",
-                    r"centro de servicio",
-                    r"contacte al fabricante",
-                    r"garantia",
-                    r"asistencia tecnica",
-                    r"reparacion solo por personal calificado"
-                ]
-            },
-            "NMX-I-60065-NYCE-2015": {
-                "Seguridad térmica y ventilación": [
-                    r"no cubra las ranuras",
-                    r"mantenga una ventilacion adecuada",
-                    r"mantenga espacio alrededor",
-                    r"no bloquee las aberturas",
-                    r"riesgo de sobrecalentamiento",
-                    r"no coloque cerca de fuentes de calor",
-                    r"superficie caliente",
-                    r"temperatura de operacion"
-                ],
-                "Conexión y operación segura": [
-                    r"conecte correctamente los cables",
-                    r"no conecte si esta humedo",
-                    r"no manipule el cable danado",
-                    r"evite sobrecargar la toma",
-                    r"adaptadores certificados",
-                    r"asegure la conexion del cable"
-                ],
-                "Mantenimiento preventivo": [
-                    r"limpie con pano suave",
-                    r"no use solventes",
-                    r"mantenimiento periodico",
-                    r"inspeccion por tecnico autorizado",
-                    r"retire el polvo",
-                    r"desconecte antes de limpiar"
-                ]
-            },
-            "NMX-I-60950-1-NYCE-2015": {
-                "Conexión de periféricos": [
-                    r"conecte el dispositivo usb",
-                    r"puertos usb",
-                    r"conexion ethernet",
-                    r"puerto hdmi",
-                    r"cable original",
-                    r"dispositivos danados",
-                    r"entrada av",
-                    r"salida optica",
-                    r"audio digital"
-                ],
-                "Seguridad en interfaces": [
-                    r"proteccion de puertos",
-                    r"descargas electrostaticas",
-                    r"pruebas de esd",
-                    r"aislamiento de senal",
-                    r"manejo de conectores",
-                    r"no forzar el conector"
-                ],
-                "Instrucciones generales": [
-                    r"instale correctamente",
-                    r"precauciones de montaje",
-                    r"manual de usuario",
-                    r"no utilizar en exteriores sin proteccion"
-                ]
-            },
-            "NOM-032-ENER-2013": {
-                "Eficiencia energética": [
-                    r"modo eco",
-                    r"modo ahorro",
-                    r"modo stand ?by",
-                    r"consumo en espera",
-                    r"ahorre energia",
-                    r"apagado automatico",
-                    r"reduzca el brillo",
-                    r"uso eficiente de energia"
-                ],
-                "Consejos al usuario": [
-                    r"desconecte el televisor cuando no lo use",
-                    r"optimice el consumo",
-                    r"apague funciones no utilizadas",
-                    r"active el ahorro de energia"
-                ]
-            },
-            "NOM-192-SCFI/SCT1-2013": {
-                "Conectividad inalámbrica": [
-                    r"configuracion de red",
-                    r"wifi",
-                    r"bluetooth",
-                    r"sintonizador digital",
-                    r"frecuencia de operacion",
-                    r"conexion inalambrica"
-                ],
-                "Advertencias RF": [
-                    r"mantenga distancia",
-                    r"no cubra las antenas",
-                    r"interferencia electromagnetica",
-                    r"potencia de transmision",
-                    r"cumple con ift"
-                ]
-            },
-            "NMX-J-606-ANCE-2008": {
-                "Componentes y fusibles": [
-                    r"fusible de proteccion",
-                    r"circuito interno",
-                    r"proteccion termica",
-                    r"personal calificado",
-                    r"componentes internos"
-                ],
-                "Compatibilidad y accesorios": [
-                    r"accesorios compatibles",
-                    r"adaptador compatible",
-                    r"proteccion contra cortocircuito",
-                    r"tolerancia electrica"
-                ]
-            },
-            "NMX-J-640-ANCE-2010": {
-                "Identificación y etiquetas": [
-                    r"modelo",
-                    r"numero de serie",
-                    r"informacion del producto",
-                    r"etiqueta",
-                    r"fabricante",
-                    r"datos tecnicos"
-                ],
-                "Durabilidad de marcaje": [
-                    r"marcado permanente",
-                    r"etiqueta legible",
-                    r"ubicada en la parte posterior"
-                ]
-            },
-            "NMX-J-551-ANCE-2012": {
-                "Cableado y alimentación": [
-                    r"cable de alimentacion",
-                    r"cable de poder",
-                    r"no doblar el cable",
-                    r"voltaje adecuado",
-                    r"extensiones seguras",
-                    r"reemplazo de cable"
-                ],
-                "Recomendaciones de seguridad": [
-                    r"no usar cables danados",
-                    r"no jalar el cable",
-                    r"revisar el cableado",
-                    r"uso correcto del cable"
-                ]
-            }
-        }
-    },
-    "Luminaria": {
-        "Ficha": {
-            "NMX-J-038/1-ANCE-2005": {
-                "Verificación de desempeño y seguridad eléctrica": [
-                    "pruebas a 60 hz", "ensayos a 60hz", "condiciones mexicanas",
-                    "seguridad eléctrica", "cumplimiento de pruebas", "ensayos eléctricos",
-                    "corriente de fuga", "resistencia dieléctrica", "pruebas de laboratorio",
-                    "evaluación eléctrica", "pruebas de seguridad", "prueba dieléctrica"
-                ],
-                "Condiciones térmicas y de tensión nacional": [
-                    "variación de tensión", "variación de voltaje", "protección térmica",
-                    "temperatura de operación", "tensión nominal", "sobretensión",
-                    "tensión sin carga", "thermal protection", "thermal shutdown",
-                    "rango de voltaje", "derating", "operación continua"
-                ]
-            },
-            "NOM-031-ENER-2019": {
-                "Eficacia luminosa (lm/w)": [
-                    "eficacia luminosa", "lm/w", "lúmenes por vatio", "rendimiento luminoso",
-                    "eficiencia lumínica", "eficacia lumínica", ">99 lm/w", "lmw",
-                    "performance lumínico", "eficiencia óptica", "luminous efficacy",
-                    "148 lm/w", "eficiencia del luminario"
-                ],
-                "Factor de potencia y pérdidas": [
-                    "factor de potencia", "fp", ">0.89", ">0.90", "pérdidas eléctricas",
-                    "lm-79", "eficiencia energética", "power factor", "pf",
-                    "distorsión armónica", "pérdidas del driver", "driver efficiency"
-                ],
-                "Flujo luminoso y distribución": [
-                    "flujo luminoso nominal", "lm output", "lúmenes", "distribución luminosa",
-                    "índice g", "uniformidad", "curva fotométrica", "iesna",
-                    "tipo i", "tipo ii", "tipo iii", "tipo iv", "tipo v",
-                    "photometric distribution", "beam pattern", "beam angle"
-                ],
-                "Curvas fotométricas (.ies o .ldt)": [
-                    ".ies", ".ldt", "archivo ies", "archivo digital", "fotometría",
-                    "curva fotométrica", "lm-79", "lm-75", "fotometrías",
-                    "C0/C90", "C0/C180", "intensidad lumínica", "cd/100lm",
-                    "archivo fotométrico", "IES file"
-                ],
-                "Temperatura de color y CRI": [
-                    "temperatura de color", "cct", "cri", "índice de reproducción cromática",
-                    "blanco cálido", "blanco neutro", "4000k", "5000k", "6500k",
-                    "color rendering index", "chromaticity", "CCT <3999K"
-                ]
-            },
-            "NMX-J-507/2-ANCE-2013": {
-                "Parámetros eléctricos": [
-                    "tensión", "voltaje", "corriente", "pérdidas", "thd",
-                    "distorsión armónica total", "condiciones de prueba",
-                    "ensayo eléctrico", "frecuencia", "driver", "120-277v",
-                    "347/480v", "consumo eléctrico", "watts", "wattage"
-                ],
-                "Ciclos de encendido": [
-                    "1500 ciclos", "encendido", "apagado", "ciclos on/off",
-                    "vida útil de encendido", "durabilidad", "switching cycles"
-                ]
-            },
-            "NMX-J-543-ANCE-2013": {
-                "Ensayos eléctricos": [
-                    "resistencia dieléctrica", "corriente de fuga", "sobrecorriente",
-                    "sobretemperatura", "4000 v rms", "0.5 ma", "prueba de aislamiento",
-                    "pruebas eléctricas", "ensayo eléctrico", "laboratorio acreditado",
-                    "dielectric test", "high-pot test"
-                ],
-                "Compatibilidad y vida útil": [
-                    "10,000 ciclos", "resistencia a impactos", "ik08", "0.7 j",
-                    "impacto mecánico", "vibración 3g", "vida útil", "compatibilidad",
-                    "resistencia mecánica", "shock resistance", "vibration test"
-                ]
-            },
-            "NMX-J-610/4-5-ANCE-2013": {
-                "Aislamiento eléctrico y térmico": [
-                    "aislamiento eléctrico", "aislamiento térmico", "10 mΩ",
-                    "4000 v rms", "ensayo dieléctrico", "prueba de aislamiento",
-                    "thermal insulation", "electrical insulation"
-                ],
-                "Prueba de envejecimiento": [
-                    "1000 horas", "operación continua", "envejecimiento",
-                    "prueba prolongada", "life test", "aging test", "TM-21", "LM-80"
-                ],
-                "Evaluación fotobiológica": [
-                    "fotobiológica", "rg0", "rg1", "iec 62471", "riesgo ocular",
-                    "riesgo fotobiológico", "photobiological safety"
-                ],
-                "Grado de protección IP": [
-                    "ip20", "ip65", "ip66", "grado de protección", "hermeticidad",
-                    "índice de protección", "protección ik", "ik08", "resistencia al polvo",
-                    "resistencia al agua", "waterproof", "dustproof"
-                ]
-            },
-            "NOM-030-ENER-2016": {
-                "Eficiencia energética y pérdidas totales": [
-                    "eficiencia energética", "pérdidas totales", "límites de eficiencia",
-                    "potencia nominal", "ahorro de energía", "energy efficiency",
-                    "consumo", "wattage", "eficiencia del sistema"
-                ]
-            },
-            "NOM-024-ENER-2016": {
-                "Compatibilidad y control inteligente": [
-                    "eficacia mínima", "vida útil", "sensores", "dimmers",
-                    "1-10v", "dali", "zigbee", "controladores inteligentes",
-                    "protocolo", "photocell", "nema 3 pins", "nema 7 pins",
-                    "smart control", "wireless", "dimming", "atenuación"
-                ]
-            }
-        },
-        "Manual": {
-            "NMX-J-507/2-ANCE-2013": {
-                "Métodos de prueba fotométricos": [
-                    "fotometría", "pruebas fotométricas", "ensayo LM-79", "curva fotométrica",
-                    "distribución luminosa", "patrón de iluminación", "haz luminoso", "ángulo de haz",
-                    "eficiencia luminosa", "rendimiento luminoso", "flujo luminoso", "lúmenes",
-                    "intensidad luminosa", "candelas", "temperatura de color", "CCT", "CRI",
-                    "IEC 60598", "archivo IES", "archivo LDT", "curva polar", "diagrama fotométrico"
-                ],
-                "Instalación y montaje": [
-                    "instalación del luminario", "montaje", "altura de instalación", "altura de montaje",
-                    "alineación del haz", "orientación del luminario", "ángulo de inclinación",
-                    "soporte mecánico", "bracket", "abrazadera", "anclaje", "perno de fijación",
-                    "distancias mínimas", "estructura de soporte", "vibraciones", "protección exterior",
-                    "montaje en poste", "montaje en pared", "montaje suspendido"
-                ],
-                "Advertencias y mantenimiento": [
-                    "desconectar antes de abrir", "corte de energía", "riesgo eléctrico",
-                    "no exponer a humedad", "superficie caliente", "riesgo de quemaduras",
-                    "limpieza del difusor", "limpieza óptica", "mantenimiento preventivo",
-                    "reemplazo de módulo", "vida útil", "degradación lumínica", "LM-80",
-                    "inspección visual", "verificación periódica", "riesgo de incendio"
-                ]
-            },
-            "NMX-J-543-ANCE-2013": {
-                "Conectadores eléctricos": [
-                    "conector", "conectador", "terminal eléctrica", "terminal de conexión",
-                    "enchufe", "contacto eléctrico", "punto de conexión", "aislamiento",
-                    "corriente máxima", "tensión nominal", "tensión hasta 35 kV",
-                    "resistencia de contacto", "torque de terminal", "borne", "clamp",
-                    "seguridad eléctrica", "compatibilidad eléctrica"
-                ],
-                "Seguridad eléctrica": [
-                    "riesgo de descarga eléctrica", "protección contra arco", "arco eléctrico",
-                    "distancia de seguridad", "distancia libre", "distancia de fuga",
-                    "sobretensión", "protección contra sobrecorriente", "aislamiento reforzado",
-                    "protección contra choque eléctrico", "advertencia eléctrica",
-                    "etiqueta de advertencia", "trabajo con tensión", "uso autorizado"
-                ],
-                "Documentación de instalación": [
-                    "manual de instalación", "manual técnico", "guía de instalación",
-                    "diagrama de conexión", "esquema eléctrico", "hoja técnica",
-                    "certificación", "documentación técnica", "registro de torque",
-                    "inspección periódica", "procedimiento de instalación"
-                ]
-            },
-            "NMX-J-610/4-5-ANCE-2013": {
-                "Compatibilidad electromagnética (EMC)": [
-                    "compatibilidad electromagnética", "EMC", "EMI", "interferencia electromagnética",
-                    "distorsión armónica", "THD", "armónicos", "inmunidad a impulsos",
-                    "transitorios eléctricos", "sobretensiones transitorias", "surge protection",
-                    "descarga atmosférica", "protección contra picos", "IEC 61000-4-5",
-                    "técnicas de medición", "campo electromagnético perturbado", "ruido eléctrico"
-                ],
-                "Instalación del luminario eléctrico": [
-                    "alimentación eléctrica", "tensión de operación", "voltaje nominal", "voltaje de entrada",
-                    "corriente de operación", "frecuencia 50/60 Hz", "factor de potencia", "PF",
-                    "puesta a tierra", "grounding", "conexión equipotencial", "protección contra sobrecorriente",
-                    "fusible", "protección térmica", "blindaje EMI", "filtro EMI"
-                ]
-            },
-            "NOM-030-ENER-2016": {
-                "Eficiencia energética lámparas LED integradas": [
-                    "eficiencia energética", "eficacia luminosa", "lm/W", "lúmenes por vatio",
-                    "flujo luminoso total", "lúmenes iniciales", "vida útil nominal", "L70",
-                    "temperatura de color correlacionada", "CCT", "índice de reproducción cromática",
-                    "CRI", "IRC", "tensión 100-277 V", "frecuencia 50/60 Hz",
-                    "clasificación de lámparas", "ahorro de energía", "consumo eléctrico"
-                ],
-                "Marcado e información del producto": [
-                    "marca del fabricante", "modelo", "tensión de entrada", "potencia nominal",
-                    "potencia consumida", "flujo luminoso", "fecha de fabricación",
-                    "etiqueta energética", "etiqueta de eficiencia", "información del empaque",
-                    "garantía mínima 3 años", "número de serie", "datos de fabricación"
-                ],
-                "Pruebas y procedimientos de conformidad": [
-                    "laboratorio acreditado", "informe de pruebas", "prueba LM-79",
-                    "estabilización térmica", "ensayo de flujo inicial", "ensayo de 1 000 h",
-                    "seguimiento de producción", "certificación NOM", "pruebas de desempeño",
-                    "ensayo de eficacia", "condiciones de prueba"
-                ]
-            },
-            "NOM-024-ENER-2016": {
-                "Instalación eficiente de luminarios exteriores": [
-                    "altura de montaje", "alineación fotométrica", "sensor de movimiento",
-                    "sensor CREPUSCULAR", "fotocélula", "carga conectada", "diseño de alumbrado público",
-                    "iluminancia", "niveles de iluminación", "ópticas limpias", "control de atenuación",
-                    "diseño sustentable", "sistema de control inteligente", "dimmers compatibles"
-                ],
-                "Mantenimiento y reemplazo": [
-                    "revisión anual", "limpieza de ópticas", "limpieza del difusor",
-                    "sustitución por degradación lumínica", ">30% pérdida de flujo",
-                    "inspección visual", "registro de mantenimiento", "equipo obsoleto",
-                    "reemplazo preventivo", "vida útil reducida"
-                ],
-                "Advertencias de uso e instalación": [
-                    "no usar con dimmers no compatibles", "no exponer a humedad",
-                    "riesgo de incendio", "sobrecalentamiento", "superficie caliente",
-                    "instalación por personal calificado", "no cubrir luminario",
-                    "riesgo eléctrico", "advertencia", "peligro"
-                ]
-            },
-            "Información complementaria requerida": {
-                "Especificaciones técnicas": [
-                    "voltaje", "tensión", "corriente", "potencia", "energía", "seguridad",
-                    "riesgo", "manual", "advertencia", "instalación", "funcionamiento",
-                    "operación", "protección", "equipo", "usuario", "conexión",
-                    "carcasa", "material", "IP65", "IP67", "temperatura de operación"
-                ]
-            }
-        }
-    }
-}
+modelos.registrar("spacy", _cargar_spacy)
+
+# Subir este número cuando cambie la lógica de análisis (invalida la caché de resultados)
+VERSION_ANALISIS = "4"
+
+# Los criterios (patrones por categoría, tipo de documento y norma) viven en
+# backend/data/criterios.json y se cargan ya compilados con catalogo_criterios.
+
+# Normalización de lo que manda el frontend a las llaves del catálogo de criterios
+CAT_MAP = {"laptop": "Laptop", "smarttv": "SmartTV", "smart tv": "SmartTV", "tv": "SmartTV", "luminaria": "Luminaria"}
+
+def normalizar_categoria(categoria):
+    return CAT_MAP.get((categoria or "").lower(), "Laptop")
+
+def normalizar_tipo_documento(tipo):
+    tipo_clean = "Ficha"
+    if "manual" in (tipo or "").lower(): tipo_clean = "Manual"
+    elif "etiqueta" in (tipo or "").lower(): tipo_clean = "Etiqueta"
+    return tipo_clean
 
 # =========================================================================
 #  FUNCIONES DE EXTRACCIÓN Y ANÁLISIS
 # =========================================================================
 
+_RE_ESPACIOS = re.compile(r'\s+')
+
+def normalizar_texto(txt):
+    """Minúsculas, sin acentos (unidecode) y con espacios colapsados."""
+    clean_text = unidecode(txt.lower())
+    return _RE_ESPACIOS.sub(' ', clean_text).strip()
+
+# Extracción en paralelo: la extracción es acotada por CPU (sobre todo con
+# pdfplumber, que es Python puro), así que en manuales grandes repartimos
+# rangos de páginas entre procesos.
+#   NOPRO_EXTRACCION_WORKERS=4        procesos (1 = secuencial, "auto" = núcleos)
+#   NOPRO_EXTRACCION_MIN_PAGINAS=40   por debajo de esto no vale la pena
+def _workers_extraccion():
+    valor = os.getenv("NOPRO_EXTRACCION_WORKERS", "1").strip().lower()
+    if valor == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(valor))
+
+EXTRACCION_WORKERS = _workers_extraccion()
+EXTRACCION_MIN_PAGINAS = int(os.getenv("NOPRO_EXTRACCION_MIN_PAGINAS", "40"))
+# Bloques por worker: más bloques = progreso más fino y mejor reparto de carga
+BLOQUES_POR_WORKER = 4
+
+_pool_extraccion = None
+_pool_workers = 0
+_LOCK_POOL = threading.Lock()
+
+def _obtener_pool_extraccion(workers):
+    """Pool de procesos reutilizable entre peticiones (se crea la primera vez)."""
+    global _pool_extraccion, _pool_workers
+    with _LOCK_POOL:
+        if _pool_extraccion is None or _pool_workers != workers:
+            if _pool_extraccion is not None:
+                _pool_extraccion.shutdown(wait=False, cancel_futures=True)
+            # "spawn": la API tiene hilos vivos y hacer fork con hilos no es seguro
+            _pool_extraccion = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool_extraccion
+
+def cerrar_pool_extraccion():
+    global _pool_extraccion, _pool_workers
+    with _LOCK_POOL:
+        if _pool_extraccion is not None:
+            _pool_extraccion.shutdown(wait=True, cancel_futures=True)
+            _pool_extraccion = None
+            _pool_workers = 0
+
+def _extraer_rango(ruta_pdf, inicio, fin, extractor):
+    """Se ejecuta en un proceso del pool: texto normalizado de las páginas [inicio, fin)."""
+    return [
+        (num, normalizar_texto(txt) if txt else None)
+        for num, txt in extraccion_texto.iterar_paginas(ruta_pdf, inicio, fin, extractor)
+    ]
+
+def _extraer_paralelo(ruta_pdf, total, workers, extractor, progreso=None):
+    """Reparte la extracción por rangos y la devuelve en orden de página."""
+    tam_bloque = max(1, math.ceil(total / (workers * BLOQUES_POR_WORKER)))
+    pool = _obtener_pool_extraccion(workers)
+    futuros = [
+        pool.submit(_extraer_rango, ruta_pdf, inicio, min(inicio + tam_bloque, total), extractor)
+        for inicio in range(0, total, tam_bloque)
+    ]
+    try:
+        # Esperamos los bloques en orden: el consumidor recibe las páginas
+        # ordenadas mientras los siguientes bloques se siguen procesando
+        for futuro in futuros:
+            for num, texto in futuro.result():
+                if progreso:
+                    progreso(num, total)
+                if texto:
+                    yield {"pagina": num, "texto": texto}
+    finally:
+        # Si el consumidor se detiene antes (o hay error) no seguimos gastando CPU
+        for futuro in futuros:
+            futuro.cancel()
+
+def extraer_paginas_texto(ruta_pdf, progreso=None, workers=None, extractor=None):
+    """
+    Modo ligero: genera {"pagina", "texto"} con el texto normalizado de cada
+    página, sin construir objetos de spaCy. Al ser un generador, solo hay una
+    página en memoria a la vez y el consumidor puede detenerse antes.
+    progreso: callback opcional progreso(paginas_leidas, total_paginas).
+    workers: procesos para extraer en paralelo (por defecto EXTRACCION_WORKERS).
+    extractor: "pymupdf" o "pdfplumber" (por defecto NOPRO_EXTRACTOR_TEXTO).
+    """
+    if workers is None:
+        workers = EXTRACCION_WORKERS
+    extractor = extraccion_texto.nombre_extractor(extractor)
+    try:
+        total = extraccion_texto.contar_paginas(ruta_pdf, extractor)
+        if workers > 1 and total >= EXTRACCION_MIN_PAGINAS:
+            # Cada proceso abre el PDF por su cuenta
+            yield from _extraer_paralelo(ruta_pdf, total, workers, extractor, progreso)
+            return
+        for num, txt in extraccion_texto.iterar_paginas(ruta_pdf, 0, total, extractor):
+            if progreso:
+                progreso(num, total)
+            if txt:
+                yield {"pagina": num, "texto": normalizar_texto(txt)}
+    except Exception as e:
+        print(f"Error leyendo PDF: {e}")
+
+def segmentar_oraciones(texto):
+    """
+    Paso opcional (bajo demanda): divide el texto de una página en oraciones
+    usando spaCy. El análisis normativo no lo necesita.
+    """
+    nlp = modelos.obtener("spacy")
+    return [sent.text for sent in nlp(texto).sents]
+
 def extraer_documento_spacy(ruta_pdf):
     """
     Extrae texto y genera un objeto DOC de spaCy por página.
     Esto permite análisis semántico y detección de oraciones.
+    Es costoso (tokenizador + sentencizer por página); para buscar patrones
+    usar extraer_paginas_texto.
     """
+    nlp = modelos.obtener("spacy")
     docs_paginas = []
     try:
         with pdfplumber.open(ruta_pdf) as pdf:
@@ -663,8 +183,7 @@ def extraer_documento_spacy(ruta_pdf):
                 txt = pagina.extract_text()
                 if txt:
                     # 1. Limpieza básica
-                    clean_text = unidecode(txt.lower()) # Normalización
-                    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+                    clean_text = normalizar_texto(txt)
                     
                     # 2. PROCESAMIENTO CON SPACY (El "Cerebro")
                     # Creamos un objeto 'doc' que contiene tokens y oraciones
@@ -679,102 +198,209 @@ def extraer_documento_spacy(ruta_pdf):
         print(f"Error leyendo PDF: {e}")
     return docs_paginas
 
-def analizar_documento(ruta_pdf, tipo_doc, categoria_producto, marca_esperada=None):
+def obtener_conjunto_criterios(categoria_producto, tipo_doc):
+    """Criterios ya compilados de una categoría y tipo de documento (catálogo activo)."""
+    return catalogo_criterios.obtener().conjunto(categoria_producto, tipo_doc)
+
+def texto_hallazgo(patron_str):
+    """Cómo aparece un patrón en el campo "Hallazgo" (recortado a 50 caracteres)."""
+    return patron_str[:50] + "..." if len(patron_str)>50 else patron_str
+
+def crear_hallazgo_texto(norma, categoria, patron_str, pagina, texto, match):
     """
-    Analiza el documento usando spaCy para estructura y Regex para patrones específicos.
+    Construye el registro de hallazgo con una ventana de contexto alrededor del
+    match. Es el formato de analisis_ia: lo usan el análisis y el re-análisis incremental.
+    """
+    # Obtenemos las posiciones exactas donde empieza y termina el hallazgo
+    start_char, end_char = match.span()
+
+    # En lugar de buscar una "oración" (que falla en tablas),
+    # recortamos 60 caracteres antes y después del hallazgo.
+    window_size = 60
+
+    start_ctx = max(0, start_char - window_size)
+    end_ctx = min(len(texto), end_char + window_size)
+
+    # Extraemos el recorte y limpiamos saltos de línea para que se vea bien en el reporte
+    raw_context = texto[start_ctx:end_ctx]
+    contexto_limpio = "..." + raw_context.replace("\n", " ").strip() + "..."
+
+    return {
+        "Norma": norma,
+        "Categoria": categoria,
+        "Hallazgo": texto_hallazgo(patron_str),
+        "Pagina": pagina,
+        "Contexto": contexto_limpio
+    }
+
+# Modo de búsqueda por defecto (ver motor_criterios.MODOS); cada petición puede pedir otro
+MODO_BUSQUEDA = os.getenv("NOPRO_MODO_BUSQUEDA", motor_criterios.MODO_PATRON).strip().lower()
+
+_CONTADORES_BUSQUEDA = {
+    "documentos": 0,
+    "paginas_leidas": 0,
+    "paginas_no_leidas": 0,
+    "evaluaciones": 0,
+    "descartes_prefiltro": 0,
+    "evaluaciones_omitidas": 0,
+    "presupuesto_excedido": 0,
+    "busquedas_cortadas": 0,
+}
+_LOCK_CONTADORES = threading.Lock()
+
+def normalizar_modo_busqueda(modo):
+    """Devuelve un modo válido; None o vacío -> MODO_BUSQUEDA. Lanza ValueError si no existe."""
+    modo = (modo or MODO_BUSQUEDA).strip().lower()
+    if modo not in motor_criterios.MODOS:
+        raise ValueError(f"Modo de búsqueda inválido: {modo}. Opciones: {', '.join(motor_criterios.MODOS)}")
+    return modo
+
+def _acumular_busqueda(stats):
+    with _LOCK_CONTADORES:
+        _CONTADORES_BUSQUEDA["documentos"] += 1
+        for campo, valor in stats.items():
+            if campo in _CONTADORES_BUSQUEDA:
+                _CONTADORES_BUSQUEDA[campo] += valor
+
+def estadisticas_busqueda():
+    """Contadores acumulados del motor de criterios en este proceso (y patrones lentos recientes)."""
+    with _LOCK_CONTADORES:
+        datos = dict(_CONTADORES_BUSQUEDA)
+    datos["motor_regex"] = motor_criterios.nombre_motor()
+    datos["presupuesto_ms"] = motor_criterios.PRESUPUESTO_MS
+    datos["patrones_lentos"] = motor_criterios.eventos_presupuesto()
+    return datos
+
+def analizar_documento(ruta_pdf, tipo_doc, categoria_producto, marca_esperada=None, progreso=None, modo_busqueda=None, catalogo=None, sha256_archivo=None, estadisticas=None):
+    """
+    Analiza el texto normalizado de cada página con los criterios (Regex) precompilados
+    y, para etiquetas, la imagen con IA de visión.
+    progreso: callback opcional progreso(porcentaje) usado por la cola de análisis.
+    modo_busqueda: "checklist", "patron" o "exhaustivo" (ver motor_criterios).
+    catalogo: catálogo de criterios a usar (por defecto el activo); la caché
+    pasa el mismo con el que calculó su clave.
+    sha256_archivo: si se indica y el texto se leyó completo, se guarda el
+    texto normalizado por página para el re-análisis incremental.
+    estadisticas: dict opcional que recibe las estadísticas de la búsqueda
+    (ver ConjuntoCriterios.buscar); busquedas_cortadas > 0 indica que algún
+    patrón se cortó por tiempo y el resultado puede estar incompleto.
     """
     resultados = []
+    modo_busqueda = normalizar_modo_busqueda(modo_busqueda)
+
+    def _avance(pct):
+        if progreso:
+            progreso(pct)
 
     # =================================================================
-    # 1. ANÁLISIS DE TEXTO (NLP + Regex Híbrido)
+    # 1. ANÁLISIS DE TEXTO (Regex precompilado sobre texto normalizado)
     # =================================================================
     if tipo_doc != "Etiqueta":
-        print(f"📄 Analizando TEXTO (Motor spaCy) para {tipo_doc} de {categoria_producto}...")
+        print(f"📄 Analizando TEXTO (Motor de criterios) para {tipo_doc} de {categoria_producto}...")
         
-        prod_criterios = CRITERIOS_POR_PRODUCTO.get(categoria_producto, {})
-        normas_a_buscar = prod_criterios.get(tipo_doc, {})
+        catalogo = catalogo or catalogo_criterios.obtener()
+        normas_a_buscar = catalogo.criterios(categoria_producto, tipo_doc)
 
         if normas_a_buscar:
-            # Obtenemos los objetos inteligentes de spaCy
-            docs_paginas = extraer_documento_spacy(ruta_pdf)
-            
-            for norma, categorias in normas_a_buscar.items():
-                for categoria, lista_patrones in categorias.items():
-                    for patron_str in lista_patrones:
-                        
-                        # Compilación del patrón (Necesario porque tus criterios son regex complejos)
-                        try:
-                            regex_compilado = re.compile(patron_str, re.IGNORECASE)
-                        except re.error:
-                            continue
-
-                        # Buscamos en cada página procesada por spaCy
-                        for pag_data in docs_paginas:
-                            doc = pag_data["doc_spacy"] # Este es el objeto spaCy
-                            
-                            # Usamos el texto completo del doc para buscar el patrón
-                            # (SpaCy no soporta regex multipalabra en Matcher nativo fácilmente,
-                            #  así que proyectamos el regex sobre el texto del doc)
-                            match = regex_compilado.search(doc.text)
-                            
-                            if match:
-                                # Obtenemos las posiciones exactas donde empieza y termina el hallazgo
-                                start_char, end_char = match.span()
-                                
-                                # --- CAMBIO CLAVE: VENTANA DE CONTEXTO ---
-                                # En lugar de buscar una "oración" (que falla en tablas),
-                                # recortamos 60 caracteres antes y después del hallazgo.
-                                window_size = 60 
-                                
-                                start_ctx = max(0, start_char - window_size)
-                                end_ctx = min(len(doc.text), end_char + window_size)
-                                
-                                # Extraemos el recorte y limpiamos saltos de línea para que se vea bonitod en el reporte
-                                raw_context = doc.text[start_ctx:end_ctx]
-                                contexto_limpio = "..." + raw_context.replace("\n", " ").strip() + "..."
-
-                                # Guardamos el resultado limpio
-                                resultados.append({
-                                    "Norma": norma,
-                                    "Categoria": categoria,
-                                    "Hallazgo": patron_str[:50] + "..." if len(patron_str)>50 else patron_str,
-                                    "Pagina": pag_data["pagina"],
-                                    "Contexto": contexto_limpio  # <--- AHORA ES UN RECORTE LIMPIO
-                                })
-                                
-                                # Opcional: Break para no buscar el mismo patrón 2 veces en la misma página
-                                # Si quieres detectar TODAS las ocurrencias, quita este break.
-                                break
+            # Motor precompilado: una pasada por página, solo se evalúan los
+            # patrones cuyo literal requerido aparece en el texto.
+            # El texto llega en streaming (sin spaCy); si todos los patrones se
+            # encuentran antes del final, ya no se extraen más páginas.
+            conjunto = catalogo.conjunto(categoria_producto, tipo_doc)
+            lectura = {"leidas": 0, "total": 0}
+
+            def avance_paginas(hechas, total):
+                lectura["leidas"], lectura["total"] = hechas, total
+                # El texto ocupa del 5% al 90% del progreso
+                _avance(5 + int(85 * hechas / max(total, 1)))
+
+            texto_paginas = [] if sha256_archivo else None
+
+            def paginas():
+                for pag_data in extraer_paginas_texto(ruta_pdf, progreso=avance_paginas):
+                    if texto_paginas is not None:
+                        texto_paginas.append((pag_data["pagina"], pag_data["texto"]))
+                    yield pag_data["pagina"], pag_data["texto"]
+
+            stats = {} if estadisticas is None else estadisticas
+            for criterio, pagina, texto, match in conjunto.buscar(paginas(), modo=modo_busqueda, estadisticas=stats):
+                resultados.append(
+                    crear_hallazgo_texto(criterio.norma, criterio.categoria, criterio.patron, pagina, texto, match)
+                )
+
+            # Páginas que ni siquiera se extrajeron porque ya no quedaba nada por buscar
+            stats["paginas_no_leidas"] = max(lectura["total"] - lectura["leidas"], 0)
+            _acumular_busqueda(stats)
+            if texto_paginas is not None and lectura["total"] and lectura["leidas"] >= lectura["total"]:
+                # Solo si se leyó todo: con texto parcial el re-análisis daría otro resultado
+                try:
+                    artefactos.guardar_texto_paginas(sha256_archivo, extraccion_texto.nombre_extractor(), texto_paginas)
+                except OSError as e:
+                    print(f"⚠️ No se pudo guardar el texto del documento: {e}")
+            print(f"🔎 Búsqueda '{modo_busqueda}': {stats['paginas_leidas']} páginas leídas, "
+                  f"{stats['paginas_no_leidas']} sin leer, {stats['evaluaciones']} regex, "
+                  f"{stats['evaluaciones_omitidas']} evaluaciones omitidas.")
+            if stats["busquedas_cortadas"]:
+                print(f"⚠️ {stats['busquedas_cortadas']} búsqueda(s) cortadas por tiempo: el resultado puede estar incompleto.")
 
     else:
         print(f"⏩ OMITIENDO análisis de texto para {tipo_doc} (Se requiere solo Visual).")
 
     # =================================================================
-    # 2. ANÁLISIS VISUAL (Sin cambios, usa IA Vision)
+    # 2. ANÁLISIS VISUAL (IA Vision, varias páginas por lote)
     # =================================================================
     if ruta_pdf.lower().endswith(".pdf") and tipo_doc == "Etiqueta":
         print(f"\n--- 🔍 DEBUG VISUAL (Solo Etiqueta) ---")
         try:
-            hallazgos = ia_vision.analizar_imagen_pdf(ruta_pdf)
-            yolo_list = hallazgos.get("yolo_detections", [])
-            google_list = hallazgos.get("google_detections", [])
-            img_base64 = hallazgos.get("image_base64")
+            _avance(10)
+            # Las páginas visuales ocupan del 10% al 90% del progreso
+            avance_visual = lambda hechas, total: _avance(10 + int(80 * hechas / max(total, 1)))
+            hallazgos = ia_vision.analizar_imagen_pdf(ruta_pdf, progreso=avance_visual, salida_base64=False)
+            _avance(90)
+            if hallazgos.get("status") == "error":
+                raise RuntimeError(hallazgos.get("error") or "Falló el análisis visual")
 
-            hallazgos_totales = []
-            if google_list: hallazgos_totales.extend(google_list)
-            if yolo_list: hallazgos_totales.extend(yolo_list)
+            hubo_detecciones = False
+            for pag in hallazgos.get("paginas", []):
+                num_pagina = pag["pagina"]
+                hallazgos_totales = []
+                if pag.get("google_detections"): hallazgos_totales.extend(pag["google_detections"])
+                if pag.get("yolo_detections"): hallazgos_totales.extend(pag["yolo_detections"])
+
+                if hallazgos_totales:
+                    hubo_detecciones = True
+                    hallazgos_str = ", ".join(hallazgos_totales)
+                    resultados.append({
+                        "Norma": "Inspección Visual IA",
+                        "Categoria": "Elementos Identificados",
+                        "Hallazgo": hallazgos_str,
+                        "Pagina": num_pagina,
+                        "Contexto": f"Se detectaron textos/logos: {hallazgos_str}"
+                    })
+
+                if pag.get("image_bytes"):
+                    # La imagen va al almacén de artefactos; el hallazgo solo lleva la referencia
+                    ref = artefactos.guardar_imagen(pag["image_bytes"], pag["image_ext"])
+                    resultados.append({
+                        "Norma": "Evidencia Gráfica",
+                        "Categoria": "Análisis de Imagen",
+                        "Hallazgo": "Detección de Objetos",
+                        "Pagina": num_pagina,
+                        "Contexto": "Visualización de zonas detectadas por la IA.",
+                        **artefactos.referencia_evidencia(ref)
+                    })
 
-            if hallazgos_totales:
-                hallazgos_str = ", ".join(hallazgos_totales)
+            if hallazgos.get("status") == "degradado":
+                # Sin la nube un "sin logos" no es confiable: queda marcado (y no se guarda en caché)
                 resultados.append({
-                    "Norma": "Inspección Visual IA",
-                    "Categoria": "Elementos Identificados",
-                    "Hallazgo": hallazgos_str,
-                    "Pagina": 1,
-                    "Contexto": f"Se detectaron textos/logos: {hallazgos_str}"
+                    "Norma": "Error Sistema",
+                    "Categoria": "Fallo en Visión",
+                    "Hallazgo": "; ".join(dict.fromkeys(hallazgos.get("errores", []))),
+                    "Pagina": 0,
+                    "Contexto": "La detección de logos en la nube no respondió; solo se aplicó el modelo local."
                 })
-            else:
-                resultados.append({
+            elif not hubo_detecciones:
+                resultados.insert(0, {
                     "Norma": "Inspección Visual IA",
                     "Categoria": "Sin Hallazgos Textuales",
                     "Hallazgo": "N/A",
@@ -782,16 +408,6 @@ def analizar_documento(ruta_pdf, tipo_doc, categoria_producto, marca_esperada=No
                     "Contexto": "No se detectaron textos legibles o logos conocidos."
                 })
 
-            if img_base64:
-                resultados.append({
-                    "Norma": "Evidencia Gráfica",
-                    "Categoria": "Análisis de Imagen",
-                    "Hallazgo": "Detección de Objetos",
-                    "Pagina": 1,
-                    "Contexto": "Visualización de zonas detectadas por la IA.",
-                    "ImagenBase64": img_base64
-                })
-
         except Exception as e:
             print(f"❌ ERROR CRÍTICO EN ANALISIS.PY (Visual): {e}")
             resultados.append({
@@ -1,18 +1,34 @@
 import io
 import os
 import fitz  # PyMuPDF
-import numpy as np
 import base64
+import hashlib
 import random
+from functools import lru_cache
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from PIL import Image, ImageDraw, ImageFont
-from ultralytics import YOLO
-from google.cloud import vision
 from dotenv import load_dotenv
+from backend.services import modelos
+from backend.services import proveedor_vision
 
 load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "models", "best.pt")
+# Versiones exportadas para ONNX Runtime (python -m backend.exportar_modelo [--int8])
+MODEL_ONNX_PATH = os.path.join(BASE_DIR, "models", "best.onnx")
+MODEL_ONNX_INT8_PATH = os.path.join(BASE_DIR, "models", "best.int8.onnx")
+
+# Backend de inferencia del detector: "torch" (best.pt), "onnx" u "onnx-int8".
+# Si falta el archivo exportado se usa torch.
+BACKEND_YOLO = os.getenv("NOPRO_YOLO_BACKEND", "torch").strip().lower()
+RUTAS_BACKEND_YOLO = {
+    "torch": MODEL_PATH,
+    "onnx": MODEL_ONNX_PATH,
+    "onnx-int8": MODEL_ONNX_INT8_PATH,
+}
 
 # --- CONFIGURACIÓN DE COLORES ---
 # Define colores específicos para clases conocidas.
@@ -62,181 +78,434 @@ if json_path:
         else:
             os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.path.abspath(json_path)
 
-# Cargar Modelo
-try:
-    print(f"🔄 Intentando cargar modelo desde: {MODEL_PATH}")
-    model = YOLO(MODEL_PATH)
-    print("✅ Modelo 'best.pt' cargado exitosamente.")
-except Exception as e:
-    print(f"⚠️ Error cargando 'best.pt', usando fallback: {e}")
-    model = YOLO("yolov8n.pt")
+def ruta_modelo_activo(backend=None):
+    """Archivo de pesos del backend configurado (best.pt si el exportado no existe)."""
+    backend = (backend or BACKEND_YOLO).lower()
+    ruta = RUTAS_BACKEND_YOLO.get(backend, MODEL_PATH)
+    if ruta != MODEL_PATH and not os.path.exists(ruta):
+        print(f"⚠️ Backend '{backend}' sin {os.path.basename(ruta)} (python -m backend.exportar_modelo); se usa torch.")
+        return MODEL_PATH
+    return ruta
+
+# Cargar Modelo (bajo demanda, ver services/modelos.py)
+def _cargar_yolo(backend=None):
+    # ultralytics arrastra torch: lo importamos solo cuando se necesita.
+    # Con .onnx, ultralytics ejecuta la red con ONNX Runtime (mismo pre y posprocesado).
+    from ultralytics import YOLO
+    ruta = ruta_modelo_activo(backend)
+    try:
+        print(f"🔄 Intentando cargar modelo desde: {ruta}")
+        model = YOLO(ruta, task="detect")
+        print(f"✅ Modelo '{os.path.basename(ruta)}' cargado exitosamente.")
+    except Exception as e:
+        print(f"⚠️ Error cargando '{os.path.basename(ruta)}', usando fallback: {e}")
+        model = YOLO("yolov8n.pt")
+    return model
+
+modelos.registrar("yolo", _cargar_yolo)
+
+def huella_modelo():
+    """Hash del archivo de pesos en uso (para invalidar cachés cuando cambia el modelo o el backend)."""
+    ruta = ruta_modelo_activo()
+    if not os.path.exists(ruta):
+        return "yolov8n.pt"
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def consultar_google_vision_lote(imagenes, errores=None):
+    """
+    Detección de logos para varias imágenes en una sola llamada al proveedor
+    (ver services/proveedor_vision.py). Retorna [(detecciones, nombres_simples)].
+    errores: lista donde se agregan los fallos del proveedor.
+    """
+    salida = []
+    for detecciones in proveedor_vision.detectar_logos_lote(imagenes, errores=errores):
+        nombres_simples = [f"{d['label']} ({d['score']:.2f})" for d in detecciones]
+        # Solo se dibujan las que traen caja
+        salida.append(([d for d in detecciones if d["box"]], nombres_simples))
+    return salida
 
 def consultar_google_vision_avanzado(pil_image):
     """
     Retorna tanto descripciones como COORDENADAS (bounding poly)
     para poder dibujar las cajas de los logos detectados por Google.
     """
-    detecciones = [] # Lista de dicts: {label, score, box: [x1, y1, x2, y2]}
-    nombres_simples = []
+    return consultar_google_vision_lote([pil_image])[0]
+
+# La llamada a la nube (I/O) corre en este pool mientras YOLO (CPU) usa el hilo actual
+HILOS_NUBE = int(os.getenv("NOPRO_VISION_HILOS", "4"))
+_EJECUTOR_NUBE = ThreadPoolExecutor(max_workers=HILOS_NUBE, thread_name_prefix="vision-nube")
+
+def _cronometrado(funcion, *args):
+    """Ejecuta funcion(*args) y retorna (resultado, segundos)."""
+    t0 = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - t0
+
+# Etiquetas de varias páginas: se renderizan en streaming y YOLO procesa
+# lotes de N imágenes por pasada (mucho más barato que una llamada por página).
+MAX_PAGINAS_ETIQUETA = int(os.getenv("NOPRO_ETIQUETA_MAX_PAGINAS", "4"))
+TAMANO_LOTE_YOLO = int(os.getenv("NOPRO_YOLO_LOTE", "4"))
+
+# Resolución de render. Con "auto" el DPI sale del tamaño de la página para
+# que el lado mayor quede cerca de RENDER_LADO_OBJETIVO px: una etiqueta
+# pequeña se renderiza a más DPI y un plano grande no genera un pixmap enorme.
+# Un número fijo (p. ej. NOPRO_RENDER_DPI=200) restaura el comportamiento anterior.
+DPI_ETIQUETA = 200
+RENDER_DPI = os.getenv("NOPRO_RENDER_DPI", "auto").strip().lower()
+RENDER_LADO_OBJETIVO = int(os.getenv("NOPRO_RENDER_LADO_PX", "2400"))
+RENDER_DPI_MIN = int(os.getenv("NOPRO_RENDER_DPI_MIN", "100"))
+RENDER_DPI_MAX = int(os.getenv("NOPRO_RENDER_DPI_MAX", "300"))
+
+# Inferencia en mosaico (opcional): además de la imagen completa, YOLO ve
+# recortes de TAMANO_MOSAICO px con solape, así las marcas pequeñas (NOM,
+# doble aislamiento) no se pierden cuando YOLO reduce la página a 640 px.
+# Las cajas de recortes vecinos se fusionan.
+MOSAICO_ACTIVO = os.getenv("NOPRO_YOLO_MOSAICO", "0").lower() in ("1", "true", "si", "sí")
+TAMANO_MOSAICO = int(os.getenv("NOPRO_YOLO_MOSAICO_PX", "640"))
+SOLAPE_MOSAICO = float(os.getenv("NOPRO_YOLO_MOSAICO_SOLAPE", "0.2"))
+# Dos cajas de la misma clase se fusionan si la intersección cubre esta
+# fracción de la más pequeña (una marca cortada en el borde de un recorte
+# queda contenida en la del recorte vecino)
+UMBRAL_FUSION = float(os.getenv("NOPRO_YOLO_UMBRAL_FUSION", "0.5"))
+
+def dpi_para_pagina(page, dpi=None):
+    """DPI de render para una página de PyMuPDF según la política configurada."""
+    dpi = dpi or RENDER_DPI
+    if str(dpi) != "auto":
+        return int(dpi)
+    lado_pt = max(page.rect.width, page.rect.height) or 1
+    dpi_auto = RENDER_LADO_OBJETIVO * 72.0 / lado_pt
+    return int(min(max(dpi_auto, RENDER_DPI_MIN), RENDER_DPI_MAX))
+
+def huella_configuracion():
+    """Parámetros de render/inferencia que cambian las detecciones (para la caché de resultados)."""
+    return (
+        f"paginas={MAX_PAGINAS_ETIQUETA};dpi={RENDER_DPI};lado={RENDER_LADO_OBJETIVO};"
+        f"dpi_min={RENDER_DPI_MIN};dpi_max={RENDER_DPI_MAX};mosaico={int(MOSAICO_ACTIVO)};"
+        f"mosaico_px={TAMANO_MOSAICO};solape={SOLAPE_MOSAICO};fusion={UMBRAL_FUSION}"
+    )
+
+def _cajas_yolo(result, dx=0, dy=0):
+    """Todas las cajas de un Results de YOLO como (cls_id, conf, [x1, y1, x2, y2]) desplazadas (dx, dy)."""
+    if result is None or not result.boxes:
+        return []
+    return [
+        (int(cls_id), float(conf), [x1 + dx, y1 + dy, x2 + dx, y2 + dy])
+        for (x1, y1, x2, y2), cls_id, conf in zip(
+            result.boxes.xyxy.tolist(), result.boxes.cls.tolist(), result.boxes.conf.tolist()
+        )
+    ]
+
+def _mejor_por_clase(cajas, names):
+    """Una caja por clase (la de mejor confianza). Retorna (objetos, nombres)."""
+    mejor = {}
+    for cls_id, conf, box in cajas:
+        if cls_id not in mejor or conf > mejor[cls_id][0]:
+            mejor[cls_id] = (conf, box)
+
+    objetos = []
+    yolo_nombres = []
+    for cls_id, (conf, box) in mejor.items():
+        name = names[cls_id]
+        yolo_nombres.append(name)
+        objetos.append({
+            "label": name,
+            "score": conf,
+            "box": box,
+            "source": "YOLO"
+        })
+    return objetos, yolo_nombres
+
+def fusionar_cajas(cajas, umbral=None):
+    """
+    Fusiona cajas de la misma clase que se solapan (detecciones repetidas en
+    recortes vecinos): queda la caja envolvente con la mayor confianza.
+    """
+    umbral = UMBRAL_FUSION if umbral is None else umbral
+    fusionadas = []
+    for cls_id, conf, box in sorted(cajas, key=lambda c: -c[1]):
+        area = max((box[2] - box[0]) * (box[3] - box[1]), 1e-6)
+        for existente in fusionadas:
+            if existente[0] != cls_id:
+                continue
+            otra = existente[2]
+            ancho = min(box[2], otra[2]) - max(box[0], otra[0])
+            alto = min(box[3], otra[3]) - max(box[1], otra[1])
+            if ancho <= 0 or alto <= 0:
+                continue
+            area_otra = max((otra[2] - otra[0]) * (otra[3] - otra[1]), 1e-6)
+            if ancho * alto / min(area, area_otra) >= umbral:
+                existente[2] = [min(box[0], otra[0]), min(box[1], otra[1]), max(box[2], otra[2]), max(box[3], otra[3])]
+                break
+        else:
+            fusionadas.append([cls_id, conf, list(box)])
+    return [tuple(c) for c in fusionadas]
+
+def recortes_mosaico(ancho, alto, tamano=None, solape=None):
+    """Rectángulos (x1, y1, x2, y2) que cubren la imagen con el solape indicado."""
+    tamano = tamano or TAMANO_MOSAICO
+    solape = SOLAPE_MOSAICO if solape is None else solape
+    paso = max(1, int(tamano * (1 - solape)))
+
+    def posiciones(total):
+        if total <= tamano:
+            return [0]
+        pos = list(range(0, total - tamano + 1, paso))
+        if pos[-1] + tamano < total:
+            pos.append(total - tamano)
+        return pos
+
+    return [
+        (x, y, min(x + tamano, ancho), min(y + tamano, alto))
+        for y in posiciones(alto) for x in posiciones(ancho)
+    ]
+
+def detectar_yolo_lote(imagenes, mosaico=None):
+    """
+    Detección YOLO (interna) de varias imágenes. Retorna [(objetos, nombres)].
+    Sin mosaico: una sola pasada con todas las imágenes.
+    Con mosaico: imagen completa + recortes, en pasadas de TAMANO_LOTE_YOLO.
+    """
+    model = modelos.obtener("yolo")
+    mosaico = MOSAICO_ACTIVO if mosaico is None else mosaico
+    imagenes = list(imagenes)
+
+    if not mosaico:
+        results = model(imagenes, verbose=False) or []
+        return [
+            _mejor_por_clase(_cajas_yolo(results[i] if i < len(results) else None), model.names)
+            for i in range(len(imagenes))
+        ]
+
+    # (indice_imagen, dx, dy, imagen) de cada entrada que verá YOLO
+    entradas = []
+    for idx, img in enumerate(imagenes):
+        entradas.append((idx, 0, 0, img))
+        for x1, y1, x2, y2 in recortes_mosaico(img.width, img.height):
+            entradas.append((idx, x1, y1, img.crop((x1, y1, x2, y2))))
+
+    cajas_por_imagen = [[] for _ in imagenes]
+    for inicio in range(0, len(entradas), max(1, TAMANO_LOTE_YOLO)):
+        bloque = entradas[inicio:inicio + max(1, TAMANO_LOTE_YOLO)]
+        results = model([img for _, _, _, img in bloque], verbose=False) or []
+        for j, (idx, dx, dy, _) in enumerate(bloque):
+            cajas_por_imagen[idx].extend(_cajas_yolo(results[j] if j < len(results) else None, dx, dy))
+
+    return [_mejor_por_clase(fusionar_cajas(cajas), model.names) for cajas in cajas_por_imagen]
+
+def detectar_yolo(pil_image):
+    """Detección YOLO de una sola imagen. Retorna (objetos, nombres)."""
+    return detectar_yolo_lote([pil_image])[0]
+
+def _pixmap_a_pil(pix):
+    """
+    Pixmap RGB de PyMuPDF -> imagen PIL leyendo directo del buffer del pixmap
+    (samples_mv no copia; PIL hace la única copia a su formato interno).
+    """
+    modo = "RGBA" if pix.alpha else "RGB"
+    imagen = Image.frombuffer(modo, (pix.width, pix.height), pix.samples_mv, "raw", modo, pix.stride, 1)
+    return imagen.convert("RGB") if pix.alpha else imagen
 
+def renderizar_paginas(ruta_pdf, max_paginas=None, dpi=None):
+    """
+    Genera (numero_pagina, imagen PIL) de las primeras `max_paginas` páginas, una a la vez.
+    dpi: número fijo o "auto" (por defecto NOPRO_RENDER_DPI, ver dpi_para_pagina).
+    """
+    max_paginas = max_paginas or MAX_PAGINAS_ETIQUETA
+    doc = fitz.open(ruta_pdf)
     try:
-        img_byte_arr = io.BytesIO()
-        pil_image.save(img_byte_arr, format='PNG')
-        content = img_byte_arr.getvalue()
-        client = vision.ImageAnnotatorClient()
-        image = vision.Image(content=content)
+        for i in range(min(len(doc), max_paginas)):
+            page = doc.load_page(i)
+            # alpha=False: PyMuPDF entrega RGB directo, sin canal que haya que recortar
+            pix = page.get_pixmap(dpi=dpi_para_pagina(page, dpi), alpha=False)
+            yield i+1, _pixmap_a_pil(pix)
+    finally:
+        doc.close()
+
+# Imagen de evidencia: se reduce PRIMERO a EVIDENCIA_ANCHO px y se dibuja
+# sobre la imagen chica (dibujar y remuestrear la página de 200 dpi costaba más).
+EVIDENCIA_ANCHO = int(os.getenv("NOPRO_EVIDENCIA_ANCHO", "800"))
+EVIDENCIA_FORMATO = os.getenv("NOPRO_EVIDENCIA_FORMATO", "jpeg").strip().lower()  # jpeg | webp
+EVIDENCIA_CALIDAD = int(os.getenv("NOPRO_EVIDENCIA_CALIDAD", "85"))
+EXTENSIONES_EVIDENCIA = {"jpeg": "jpg", "webp": "webp"}
+# Grosor de caja y tamaño de letra pensados para la página a 200 dpi (~1650 px de ancho)
+_ANCHO_REFERENCIA_DIBUJO = 1650
+
+@lru_cache(maxsize=8)
+def _fuente(tamano):
+    try:
+        return ImageFont.truetype("arial.ttf", tamano)
+    except:
+        return ImageFont.load_default()
+
+def _dibujar_detecciones(pil_image, objetos_a_dibujar, escala=1.0):
+    """
+    Dibuja las cajas de YOLO y Google sobre la imagen (la modifica).
+    escala: tamaño de pil_image / tamaño de la imagen donde se detectaron las cajas.
+    """
+    draw = ImageDraw.Draw(pil_image)
+    # Mismo aspecto visual sin importar la resolución final
+    factor = pil_image.width / float(_ANCHO_REFERENCIA_DIBUJO)
+    grosor = max(2, round(5 * factor))
+    alto_texto = max(12, round(35 * factor))
+    margen = max(2, round(5 * factor))
+    font = _fuente(max(10, round(30 * factor)))
+
+    for obj in objetos_a_dibujar:
+        label = obj["label"]
+        score = obj["score"]
+        box = [c * escala for c in obj["box"]] # [x1, y1, x2, y2]
+        
+        # Obtener color dinámico
+        color = get_color_for_label(label)
+        
+        # Dibujar Caja
+        draw.rectangle(box, outline=color, width=grosor)
         
-        # Usamos logo_detection
-        response = client.logo_detection(image=image)
+        # Dibujar Etiqueta
+        text = f"{label} {score:.2f}"
         
-        for logo in response.logo_annotations:
-            desc = logo.description
-            score = logo.score
-            
-            # Obtener vértices para la caja
-            vertices = logo.bounding_poly.vertices
-            
-            # Si hay vértices, calculamos la caja bounding (min/max)
-            if vertices:
-                x_coords = [v.x for v in vertices]
-                y_coords = [v.y for v in vertices]
-                x1, y1 = min(x_coords), min(y_coords)
-                x2, y2 = max(x_coords), max(y_coords)
-                
-                detecciones.append({
-                    "label": desc,
-                    "score": score,
-                    "box": [x1, y1, x2, y2],
-                    "source": "Google"
-                })
-            
-            nombres_simples.append(f"{desc} ({score:.2f})")
-            
-        return detecciones, nombres_simples
+        # Fondo del texto (Mismo color que la caja)
+        text_bbox = draw.textbbox((box[0], box[1]), text, font=font)
+        # Ajustar posición si se sale de la imagen arriba
+        text_y = box[1] - alto_texto if box[1] > alto_texto else box[1]
+        
+        draw.rectangle(
+            [text_bbox[0]-margen, text_y, text_bbox[2]+margen, text_y+alto_texto], 
+            fill=color
+        )
+        draw.text((text_bbox[0], text_y), text, fill="white", font=font)
 
-    except Exception as e:
-        print(f"❌ Error Google Vision: {e}")
-        return [], []
+def renderizar_evidencia(pil_image, objetos_a_dibujar, formato=None, calidad=None, ancho=None):
+    """
+    Reduce la página, dibuja las cajas sobre la versión reducida y la codifica.
+    No modifica pil_image. Retorna (bytes, extension) o (None, None) si falla.
+    """
+    formato = (formato or EVIDENCIA_FORMATO).lower()
+    formato = formato if formato in EXTENSIONES_EVIDENCIA else "jpeg"
+    calidad = calidad or EVIDENCIA_CALIDAD
+    ancho = ancho or EVIDENCIA_ANCHO
+    try:
+        escala = min(1.0, ancho / float(pil_image.width))
+        if escala < 1.0:
+            tamano = (ancho, max(1, int(pil_image.height * escala)))
+            # reducing_gap: reduce por bloques y remuestrea solo el último tramo (mucho más rápido que LANCZOS completo)
+            evidencia = pil_image.resize(tamano, Image.Resampling.BICUBIC, reducing_gap=2.0)
+        else:
+            evidencia = pil_image.copy()
+
+        _dibujar_detecciones(evidencia, objetos_a_dibujar, escala)
+
+        buffered = io.BytesIO()
+        evidencia.save(buffered, format=formato.upper(), quality=calidad)
+        return buffered.getvalue(), EXTENSIONES_EVIDENCIA[formato]
+    except Exception as img_err:
+        print(f"⚠️ Error generando imagen: {img_err}")
+        return None, None
+
+def _sumar_tiempo(tiempos, etapa, segundos):
+    tiempos[etapa] = round(tiempos.get(etapa, 0.0) + segundos, 3)
 
-def analizar_imagen_pdf(ruta_pdf):
+def analizar_imagen_pdf(ruta_pdf, max_paginas=None, tamano_lote=None, progreso=None, salida_base64=True):
+    """
+    Analiza visualmente las primeras `max_paginas` páginas (NOPRO_ETIQUETA_MAX_PAGINAS).
+    Las páginas se renderizan en streaming y se procesan por lotes de
+    `tamano_lote` (NOPRO_YOLO_LOTE): una pasada de YOLO y una llamada batch a
+    la nube por lote, en paralelo. Solo un lote de imágenes vive en memoria.
+    progreso: callback opcional progreso(paginas_hechas, total_paginas).
+    salida_base64=False devuelve la evidencia como bytes ("image_bytes" +
+    "image_ext") en lugar de un string base64 (evita codificar y decodificar).
+
+    Retorna "paginas": [{pagina, yolo_detections, google_detections, image_base64 | image_bytes}]
+    y, por compatibilidad, las claves de la página 1 en el nivel superior.
+    "status": "success", "degradado" (la nube falló: solo hay detecciones de
+    YOLO, "errores" trae los motivos) o "error" (falló el análisis, "error").
+    """
+    max_paginas = max_paginas or MAX_PAGINAS_ETIQUETA
+    tamano_lote = max(1, tamano_lote or TAMANO_LOTE_YOLO)
     resultados = {
         "yolo_detections": [],
         "google_detections": [],
         "image_base64": None,
-        "status": "success"
+        "paginas": [],
+        "status": "success",
+        "tiempos": {}
     }
+    tiempos = resultados["tiempos"]
+    errores_nube = []
+    t_inicio = time.perf_counter()
 
     try:
         print(f"📸 Procesando imagen del PDF: {os.path.basename(ruta_pdf)}")
-        
-        # 1. Leer PDF
-        doc = fitz.open(ruta_pdf)
-        if len(doc) < 1: return resultados
-        page = doc.load_page(0)
-        pix = page.get_pixmap(dpi=200) 
-        doc.close()
-        
-        # 2. Convertir a PIL
-        if pix.alpha:
-            img_data = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, 4))
-            pil_image = Image.fromarray(img_data[:, :, :3], 'RGB')
-        else:
-            img_data = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, 3))
-            pil_image = Image.fromarray(img_data, 'RGB')
+        with fitz.open(ruta_pdf) as doc:
+            total = min(len(doc), max_paginas)
+        if total < 1:
+            return resultados
 
-        # Lista maestra de objetos a dibujar
-        objetos_a_dibujar = []
+        paginas = renderizar_paginas(ruta_pdf, max_paginas)
+        while True:
+            # 1 y 2. Renderizar el siguiente lote de páginas
+            t0 = time.perf_counter()
+            lote = list(islice(paginas, tamano_lote))
+            _sumar_tiempo(tiempos, "render", time.perf_counter() - t0)
+            if not lote:
+                break
+            imagenes = [img for _, img in lote]
 
-        # 3. Detección YOLO (Interna)
-        results = model(pil_image, verbose=False)
-        yolo_nombres = []
-        
-        if results and results[0].boxes:
-            # Filtrar por mejor confianza
-            mejor_indice = {}
-            for i, box in enumerate(results[0].boxes):
-                cls_id = int(box.cls[0]) 
-                conf = float(box.conf[0])
-                if cls_id not in mejor_indice or conf > mejor_indice[cls_id][0]:
-                    mejor_indice[cls_id] = (conf, i)
-            
-            indices = [item[1] for item in mejor_indice.values()]
-            boxes_filtradas = results[0].boxes[indices]
-
-            for box in boxes_filtradas:
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                cls_id = int(box.cls[0])
-                name = model.names[cls_id]
-                conf = float(box.conf[0])
-                
-                yolo_nombres.append(name)
-                objetos_a_dibujar.append({
-                    "label": name,
-                    "score": conf,
-                    "box": [x1, y1, x2, y2],
-                    "source": "YOLO"
-                })
-        
-        resultados["yolo_detections"] = yolo_nombres
-
-        # 4. Detección Google (Nube) - Ahora con coordenadas
-        google_objs, google_nombres = consultar_google_vision_avanzado(pil_image)
-        objetos_a_dibujar.extend(google_objs) # Agregamos los logos de Google a la lista de dibujo
-        resultados["google_detections"] = google_nombres
-
-        # 5. DIBUJAR TODO (YOLO + GOOGLE)
-        draw = ImageDraw.Draw(pil_image)
-        try:
-            font = ImageFont.truetype("arial.ttf", 30)
-        except:
-            font = ImageFont.load_default()
-
-        for obj in objetos_a_dibujar:
-            label = obj["label"]
-            score = obj["score"]
-            box = obj["box"] # [x1, y1, x2, y2]
-            
-            # Obtener color dinámico
-            color = get_color_for_label(label)
-            
-            # Dibujar Caja
-            draw.rectangle(box, outline=color, width=5)
-            
-            # Dibujar Etiqueta
-            text = f"{label} {score:.2f}"
-            
-            # Fondo del texto (Mismo color que la caja)
-            text_bbox = draw.textbbox((box[0], box[1]), text, font=font)
-            # Ajustar posición si se sale de la imagen arriba
-            text_y = box[1] - 35 if box[1] > 35 else box[1]
-            
-            draw.rectangle(
-                [text_bbox[0]-5, text_y, text_bbox[2]+5, text_y+35], 
-                fill=color
-            )
-            draw.text((text_bbox[0], text_y), text, fill="white", font=font)
-
-        # 6. Redimensionar y Base64
-        try:
-            base_width = 800
-            if pil_image.width > base_width:
-                w_percent = (base_width / float(pil_image.width))
-                h_size = int((float(pil_image.height) * float(w_percent)))
-                resample_method = Image.Resampling.LANCZOS if hasattr(Image, 'Resampling') else Image.LANCZOS
-                pil_image = pil_image.resize((base_width, h_size), resample_method)
-
-            buffered = io.BytesIO()
-            pil_image.save(buffered, format="JPEG", quality=85)
-            img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-            resultados["image_base64"] = img_str
-            print("✅ Imagen Base64 generada con cajas multicolor.")
-        except Exception as img_err:
-            print(f"⚠️ Error generando imagen: {img_err}")
+            # 3 y 4. Google (nube, I/O) en otro hilo mientras YOLO (CPU) corre en este.
+            # Ninguno modifica las imágenes; el dibujo se hace cuando ambos terminan.
+            futuro_google = _EJECUTOR_NUBE.submit(_cronometrado, consultar_google_vision_lote, imagenes, errores_nube)
+            try:
+                yolo_lote, seg_yolo = _cronometrado(detectar_yolo_lote, imagenes)
+            finally:
+                # Aunque YOLO falle esperamos a la nube para no dejar trabajo huérfano
+                t0 = time.perf_counter()
+                google_lote, seg_google = futuro_google.result()
+                _sumar_tiempo(tiempos, "espera_google", time.perf_counter() - t0)
+            _sumar_tiempo(tiempos, "yolo", seg_yolo)
+            _sumar_tiempo(tiempos, "google", seg_google)
 
+            # 5 y 6. Dibujar (YOLO + GOOGLE) sobre la versión reducida y codificar cada página del lote
+            for (num, pil_image), (objetos_yolo, yolo_nombres), (google_objs, google_nombres) in zip(lote, yolo_lote, google_lote):
+                t0 = time.perf_counter()
+                datos, extension = renderizar_evidencia(pil_image, objetos_yolo + google_objs)
+                _sumar_tiempo(tiempos, "evidencia", time.perf_counter() - t0)
+
+                pagina = {
+                    "pagina": num,
+                    "yolo_detections": yolo_nombres,
+                    "google_detections": google_nombres,
+                }
+                if salida_base64:
+                    pagina["image_base64"] = base64.b64encode(datos).decode("utf-8") if datos else None
+                else:
+                    pagina["image_bytes"] = datos
+                    pagina["image_ext"] = extension
+                resultados["paginas"].append(pagina)
+                if progreso:
+                    progreso(num, total)
+
+        primera = resultados["paginas"][0]
+        resultados["yolo_detections"] = primera["yolo_detections"]
+        resultados["google_detections"] = primera["google_detections"]
+        resultados["image_base64"] = primera.get("image_base64")
+        if primera.get("image_base64") or primera.get("image_bytes"):
+            print("✅ Imagen de evidencia generada con cajas multicolor.")
+
+        if errores_nube:
+            resultados["status"] = "degradado"
+            resultados["errores"] = errores_nube
+        tiempos["paginas"] = len(resultados["paginas"])
+        tiempos["total"] = round(time.perf_counter() - t_inicio, 3)
+        print(f"⏱️ Visión: {tiempos}")
         return resultados
 
     except Exception as e:
         print(f"❌ Error en ia_vision: {e}")
         resultados["status"] = "error"
         resultados["error"] = str(e)
-        return resultados
\ No newline at end of file
+        return resultados
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+# =========================================================================
+#  REGISTRO DE MODELOS (CARGA PEREZOSA)
+# =========================================================================
+# Los modelos pesados (spaCy, YOLO) ya no se cargan al importar los
+# servicios. Cada módulo registra una función "cargador" y el modelo se
+# construye la primera vez que alguien lo pide con obtener().
+# Los workers que solo atienden login/historial nunca pagan ese costo.
+#
+# Para precargar al arrancar (workers de análisis) definir, por ejemplo:
+#   NOPRO_PRECARGAR_MODELOS=spacy,yolo   (o "todos")
+
+_CARGADORES = {}
+_MODELOS = {}
+_TIEMPOS_CARGA = {}
+_LOCK = threading.Lock()
+
+
+def registrar(nombre, cargador):
+    """Registra la función que construye el modelo `nombre` (sin cargarlo)."""
+    _CARGADORES[nombre] = cargador
+
+
+def obtener(nombre):
+    """Devuelve el modelo, cargándolo la primera vez (seguro entre hilos)."""
+    modelo = _MODELOS.get(nombre)
+    if modelo is not None:
+        return modelo
+
+    with _LOCK:
+        # Otro hilo pudo cargarlo mientras esperábamos el lock
+        if nombre in _MODELOS:
+            return _MODELOS[nombre]
+
+        cargador = _CARGADORES.get(nombre)
+        if cargador is None:
+            raise KeyError(f"Modelo no registrado: {nombre}")
+
+        t0 = time.perf_counter()
+        modelo = cargador()
+        _TIEMPOS_CARGA[nombre] = time.perf_counter() - t0
+        _MODELOS[nombre] = modelo
+        print(f"✅ Modelo '{nombre}' cargado en {_TIEMPOS_CARGA[nombre]:.2f}s")
+        return modelo
+
+
+def esta_cargado(nombre):
+    return nombre in _MODELOS
+
+
+def precargar(nombres=None):
+    """
+    Hook de calentamiento: carga los modelos indicados (o todos los registrados).
+    Los errores se reportan pero no detienen el arranque.
+    """
+    if nombres is None:
+        nombres = list(_CARGADORES)
+
+    for nombre in nombres:
+        try:
+            obtener(nombre)
+        except Exception as e:
+            print(f"⚠️ No se pudo precargar '{nombre}': {e}")
+
+
+def modelos_a_precargar():
+    """Lee NOPRO_PRECARGAR_MODELOS. Devuelve [] si no se pidió precarga."""
+    valor = os.getenv("NOPRO_PRECARGAR_MODELOS", "").strip()
+    if not valor:
+        return []
+    if valor.lower() in ("todos", "all", "1", "true"):
+        return list(_CARGADORES)
+    return [n.strip() for n in valor.split(",") if n.strip()]
+
+
+def estado():
+    """Resumen para diagnóstico: qué modelos están cargados y cuánto tardaron."""
+    return {
+        nombre: {
+            "cargado": nombre in _MODELOS,
+            "segundos_carga": round(_TIEMPOS_CARGA[nombre], 3) if nombre in _TIEMPOS_CARGA else None,
+        }
+        for nombre in _CARGADORES
+    }
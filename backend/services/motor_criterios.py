@@ -0,0 +1,412 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from re import _parser as sre_parse
+from re import _constants as sre_constants
+
+# =========================================================================
+#  MOTOR DE COINCIDENCIA DE CRITERIOS
+# =========================================================================
+# Cada conjunto (categoria, tipo_doc) se compila UNA sola vez. Para cada
+# patrón se extrae además un "literal requerido": texto que obligatoriamente
+# aparece en cualquier coincidencia del regex. Antes de ejecutar el regex
+# sobre una página se verifica ese literal con `in` (búsqueda en C), así que
+# la gran mayoría de pares patrón × página se descartan sin tocar el motor
+# de expresiones regulares.
+#
+# Nota: se probó una sola alternación gigante (p1|p2|...|pN), pero el motor
+# `re` de Python no es un DFA y esa alternación resultó MÁS lenta que el
+# ciclo anidado original. El prefiltro por literales sí reduce el costo.
+
+# Longitud mínima para que un literal valga la pena como prefiltro
+_MIN_LITERAL = 2
+
+# Modos de búsqueda:
+#   "checklist"  -> basta un hallazgo por (Norma, Categoria): en cuanto una
+#                   categoría se cumple se dejan de evaluar sus patrones, y al
+#                   cubrir todas se deja de leer el documento.
+#   "patron"     -> primera página de cada patrón (comportamiento original).
+#   "exhaustivo" -> todas las páginas donde aparece cada patrón (evidencia completa).
+MODO_CHECKLIST = "checklist"
+MODO_PATRON = "patron"
+MODO_EXHAUSTIVO = "exhaustivo"
+MODOS = (MODO_CHECKLIST, MODO_PATRON, MODO_EXHAUSTIVO)
+
+# Motores de expresiones regulares (NOPRO_MOTOR_REGEX):
+#   "regex" -> módulo `regex` (por defecto; ya viene con spaCy). La búsqueda
+#              se corta al agotar el presupuesto y cuenta como "sin
+#              coincidencia" en esa página; el análisis sigue con los demás
+#              patrones. Mismos hallazgos que `re` en el corpus de uploads/.
+#   "re"    -> módulo estándar. Una búsqueda no se puede interrumpir: si
+#              excede el presupuesto solo se reporta (un patrón con
+#              backtracking catastrófico bloquea al worker). Es el respaldo,
+#              con advertencia, si `regex` no está instalado.
+#   "re2"   -> google-re2 (opcional: pip install google-re2). Tiempo lineal,
+#              sin backtracking. Los patrones que RE2 no soporta
+#              (lookarounds, referencias) se quedan con `re`.
+MOTOR_REGEX = os.getenv("NOPRO_MOTOR_REGEX", "regex").strip().lower()
+# Presupuesto por búsqueda (un patrón sobre una página), en milisegundos
+PRESUPUESTO_MS = float(os.getenv("NOPRO_REGEX_PRESUPUESTO_MS", "50"))
+
+
+def _literales_secuencia(items):
+    """
+    Recorre una secuencia del árbol de sre_parse y devuelve la mejor lista de
+    alternativas literales requeridas (basta que aparezca UNA de ellas),
+    o None si no se puede garantizar ningún literal.
+    """
+    candidatos = []
+    actual = ""
+
+    for op, av in items:
+        if op is sre_constants.LITERAL and av < 128:
+            actual += chr(av).lower()
+            continue
+
+        if actual:
+            candidatos.append([actual])
+            actual = ""
+
+        # Grupo con alternativas: (procesador|cpu) -> ["procesador", "cpu"]
+        if op is sre_constants.SUBPATTERN:
+            sub = _literales_secuencia(av[-1])
+            if sub:
+                candidatos.append(sub)
+        elif op is sre_constants.BRANCH:
+            alternativas = []
+            for rama in av[1]:
+                sub = _literales_secuencia(rama)
+                if not sub:
+                    alternativas = None
+                    break
+                alternativas.extend(sub)
+            if alternativas:
+                candidatos.append(alternativas)
+
+    if actual:
+        candidatos.append([actual])
+
+    candidatos = [c for c in candidatos if min(len(x) for x in c) >= _MIN_LITERAL]
+    if not candidatos:
+        return None
+
+    # Preferimos el candidato cuyo literal más corto sea el más largo
+    return max(candidatos, key=lambda c: (min(len(x) for x in c), -len(c)))
+
+
+def extraer_literales_requeridos(patron_str):
+    """
+    Devuelve una lista de literales en minúsculas de los cuales al menos uno
+    aparece en cualquier coincidencia de `patron_str`, o None.
+    """
+    try:
+        arbol = sre_parse.parse(patron_str, re.IGNORECASE)
+    except re.error:
+        return None
+    return _literales_secuencia(list(arbol))
+
+
+# --- Revisión estática (propensión a backtracking) ---------------------------
+
+_REPETICIONES = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, sre_constants.POSSESSIVE_REPEAT)
+# Producto de las holguras de las ventanas comodín (.{0,20}.{0,20} -> 21*21)
+# a partir del cual cada posición inicial cuesta demasiados intentos
+_MAX_COMBINACIONES_COMODIN = 400
+
+
+def _es_comodin(items):
+    """True si la repetición es de un solo elemento que acepta casi todo: ., [^x]."""
+    if len(items) != 1:
+        return False
+    op, av = items[0]
+    if op is sre_constants.IN:
+        # Clases negadas ([^x]); \s, \d o [a-z] no chocan con el texto de alrededor
+        return bool(av) and av[0][0] is sre_constants.NEGATE
+    return op in (sre_constants.ANY, sre_constants.NOT_LITERAL)
+
+
+def _revisar_secuencia(items, dentro_de_repeticion, hallazgos, comodines):
+    for op, av in items:
+        if op in _REPETICIONES:
+            minimo, maximo, sub = av
+            sub = list(sub)
+            variable = maximo != minimo
+            sin_limite = maximo == sre_constants.MAXREPEAT
+            if dentro_de_repeticion and variable and op is not sre_constants.POSSESSIVE_REPEAT:
+                hallazgos.add("cuantificador anidado (backtracking exponencial)")
+            if variable and _es_comodin(sub):
+                comodines.append(None if sin_limite else maximo - minimo + 1)
+            _revisar_secuencia(sub, dentro_de_repeticion or maximo > 1, hallazgos, comodines)
+        elif op is sre_constants.SUBPATTERN:
+            _revisar_secuencia(av[-1], dentro_de_repeticion, hallazgos, comodines)
+        elif op is sre_constants.BRANCH:
+            for rama in av[1]:
+                _revisar_secuencia(rama, dentro_de_repeticion, hallazgos, comodines)
+
+
+def revisar_patron(patron_str):
+    """
+    Revisión estática de un patrón: lista de advertencias sobre construcciones
+    propensas a backtracking (vacía si no se ve nada sospechoso).
+    """
+    try:
+        arbol = sre_parse.parse(patron_str, re.IGNORECASE)
+    except re.error as e:
+        return [f"no compila: {e}"]
+
+    hallazgos = set()
+    comodines = []
+    _revisar_secuencia(list(arbol), False, hallazgos, comodines)
+
+    sin_limite = comodines.count(None)
+    if sin_limite >= 2:
+        hallazgos.add(f"{sin_limite} comodines sin límite (.*, .+) en el mismo patrón")
+    acotados = [c for c in comodines if c is not None]
+    if sin_limite and acotados:
+        hallazgos.add("comodín sin límite (.*, .+) combinado con ventanas .{m,n}")
+    if len(acotados) >= 2:
+        combinaciones = 1
+        for holgura in acotados:
+            combinaciones *= holgura
+        if combinaciones > _MAX_COMBINACIONES_COMODIN:
+            hallazgos.add(f"{len(acotados)} ventanas comodín encadenadas ({combinaciones} combinaciones por inicio)")
+    if extraer_literales_requeridos(patron_str) is None:
+        hallazgos.add("sin literal requerido: el prefiltro no lo descarta en ninguna página")
+    return sorted(hallazgos)
+
+
+# --- Motores ----------------------------------------------------------------
+# Cada motor compila un patrón y devuelve la función buscar(texto) -> match o
+# None; si se agota el presupuesto lanza TimeoutError.
+
+def _compilar_re(patron, presupuesto):
+    return re.compile(patron, re.IGNORECASE).search
+
+
+def _compilar_regex(patron, presupuesto):
+    import regex
+    compilado = regex.compile(patron, regex.IGNORECASE | regex.V0)
+    return lambda texto: compilado.search(texto, timeout=presupuesto)
+
+
+def _compilar_re2(patron, presupuesto):
+    import re2
+    return re2.compile("(?i)" + patron).search
+
+
+MOTORES = {
+    "re": {"modulo": "re", "compilar": _compilar_re},
+    "regex": {"modulo": "regex", "compilar": _compilar_regex},
+    "re2": {"modulo": "re2", "compilar": _compilar_re2},
+}
+_MOTORES_DISPONIBLES = {}
+
+
+def nombre_motor(motor=None):
+    """Normaliza el motor pedido; si no existe o su módulo no está instalado se usa "re"."""
+    motor = (motor or MOTOR_REGEX).lower()
+    if motor not in MOTORES:
+        print(f"⚠️ Motor de regex desconocido '{motor}', se usa 're'.")
+        return "re"
+    if motor not in _MOTORES_DISPONIBLES:
+        try:
+            __import__(MOTORES[motor]["modulo"])
+            _MOTORES_DISPONIBLES[motor] = True
+        except ImportError:
+            print(f"⚠️ El motor de regex '{motor}' no está instalado, se usa 're' "
+                  f"(el presupuesto de {PRESUPUESTO_MS:g} ms solo se reporta, no corta búsquedas).")
+            _MOTORES_DISPONIBLES[motor] = False
+    return motor if _MOTORES_DISPONIBLES[motor] else "re"
+
+
+# --- Patrones que exceden el presupuesto ---------------------------------------
+
+_EVENTOS_PRESUPUESTO = deque(maxlen=50)
+_TOTAL_EXCEDIDOS = {"excedidos": 0, "cortados": 0}
+_LOCK_EVENTOS = threading.Lock()
+
+
+def _reportar_exceso(criterio, pagina, segundos, cortado):
+    evento = {
+        "norma": criterio.norma,
+        "categoria": criterio.categoria,
+        "patron": criterio.patron,
+        "motor": criterio.motor,
+        "pagina": pagina,
+        "ms": round(segundos * 1000, 1),
+        "cortado": cortado,
+    }
+    with _LOCK_EVENTOS:
+        _EVENTOS_PRESUPUESTO.append(evento)
+        _TOTAL_EXCEDIDOS["excedidos"] += 1
+        if cortado:
+            _TOTAL_EXCEDIDOS["cortados"] += 1
+    accion = "cortado" if cortado else "excedido"
+    print(f"⏱️ Patrón lento ({accion}, {evento['ms']} ms > {PRESUPUESTO_MS:g} ms) "
+          f"{criterio.norma} / {criterio.categoria}, pág. {pagina}: {criterio.patron[:60]}")
+
+
+def eventos_presupuesto():
+    """Totales y últimos eventos de patrones que excedieron el presupuesto en este proceso."""
+    with _LOCK_EVENTOS:
+        return {**_TOTAL_EXCEDIDOS, "recientes": list(_EVENTOS_PRESUPUESTO)}
+
+
+class CriterioCompilado:
+    """Un patrón ya compilado (buscar) junto con su Norma/Categoria de origen y su motor."""
+
+    __slots__ = ("norma", "categoria", "patron", "buscar", "literales", "motor")
+
+    def __init__(self, norma, categoria, patron, buscar, literales, motor="re"):
+        self.norma = norma
+        self.categoria = categoria
+        self.patron = patron
+        self.buscar = buscar
+        self.literales = literales
+        self.motor = motor
+
+
+class ConjuntoCriterios:
+    """
+    Conjunto de criterios compilados para un par (categoria, tipo_doc).
+    `buscar` recorre cada página una sola vez; qué se devuelve por patrón
+    depende del modo (ver MODOS).
+    """
+
+    def __init__(self, criterios):
+        self.criterios = criterios
+
+    def __len__(self):
+        return len(self.criterios)
+
+    def buscar(self, paginas, modo=MODO_PATRON, estadisticas=None):
+        """
+        paginas: iterable de (numero_pagina, texto).
+        Retorna lista de (criterio, numero_pagina, texto, match) ordenada por
+        criterio y página.
+        estadisticas: dict opcional que se llena con paginas_leidas,
+        evaluaciones (regex ejecutados), descartes_prefiltro,
+        evaluaciones_omitidas (pares patrón × página que el modo exhaustivo
+        habría revisado y este modo se saltó), presupuesto_excedido
+        (búsquedas que tardaron más de PRESUPUESTO_MS) y busquedas_cortadas
+        (las que el motor interrumpió: el resultado puede estar incompleto).
+        """
+        total = len(self.criterios)
+        pendientes = list(range(total))
+        cubiertos = set()
+        encontrados = []
+        paginas_leidas = evaluaciones = descartes = omitidas = excedidos = cortadas = 0
+        presupuesto = PRESUPUESTO_MS / 1000.0
+
+        for numero, texto in paginas:
+            if modo == MODO_CHECKLIST:
+                pendientes = [
+                    idx for idx in pendientes
+                    if (self.criterios[idx].norma, self.criterios[idx].categoria) not in cubiertos
+                ]
+            if not pendientes:
+                break
+            paginas_leidas += 1
+            omitidas += total - len(pendientes)
+
+            # El prefiltro solo es seguro sobre texto ASCII (lo normal tras unidecode)
+            usar_prefiltro = texto.isascii()
+            texto_min = texto.lower() if usar_prefiltro else texto
+
+            siguientes = []
+            for idx in pendientes:
+                criterio = self.criterios[idx]
+                if modo == MODO_CHECKLIST and (criterio.norma, criterio.categoria) in cubiertos:
+                    # Otro patrón de la misma categoría ya se cumplió en esta página
+                    omitidas += 1
+                    continue
+
+                if usar_prefiltro and criterio.literales:
+                    if not any(lit in texto_min for lit in criterio.literales):
+                        descartes += 1
+                        siguientes.append(idx)
+                        continue
+
+                evaluaciones += 1
+                t0 = time.perf_counter()
+                try:
+                    match = criterio.buscar(texto)
+                    cortado = False
+                except TimeoutError:
+                    # Motor con límite de tiempo: esta página cuenta como sin coincidencia
+                    match = None
+                    cortado = True
+                    cortadas += 1
+                duracion = time.perf_counter() - t0
+                if duracion > presupuesto:
+                    excedidos += 1
+                    _reportar_exceso(criterio, numero, duracion, cortado)
+                if match:
+                    encontrados.append((idx, numero, (criterio, numero, texto, match)))
+                    if modo == MODO_EXHAUSTIVO:
+                        siguientes.append(idx)
+                    elif modo == MODO_CHECKLIST:
+                        cubiertos.add((criterio.norma, criterio.categoria))
+                else:
+                    siguientes.append(idx)
+            pendientes = siguientes
+
+        if estadisticas is not None:
+            estadisticas.update({
+                "paginas_leidas": paginas_leidas,
+                "evaluaciones": evaluaciones,
+                "descartes_prefiltro": descartes,
+                "evaluaciones_omitidas": omitidas,
+                "presupuesto_excedido": excedidos,
+                "busquedas_cortadas": cortadas,
+            })
+
+        encontrados.sort(key=lambda e: (e[0], e[1]))
+        return [hallazgo for _, _, hallazgo in encontrados]
+
+
+class ErrorPatron(ValueError):
+    """Uno o más patrones de un conjunto no compilan; `detalles` lista cada uno."""
+
+    def __init__(self, detalles):
+        self.detalles = detalles
+        super().__init__("; ".join(detalles))
+
+
+def compilar_conjunto(normas_a_buscar, motor=None):
+    """
+    Compila un diccionario {norma: {categoria: [patrones]}} a un ConjuntoCriterios.
+    La sintaxis válida es la de `re`; si algún patrón es inválido lanza
+    ErrorPatron con todos los que fallaron (el catálogo lo reporta al cargar
+    en vez de perder el criterio).
+    motor: "re", "regex" o "re2" (por defecto NOPRO_MOTOR_REGEX).
+    """
+    motor = nombre_motor(motor)
+    presupuesto = PRESUPUESTO_MS / 1000.0
+    criterios = []
+    errores = []
+    for norma, categorias in normas_a_buscar.items():
+        for categoria, lista_patrones in categorias.items():
+            for patron_str in lista_patrones:
+                try:
+                    buscar = _compilar_re(patron_str, presupuesto)
+                except re.error as e:
+                    errores.append(f"{norma}/{categoria}: {patron_str!r} ({e})")
+                    continue
+                motor_patron = "re"
+                if motor != "re":
+                    try:
+                        buscar = MOTORES[motor]["compilar"](patron_str, presupuesto)
+                        motor_patron = motor
+                    except Exception:
+                        # Sintaxis que el motor alterno no soporta: se queda con `re`
+                        pass
+                criterios.append(CriterioCompilado(
+                    norma, categoria, patron_str, buscar,
+                    extraer_literales_requeridos(patron_str), motor_patron
+                ))
+    if errores:
+        raise ErrorPatron(errores)
+    return ConjuntoCriterios(criterios)
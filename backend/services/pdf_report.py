@@ -1,6 +1,12 @@
 import io
-import base64
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+
+import fitz
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
@@ -12,7 +18,14 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.colors import HexColor
 
 # Importamos criterios
-from backend.services.ia_analisis import CRITERIOS_POR_PRODUCTO
+from backend.services import catalogo_criterios
+from backend.services import artefactos
+from backend.services import cache_reportes
+from backend.services import cumplimiento
+
+# Versión de la plantilla: forma parte de la clave de la caché de reportes
+# (services/cache_reportes.py). Subirla al cambiar el diseño del PDF.
+VERSION_PLANTILLA = "1"
 
 # --- CONFIGURACIÓN DE COLORES (Igual a React) ---
 COLOR_TEXT_MAIN = HexColor('#1e293b')  # Slate-800
@@ -49,9 +62,12 @@ style_patron = ParagraphStyle('Patron', parent=styles['Normal'], fontSize=7, tex
 style_legal_title = ParagraphStyle('LegalTitle', parent=styles['Normal'], fontSize=9, textColor=COLOR_TEXT_MAIN, fontName='Helvetica-Bold', spaceBefore=10)
 style_legal_text = ParagraphStyle('LegalText', parent=styles['Normal'], fontSize=7, textColor=COLOR_TEXT_SEC, alignment=TA_JUSTIFY, leading=9)
 
-def _crear_header(tipo_documento, marca_producto, modelo_producto):
+def fecha_reporte():
+    return datetime.now().strftime('%d/%m/%Y')
+
+def _crear_header(tipo_documento, marca_producto, modelo_producto, fecha_texto=None):
     """Encabezado limpio y profesional"""
-    fecha_texto = datetime.now().strftime('%d/%m/%Y')
+    fecha_texto = fecha_texto or fecha_reporte()
     
     col_izq = [
         Paragraph("REPORTE DIGITAL NOPRO", style_brand),
@@ -73,15 +89,12 @@ def _crear_header(tipo_documento, marca_producto, modelo_producto):
     ]))
     return t
 
-def _crear_checklist(resultados_ia, categoria_producto, tipo_key):
-    """Tabla de checklist con ortografía cuidada"""
+def _crear_checklist(indice, tipo_key):
+    """Tabla de checklist con ortografía cuidada (a partir del índice de cumplimiento)"""
     elementos = []
     elementos.append(Paragraph("1. Checklist de cumplimiento normativo", style_h2))
     
-    # Buscamos usando la llave correcta (Ficha, Manual, Etiqueta)
-    criterios_teoricos = CRITERIOS_POR_PRODUCTO.get(categoria_producto, {}).get(tipo_key, {})
-    
-    if not criterios_teoricos:
+    if not indice["checklist"]:
         elementos.append(Paragraph(f"No hay criterios normativos definidos para: {tipo_key}.", styles['Normal']))
         return elementos
 
@@ -91,27 +104,17 @@ def _crear_checklist(resultados_ia, categoria_producto, tipo_key):
         Paragraph("Estatus", style_th_center)
     ]]
     
-    for norma, requisitos_dict in criterios_teoricos.items():
-        for categoria_requisito, _ in requisitos_dict.items():
-            encontrado = False
-            if resultados_ia:
-                for item in resultados_ia:
-                    h_norma = item.get('Norma', '') if isinstance(item, dict) else item.Norma
-                    h_cat = item.get('Categoria', '') if isinstance(item, dict) else item.Categoria
-                    if h_norma == norma and h_cat == categoria_requisito:
-                        encontrado = True
-                        break
-            
-            if encontrado:
-                status_text = Paragraph("✅ Cumple", ParagraphStyle('OK', parent=styles['Normal'], textColor=COLOR_GREEN, fontSize=8, alignment=TA_CENTER))
-            else:
-                status_text = Paragraph("❌ No detectado", ParagraphStyle('Fail', parent=styles['Normal'], textColor=COLOR_RED, fontSize=8, alignment=TA_CENTER))
-
-            data_checklist.append([
-                Paragraph(norma, style_cell_text), 
-                Paragraph(categoria_requisito, style_cell_text), 
-                status_text
-            ])
+    for criterio in indice["checklist"]:
+        if criterio["cumple"]:
+            status_text = Paragraph("✅ Cumple", ParagraphStyle('OK', parent=styles['Normal'], textColor=COLOR_GREEN, fontSize=8, alignment=TA_CENTER))
+        else:
+            status_text = Paragraph("❌ No detectado", ParagraphStyle('Fail', parent=styles['Normal'], textColor=COLOR_RED, fontSize=8, alignment=TA_CENTER))
+
+        data_checklist.append([
+            Paragraph(criterio["norma"], style_cell_text), 
+            Paragraph(criterio["requisito"], style_cell_text), 
+            status_text
+        ])
 
     t = Table(data_checklist, colWidths=[50*mm, 100*mm, 30*mm], repeatRows=1)
     t.setStyle(TableStyle([
@@ -145,7 +148,7 @@ def _crear_tabla_hallazgos(resultados_ia):
         contexto = item.get('Contexto', '') if isinstance(item, dict) else item.Contexto
         hallazgo_txt = item.get('Hallazgo', '') if isinstance(item, dict) else item.Hallazgo
         pagina = item.get('Pagina', 0) if isinstance(item, dict) else item.Pagina
-        img_b64 = item.get('ImagenBase64') if isinstance(item, dict) else item.ImagenBase64
+        img_data = artefactos.imagen_de_hallazgo(item)
 
         es_visual = any(x in norma for x in ["Visual", "Gráfica", "Imagen"])
         
@@ -156,9 +159,8 @@ def _crear_tabla_hallazgos(resultados_ia):
         ]
         
         contenido_central = []
-        if img_b64:
+        if img_data:
             try:
-                img_data = base64.b64decode(img_b64)
                 img_stream = io.BytesIO(img_data)
                 im = Image(img_stream, width=80*mm, height=50*mm, kind='proportional')
                 contenido_central.append(im)
@@ -202,8 +204,12 @@ def _crear_disclaimer_legal():
     return elementos
 
 # --- FUNCIÓN REPORTE INDIVIDUAL (Sin cambios mayores, solo estilos) ---
-def generar_pdf_reporte(documento_db, resultados_ia, categoria_producto, tipo_documento, marca_producto, modelo_producto):
-    buffer = io.BytesIO()
+def generar_pdf_reporte(documento_db, resultados_ia, categoria_producto, tipo_documento, marca_producto, modelo_producto, fecha=None, destino=None):
+    """
+    destino: ruta donde escribir el PDF (no se arma completo en memoria).
+    Sin destino retorna un BytesIO con el PDF.
+    """
+    buffer = destino or io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=15*mm, leftMargin=15*mm, topMargin=15*mm, bottomMargin=15*mm)
     story = []
     
@@ -213,27 +219,67 @@ def generar_pdf_reporte(documento_db, resultados_ia, categoria_producto, tipo_do
     elif tipo_documento == "Etiqueta": tipo_display = "Etiquetado"
     elif tipo_documento == "Ficha": tipo_display = "Ficha Técnica"
 
-    story.append(_crear_header(f"Reporte {tipo_display}", marca_producto, modelo_producto))
+    story.append(_crear_header(f"Reporte {tipo_display}", marca_producto, modelo_producto, fecha))
     story.append(Spacer(1, 8*mm))
     
-    story.extend(_crear_checklist(resultados_ia, categoria_producto, tipo_documento))
+    indice = cumplimiento.obtener_indice(documento_db, resultados_ia, categoria_producto, tipo_documento)
+    story.extend(_crear_checklist(indice, tipo_documento))
     story.append(Spacer(1, 8*mm))
     
     story.extend(_crear_tabla_hallazgos(resultados_ia))
     story.extend(_crear_disclaimer_legal())
     
     doc.build(story)
+    if destino:
+        return destino
     buffer.seek(0)
     return buffer
 
 # --- FUNCIÓN REPORTE GENERAL (Modificada: Sin portada, con orden específico) ---
-def generar_pdf_reporte_general(lista_docs, categoria_producto, marca_producto, modelo_producto):
-    """Genera un PDF con todos los documentos, ordenado y sin portada resumen."""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=15*mm, leftMargin=15*mm, topMargin=15*mm, bottomMargin=15*mm)
-    story = []
+# Por secciones (por defecto): cada documento se renderiza como un PDF
+# independiente, en paralelo en un pool de procesos, y luego se unen con
+# PyMuPDF numerando las páginas ("Página X de N") y con un marcador por
+# documento. Las secciones se guardan en caché (services/cache_reportes.py):
+# un documento que no cambió no se vuelve a renderizar.
+#   NOPRO_REPORTE_SECCIONES=0   un solo doc.build con todo (modo anterior)
+#   NOPRO_REPORTE_WORKERS=4     procesos para renderizar (1 = en este proceso, "auto" = núcleos)
+REPORTE_POR_SECCIONES = os.getenv("NOPRO_REPORTE_SECCIONES", "1").lower() not in ("0", "false", "no")
+
+def _workers_reporte():
+    valor = os.getenv("NOPRO_REPORTE_WORKERS", "1").strip().lower()
+    if valor == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(valor))
+
+REPORTE_WORKERS = _workers_reporte()
+
+_pool_reportes = None
+_pool_workers = 0
+_LOCK_POOL = threading.Lock()
+
+def _obtener_pool_reportes(workers):
+    """Pool de procesos reutilizable entre peticiones (se crea la primera vez)."""
+    global _pool_reportes, _pool_workers
+    with _LOCK_POOL:
+        if _pool_reportes is None or _pool_workers != workers:
+            if _pool_reportes is not None:
+                _pool_reportes.shutdown(wait=False, cancel_futures=True)
+            # "spawn": la API tiene hilos vivos y hacer fork con hilos no es seguro
+            _pool_reportes = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool_reportes
 
-    # 1. FUNCIÓN DE ORDENAMIENTO PERSONALIZADO
+def cerrar_pool_reportes():
+    global _pool_reportes, _pool_workers
+    with _LOCK_POOL:
+        if _pool_reportes is not None:
+            _pool_reportes.shutdown(wait=True, cancel_futures=True)
+            _pool_reportes = None
+            _pool_workers = 0
+
+def _ordenar_documentos(lista_docs):
     # Prioridad: Ficha (1) -> Manual (2) -> Etiqueta (3) -> Otros (4)
     def get_priority(doc_item):
         nombre = doc_item['doc'].nombre.lower()
@@ -241,44 +287,174 @@ def generar_pdf_reporte_general(lista_docs, categoria_producto, marca_producto,
         if "manual" in nombre: return 2
         if "etiqueta" in nombre: return 3
         return 4
-    
-    # Ordenamos la lista antes de procesar
-    lista_docs_sorted = sorted(lista_docs, key=get_priority)
+    return sorted(lista_docs, key=get_priority)
 
-    # 2. GENERACIÓN DE SECCIONES DIRECTAS (Sin portada)
+def _tipo_documento(nombre):
+    """(tipo_key, tipo_display): la llave del catálogo de criterios y el título estético."""
+    # Misma normalización que el análisis (import aquí: los procesos del pool
+    # de secciones no la necesitan y no cargan ia_analisis)
+    from backend.services import ia_analisis
+    tipo_key = ia_analisis.normalizar_tipo_documento(nombre)
+
+    tipo_display = "Ficha Técnica"
+    if tipo_key == "Manual": tipo_display = "Manual de Usuario"
+    elif tipo_key == "Etiqueta": tipo_display = "Etiquetado"
+    return tipo_key, tipo_display
+
+def _historia_seccion(titulo, resultados, indice, tipo_key, marca_producto, modelo_producto, fecha=None):
+    """Encabezado, checklist y evidencias de un documento del reporte general."""
+    story = [_crear_header(titulo, marca_producto, modelo_producto, fecha), Spacer(1, 5*mm)]
+    story.extend(_crear_checklist(indice, tipo_key))
+    story.append(Spacer(1, 8*mm))
+    story.extend(_crear_tabla_hallazgos(resultados))
+    return story
+
+def _renderizar_seccion(seccion, ruta):
+    """Se ejecuta en un proceso del pool: escribe en `ruta` el PDF de una sección del reporte general."""
+    with artefactos.escritura_atomica(ruta) as ruta_tmp:
+        _escribir_seccion(seccion, ruta_tmp)
+    return ruta
+
+def _escribir_seccion(seccion, destino):
+    doc = SimpleDocTemplate(destino, pagesize=A4, rightMargin=15*mm, leftMargin=15*mm, topMargin=15*mm, bottomMargin=15*mm)
+    story = _historia_seccion(
+        seccion["titulo"], seccion["resultados"], seccion["indice"], seccion["tipo"],
+        seccion["marca"], seccion["modelo"], seccion["fecha"]
+    )
+    # El aviso legal va al final del reporte completo: lo lleva la última sección
+    if seccion["con_legal"]:
+        story.extend(_crear_disclaimer_legal())
+    doc.build(story)
+
+def _clave_seccion(seccion):
+    """La sección depende solo de su contenido (no del id): misma entrada -> mismo PDF."""
+    partes = {k: v for k, v in seccion.items() if k not in ("resultados", "clave")}
+    partes["resultados"] = cache_reportes.huella_analisis(seccion["resultados"])
+    partes["plantilla"] = VERSION_PLANTILLA
+    return cache_reportes.huella_analisis(partes)
+
+def _unir_secciones(rutas, titulos, destino=None):
+    """
+    Concatena las secciones (archivos), numera las páginas del total y agrega
+    un marcador por documento. Escribe en `destino` o retorna los bytes.
+    """
+    salida = fitz.open()
+    indice = []
+    for ruta, titulo in zip(rutas, titulos):
+        indice.append([1, titulo, salida.page_count + 1])
+        with fitz.open(ruta) as seccion:
+            salida.insert_pdf(seccion)
+
+    total = salida.page_count
+    for num, pagina in enumerate(salida, start=1):
+        ancho, alto = pagina.rect.width, pagina.rect.height
+        pagina.insert_textbox(
+            fitz.Rect(0, alto - 12*mm, ancho, alto - 6*mm), f"Página {num} de {total}",
+            fontsize=7, fontname="helv", color=COLOR_TEXT_SEC.rgb(), align=fitz.TEXT_ALIGN_CENTER
+        )
+    salida.set_toc(indice)
+    try:
+        if destino:
+            salida.save(destino, garbage=1, deflate=True)
+            return destino
+        return salida.tobytes(garbage=1, deflate=True)
+    finally:
+        salida.close()
+
+def planificar_reporte_general(lista_docs, categoria_producto, marca_producto, modelo_producto, fecha=None):
+    """
+    Secciones del reporte general en orden, cada una con todo lo que la
+    determina y su "clave" de caché. Es barato (no renderiza nada): el router
+    lo usa para la clave/ETag del reporte completo antes de generarlo.
+    """
+    catalogo = catalogo_criterios.obtener()
+    fecha = fecha or fecha_reporte()
+    lista_docs_sorted = _ordenar_documentos(lista_docs)
+    secciones = []
     for i, item in enumerate(lista_docs_sorted):
-        doc_obj = item['doc']
-        resultados = item['resultados']
-        nombre_lower = doc_obj.nombre.lower()
-
-        # Determinar Tipo para Lógica (Keys exactas del diccionario de criterios)
-        tipo_key = "Ficha"
-        if "manual" in nombre_lower: tipo_key = "Manual"
-        elif "etiqueta" in nombre_lower: tipo_key = "Etiqueta"
-
-        # Determinar Tipo para Display (Títulos estéticos)
-        tipo_display = "Ficha Técnica"
-        if tipo_key == "Manual": tipo_display = "Manual de Usuario"
-        elif tipo_key == "Etiqueta": tipo_display = "Etiquetado"
-
-        # Encabezado individual
-        story.append(_crear_header(f"{i+1}. {tipo_display}: {doc_obj.nombre}", marca_producto, modelo_producto))
-        story.append(Spacer(1, 5*mm))
-        
-        # Checklist
-        story.extend(_crear_checklist(resultados, categoria_producto, tipo_key))
-        story.append(Spacer(1, 8*mm))
-        
-        # Evidencias
-        story.extend(_crear_tabla_hallazgos(resultados))
-        
+        tipo_key, tipo_display = _tipo_documento(item['doc'].nombre)
+        seccion = {
+            "titulo": f"{i+1}. {tipo_display}: {item['doc'].nombre}",
+            "resultados": item['resultados'],
+            "tipo": tipo_key,
+            "marca": marca_producto,
+            "modelo": modelo_producto,
+            "fecha": fecha,
+            "indice": cumplimiento.obtener_indice(item['doc'], item['resultados'], categoria_producto, tipo_key, catalogo),
+            "con_legal": i == len(lista_docs_sorted) - 1,
+        }
+        seccion["clave"] = _clave_seccion(seccion)
+        secciones.append(seccion)
+    return secciones
+
+def clave_reporte_general(secciones):
+    """Clave (y ETag) del reporte general: las claves de sus secciones en orden."""
+    return cache_reportes.huella_analisis({"plantilla": VERSION_PLANTILLA, "secciones": [s["clave"] for s in secciones]})
+
+def _generar_por_secciones(secciones, workers, destino=None):
+    with tempfile.TemporaryDirectory(prefix="nopro-secciones-") as tmp:
+        # Las secciones se escriben directo a disco (caché o temporal), nunca pasan por memoria
+        rutas = []
+        pendientes = []
+        for i, seccion in enumerate(secciones):
+            ruta = cache_reportes.obtener_seccion(seccion["clave"])
+            if ruta is None:
+                pendientes.append(i)
+                ruta = cache_reportes.ruta_seccion(seccion["clave"]) if cache_reportes.CACHE_ACTIVA \
+                    else os.path.join(tmp, f"{i}.pdf")
+            rutas.append(ruta)
+
+        if len(pendientes) > 1 and workers > 1:
+            pool = _obtener_pool_reportes(min(workers, len(pendientes)))
+            futuros = [pool.submit(_renderizar_seccion, secciones[i], rutas[i]) for i in pendientes]
+            try:
+                for futuro in futuros:
+                    futuro.result()
+            finally:
+                for futuro in futuros:
+                    futuro.cancel()
+        else:
+            for i in pendientes:
+                _renderizar_seccion(secciones[i], rutas[i])
+        if pendientes and cache_reportes.CACHE_ACTIVA:
+            cache_reportes.desalojar_secciones()
+
+        datos = _unir_secciones(rutas, [s["titulo"] for s in secciones], destino)
+    return destino if destino else io.BytesIO(datos)
+
+def generar_pdf_reporte_general(lista_docs, categoria_producto, marca_producto, modelo_producto, por_secciones=None, workers=None, destino=None, secciones=None):
+    """
+    Genera un PDF con todos los documentos, ordenado y sin portada resumen.
+    destino: ruta donde escribir el PDF; sin destino retorna un BytesIO.
+    secciones: resultado de planificar_reporte_general (si el llamador ya lo tiene).
+    """
+    # 1. Secciones en orden: Ficha -> Manual -> Etiqueta -> Otros
+    if secciones is None:
+        secciones = planificar_reporte_general(lista_docs, categoria_producto, marca_producto, modelo_producto)
+
+    if REPORTE_POR_SECCIONES if por_secciones is None else por_secciones:
+        return _generar_por_secciones(secciones, workers or REPORTE_WORKERS, destino)
+
+    buffer = destino or io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=15*mm, leftMargin=15*mm, topMargin=15*mm, bottomMargin=15*mm)
+    story = []
+
+    # 2. GENERACIÓN DE SECCIONES DIRECTAS (Sin portada)
+    for i, seccion in enumerate(secciones):
+        story.extend(_historia_seccion(
+            seccion["titulo"], seccion["resultados"], seccion["indice"], seccion["tipo"],
+            seccion["marca"], seccion["modelo"], seccion["fecha"]
+        ))
+
         # Salto de página entre documentos (excepto después del último)
-        if i < len(lista_docs_sorted) - 1:
+        if i < len(secciones) - 1:
             story.append(PageBreak())
 
     # 3. LEGAL (Al final del reporte completo)
     story.extend(_crear_disclaimer_legal())
 
     doc.build(story)
+    if destino:
+        return destino
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
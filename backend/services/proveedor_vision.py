@@ -0,0 +1,174 @@
+import hashlib
+import io
+import math
+import os
+import random
+import time
+
+from PIL import Image
+
+from backend.services import modelos
+
+# =========================================================================
+#  PROVEEDOR DE VISIÓN EN LA NUBE (DETECCIÓN DE LOGOS)
+# =========================================================================
+# Capa entre ia_vision y Google Vision:
+#   - un solo ImageAnnotatorClient por proceso (registrado en modelos.py,
+#     se crea la primera vez y se reutiliza; crearlo abre el canal gRPC);
+#   - las imágenes se reducen y se codifican a JPEG antes de subirlas
+#     (un PNG de 200 dpi pesa varios MB);
+#   - varias imágenes viajan en una sola llamada batch_annotate_images;
+#   - cada llamada lleva un deadline (timeout) configurable.
+#
+#   NOPRO_VISION_PROVEEDOR=google | stub | ninguno
+#     "stub" responde localmente con detecciones deterministas, para
+#     pruebas de carga sin red ni credenciales.
+#
+# Un fallo del proveedor (timeout, credenciales, error de una imagen) deja
+# esas imágenes sin detecciones, pero se reporta en `errores`: un "sin
+# logos" por falla no es un resultado real y no debe guardarse en caché.
+
+PROVEEDOR = os.getenv("NOPRO_VISION_PROVEEDOR", "google").strip().lower()
+# Lado mayor (px) de la imagen enviada; los logos se reconocen bien por debajo de esto
+MAX_LADO = int(os.getenv("NOPRO_VISION_MAX_LADO", "1600"))
+CALIDAD_JPEG = int(os.getenv("NOPRO_VISION_CALIDAD_JPEG", "85"))
+# Imágenes por petición batch (la API admite hasta 16)
+TAMANO_LOTE = min(int(os.getenv("NOPRO_VISION_LOTE", "8")), 16)
+TIMEOUT_SEGUNDOS = float(os.getenv("NOPRO_VISION_TIMEOUT", "15"))
+MAX_RESULTADOS = int(os.getenv("NOPRO_VISION_MAX_RESULTADOS", "10"))
+# Latencia simulada por llamada del stub, para que las pruebas de carga se parezcan a la red
+LATENCIA_STUB_MS = float(os.getenv("NOPRO_VISION_STUB_LATENCIA_MS", "0"))
+
+ETIQUETAS_STUB = ["Samsung", "LG", "Sony", "NOM", "Energy Star", "UL"]
+
+
+def preparar_imagen(pil_image, max_lado=None, calidad=None):
+    """
+    Reduce la imagen (si hace falta) y la codifica a JPEG.
+    Retorna (bytes_jpeg, escala) donde escala = tamaño_enviado / tamaño_original;
+    las cajas que regrese el proveedor se dividen entre la escala.
+    """
+    max_lado = max_lado or MAX_LADO
+    calidad = calidad or CALIDAD_JPEG
+
+    escala = min(1.0, max_lado / float(max(pil_image.width, pil_image.height)))
+    if escala < 1.0:
+        nuevo = (max(1, round(pil_image.width * escala)), max(1, round(pil_image.height * escala)))
+        pil_image = pil_image.resize(nuevo, Image.Resampling.LANCZOS)
+
+    if pil_image.mode != "RGB":
+        pil_image = pil_image.convert("RGB")
+    buffer = io.BytesIO()
+    pil_image.save(buffer, format="JPEG", quality=calidad)
+    return buffer.getvalue(), escala
+
+
+def _deteccion(label, score, box, escala):
+    """Detección con la caja llevada a coordenadas de la imagen original (box puede ser None)."""
+    return {
+        "label": label,
+        "score": score,
+        "box": [coord / escala for coord in box] if box else None,
+        "source": "Google",
+    }
+
+
+# --- Google Vision ---------------------------------------------------------
+
+def _crear_cliente_google():
+    from google.cloud import vision
+    return vision.ImageAnnotatorClient()
+
+modelos.registrar("google_vision", _crear_cliente_google)
+
+
+def _detectar_google(preparadas, errores):
+    from google.cloud import vision
+
+    cliente = modelos.obtener("google_vision")
+    salida = []
+    for inicio in range(0, len(preparadas), TAMANO_LOTE):
+        lote = preparadas[inicio:inicio + TAMANO_LOTE]
+        peticiones = [
+            vision.AnnotateImageRequest(
+                image=vision.Image(content=contenido),
+                features=[vision.Feature(type_=vision.Feature.Type.LOGO_DETECTION, max_results=MAX_RESULTADOS)],
+            )
+            for contenido, _ in lote
+        ]
+        respuesta = cliente.batch_annotate_images(requests=peticiones, timeout=TIMEOUT_SEGUNDOS)
+
+        for (_, escala), resp in zip(lote, respuesta.responses):
+            if resp.error.message:
+                # El error es de una imagen, no del lote completo
+                print(f"❌ Error Google Vision (imagen): {resp.error.message}")
+                errores.append(resp.error.message)
+                salida.append([])
+                continue
+
+            detecciones = []
+            for logo in resp.logo_annotations:
+                vertices = logo.bounding_poly.vertices
+                box = None
+                if vertices:
+                    xs = [v.x for v in vertices]
+                    ys = [v.y for v in vertices]
+                    box = [min(xs), min(ys), max(xs), max(ys)]
+                detecciones.append(_deteccion(logo.description, logo.score, box, escala))
+            salida.append(detecciones)
+    return salida
+
+
+# --- Stub local ------------------------------------------------------------
+
+def _detectar_stub(preparadas, errores):
+    """Detecciones deterministas por contenido de la imagen, sin red."""
+    if LATENCIA_STUB_MS:
+        # Una "llamada" por lote, igual que con Google
+        time.sleep(LATENCIA_STUB_MS / 1000.0 * math.ceil(len(preparadas) / TAMANO_LOTE))
+
+    salida = []
+    for contenido, escala in preparadas:
+        semilla = hashlib.sha256(contenido).hexdigest()
+        rnd = random.Random(semilla)
+        ancho, alto = Image.open(io.BytesIO(contenido)).size
+        detecciones = []
+        for label in rnd.sample(ETIQUETAS_STUB, rnd.randint(0, 2)):
+            x1, y1 = rnd.randint(0, ancho // 2), rnd.randint(0, alto // 2)
+            box = [x1, y1, x1 + rnd.randint(20, ancho // 2), y1 + rnd.randint(20, alto // 2)]
+            detecciones.append(_deteccion(label, round(rnd.uniform(0.5, 0.99), 2), box, escala))
+        salida.append(detecciones)
+    return salida
+
+
+PROVEEDORES = {
+    "google": _detectar_google,
+    "stub": _detectar_stub,
+    "ninguno": lambda preparadas, errores: [[] for _ in preparadas],
+}
+
+
+def detectar_logos_lote(imagenes, proveedor=None, errores=None):
+    """
+    Detecta logos en una lista de imágenes PIL.
+    Retorna una lista (misma longitud y orden) de listas de detecciones
+    {label, score, box: [x1, y1, x2, y2] en coordenadas de la imagen original, source}.
+    Si el proveedor falla, las imágenes afectadas quedan sin detecciones y el
+    motivo se agrega a la lista `errores` (si se pasa).
+    """
+    errores = [] if errores is None else errores
+    proveedor = (proveedor or PROVEEDOR).lower()
+    detectar = PROVEEDORES.get(proveedor)
+    if detectar is None:
+        print(f"⚠️ Proveedor de visión desconocido '{proveedor}', se omite la detección de logos.")
+        return [[] for _ in imagenes]
+    if not imagenes:
+        return []
+
+    try:
+        preparadas = [preparar_imagen(img) for img in imagenes]
+        return detectar(preparadas, errores)
+    except Exception as e:
+        print(f"❌ Error Google Vision: {e}")
+        errores.append(str(e))
+        return [[] for _ in imagenes]
@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# =========================================================================
+#  POOL DE RENDER DE REPORTES PDF (ACOTADO)
+# =========================================================================
+# La maquetación con ReportLab es pesada en CPU. Si corriera en el
+# threadpool compartido de FastAPI, una ráfaga de reportes generales dejaría
+# sin hilos al login y al historial. Los reportes se generan aquí, en un
+# pool propio de NOPRO_RENDER_HILOS hilos con una cola de a lo sumo
+# NOPRO_RENDER_COLA_MAX trabajos esperando:
+#   - cola llena: el router responde 429 con Retry-After;
+#   - el reporte no termina en NOPRO_RENDER_ESPERA_S segundos: 202 con un
+#     id de trabajo para descargarlo después (GET /documentos/reportes-pdf/{id});
+#   - mismo reporte ya en curso (misma clave de caché): se comparte el trabajo.
+# Los aciertos de la caché de reportes no pasan por aquí.
+# Con la caché de reportes apagada el PDF es un temporal: vive lo mismo que
+# su trabajo (TTL_TRABAJOS_S), para que reintentos y descargas reanudadas
+# con Range encuentren el archivo; al vencer el trabajo se borra.
+# Profundidad de cola y tiempos de render/espera se ven en GET /estado.
+
+HILOS_RENDER = max(1, int(os.getenv("NOPRO_RENDER_HILOS", "2")))
+COLA_MAX = max(0, int(os.getenv("NOPRO_RENDER_COLA_MAX", "8")))
+ESPERA_S = float(os.getenv("NOPRO_RENDER_ESPERA_S", "20"))
+# Cuánto se conserva un trabajo terminado para que el cliente lo descargue
+TTL_TRABAJOS_S = float(os.getenv("NOPRO_RENDER_TTL_S", "600"))
+REINTENTAR_S = 5
+
+ESTADO_EN_COLA = "en_cola"
+ESTADO_PROCESANDO = "procesando"
+ESTADO_COMPLETADO = "completado"
+ESTADO_ERROR = "error"
+
+
+class RenderSaturado(RuntimeError):
+    """La cola de render está llena: el reporte no se aceptó."""
+
+
+class TrabajoRender:
+    """Un reporte enviado al pool. `futuro` entrega lo que retorne la función (ruta, temporal)."""
+
+    __slots__ = ("id_trabajo", "clave", "id_cliente", "cabeceras", "futuro", "creado", "inicio", "fin")
+
+    def __init__(self, clave, id_cliente, cabeceras):
+        self.id_trabajo = uuid.uuid4().hex
+        self.clave = clave
+        self.id_cliente = id_cliente
+        self.cabeceras = cabeceras or {}
+        self.futuro = None
+        self.creado = time.monotonic()
+        self.inicio = None
+        self.fin = None
+
+    @property
+    def estado(self):
+        if self.futuro.done():
+            return ESTADO_ERROR if self.futuro.cancelled() or self.futuro.exception() else ESTADO_COMPLETADO
+        return ESTADO_EN_COLA if self.inicio is None else ESTADO_PROCESANDO
+
+
+_EJECUTOR = ThreadPoolExecutor(max_workers=HILOS_RENDER, thread_name_prefix="render-reporte")
+_LOCK = threading.Lock()
+_TRABAJOS = {}      # id_trabajo -> TrabajoRender
+_EN_CURSO = {}      # clave -> TrabajoRender sin terminar (para compartirlo)
+_en_vuelo = 0       # aceptados y sin terminar (en cola + procesando)
+_procesando = 0
+_CONTADORES = {"enviados": 0, "compartidos": 0, "rechazados": 0, "completados": 0, "errores": 0}
+_TIEMPOS_RENDER = deque(maxlen=200)
+_TIEMPOS_ESPERA = deque(maxlen=200)
+
+
+def _borrar_temporal(trabajo):
+    if trabajo.futuro.done() and trabajo.estado == ESTADO_COMPLETADO:
+        ruta, temporal = trabajo.futuro.result()
+        if temporal:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+
+def _limpiar_vencidos(ahora):
+    """Olvida trabajos terminados hace más de TTL_TRABAJOS_S (y borra sus temporales)."""
+    for id_trabajo, trabajo in list(_TRABAJOS.items()):
+        if trabajo.fin is not None and ahora - trabajo.fin > TTL_TRABAJOS_S:
+            del _TRABAJOS[id_trabajo]
+            _borrar_temporal(trabajo)
+
+
+def _ejecutar(trabajo, funcion):
+    global _en_vuelo, _procesando
+    trabajo.inicio = time.monotonic()
+    with _LOCK:
+        _procesando += 1
+    exito = False
+    try:
+        resultado = funcion()
+        exito = True
+        return resultado
+    finally:
+        trabajo.fin = time.monotonic()
+        with _LOCK:
+            _en_vuelo -= 1
+            _procesando -= 1
+            _CONTADORES["completados" if exito else "errores"] += 1
+            _TIEMPOS_ESPERA.append(trabajo.inicio - trabajo.creado)
+            _TIEMPOS_RENDER.append(trabajo.fin - trabajo.inicio)
+            if _EN_CURSO.get(trabajo.clave) is trabajo:
+                del _EN_CURSO[trabajo.clave]
+
+
+def enviar(clave, id_cliente, funcion, cabeceras=None, compartir=True):
+    """
+    Encola funcion() (debe retornar (ruta, temporal)) y retorna su TrabajoRender.
+    compartir: reutilizar un trabajo en curso con la misma clave y cliente.
+    Lanza RenderSaturado si la cola está llena.
+    """
+    global _en_vuelo
+    with _LOCK:
+        _limpiar_vencidos(time.monotonic())
+        en_curso = _EN_CURSO.get(clave)
+        if compartir and en_curso is not None and en_curso.id_cliente == id_cliente:
+            _CONTADORES["compartidos"] += 1
+            return en_curso
+        if _en_vuelo >= HILOS_RENDER + COLA_MAX:
+            _CONTADORES["rechazados"] += 1
+            raise RenderSaturado(f"Cola de render llena ({_en_vuelo} reportes en curso)")
+
+        trabajo = TrabajoRender(clave, id_cliente, cabeceras)
+        _en_vuelo += 1
+        _CONTADORES["enviados"] += 1
+        _TRABAJOS[trabajo.id_trabajo] = trabajo
+        if compartir:
+            _EN_CURSO[clave] = trabajo
+        trabajo.futuro = _EJECUTOR.submit(_ejecutar, trabajo, funcion)
+    return trabajo
+
+
+def obtener(id_trabajo):
+    with _LOCK:
+        _limpiar_vencidos(time.monotonic())
+        return _TRABAJOS.get(id_trabajo)
+
+
+def cerrar():
+    """Al apagar la API: no se aceptan más trabajos, se descartan los que esperaban y se borran los temporales."""
+    _EJECUTOR.shutdown(wait=False, cancel_futures=True)
+    with _LOCK:
+        for trabajo in _TRABAJOS.values():
+            _borrar_temporal(trabajo)
+        _TRABAJOS.clear()
+
+
+def _resumen_ms(tiempos):
+    if not tiempos:
+        return {"p50": None, "p95": None, "max": None}
+    ordenados = sorted(tiempos)
+    return {
+        "p50": round(ordenados[len(ordenados) // 2] * 1000, 1),
+        "p95": round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))] * 1000, 1),
+        "max": round(ordenados[-1] * 1000, 1),
+    }
+
+
+def estadisticas():
+    """Resumen para GET /estado."""
+    with _LOCK:
+        datos = dict(_CONTADORES)
+        datos["en_cola"] = _en_vuelo - _procesando
+        datos["procesando"] = _procesando
+        render = list(_TIEMPOS_RENDER)
+        espera = list(_TIEMPOS_ESPERA)
+    datos["hilos"] = HILOS_RENDER
+    datos["cola_max"] = COLA_MAX
+    datos["render_ms"] = _resumen_ms(render)
+    datos["espera_ms"] = _resumen_ms(espera)
+    return datos
@@ -0,0 +1,70 @@
+import hashlib
+import os
+import re
+import tempfile
+import uuid
+
+# =========================================================================
+#  ESCRITURA DE ARCHIVOS SUBIDOS EN STREAMING
+# =========================================================================
+# En lugar de archivo.file.read() (todo el PDF en RAM), copiamos en bloques
+# acotados, calculando el SHA-256 y validando el tamaño mientras se escribe.
+# El archivo se escribe primero a un temporal en la misma carpeta y luego
+# se renombra (os.replace es atómico), con un nombre único para que dos
+# subidas con el mismo nombre no se sobrescriban.
+
+TAMANO_BLOQUE = 1024 * 1024  # 1 MiB
+MAX_SUBIDA_MB = float(os.getenv("NOPRO_MAX_SUBIDA_MB", "200"))
+
+_RE_NO_SEGURO = re.compile(r'[^A-Za-z0-9._ -]+')
+
+
+class ArchivoDemasiadoGrande(Exception):
+    """La subida superó el límite configurado (NOPRO_MAX_SUBIDA_MB)."""
+
+
+def nombre_seguro(nombre_original):
+    """Quita rutas y caracteres raros del nombre que manda el cliente."""
+    nombre = os.path.basename(nombre_original or "archivo")
+    nombre = _RE_NO_SEGURO.sub("_", nombre).strip(" .")
+    # Se recorta solo la base: la extensión (.pdf) decide qué análisis se hace
+    base, extension = os.path.splitext(nombre)
+    return (base[:100] or "archivo") + extension[:16]
+
+
+def guardar_subida(archivo, directorio, max_bytes=None):
+    """
+    Copia un UploadFile a `directorio` en bloques.
+    Retorna (ruta_final, sha256_hex, tamano_bytes).
+    Lanza ArchivoDemasiadoGrande si se excede el límite (no deja archivos a medias).
+    """
+    if max_bytes is None:
+        max_bytes = int(MAX_SUBIDA_MB * 1024 * 1024)
+
+    os.makedirs(directorio, exist_ok=True)
+    ruta_final = os.path.join(directorio, f"{uuid.uuid4().hex[:12]}_{nombre_seguro(archivo.filename)}")
+
+    h = hashlib.sha256()
+    tamano = 0
+    fd, ruta_tmp = tempfile.mkstemp(dir=directorio, prefix=".subida-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            while True:
+                bloque = archivo.file.read(TAMANO_BLOQUE)
+                if not bloque:
+                    break
+                tamano += len(bloque)
+                if tamano > max_bytes:
+                    raise ArchivoDemasiadoGrande(
+                        f"El archivo supera el límite de {max_bytes // (1024 * 1024)} MB."
+                    )
+                h.update(bloque)
+                destino.write(bloque)
+
+        os.replace(ruta_tmp, ruta_final)
+    except BaseException:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
+
+    return ruta_final, h.hexdigest(), tamano
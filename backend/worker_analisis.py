@@ -0,0 +1,55 @@
+# Worker de análisis independiente de la API.
+# Uso (desde la raíz del proyecto, con NOPRO_COLA_MODO=externo en la API):
+#   python -m backend.worker_analisis --procesos 2
+import argparse
+import multiprocessing
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from backend.database import Base, engine
+from backend.migraciones import aplicar_migraciones
+from backend.services import catalogo_criterios, cola_analisis, modelos
+
+
+def _ejecutar_worker(hilos):
+    # Cada proceso carga su catálogo de criterios y sus modelos antes de empezar a consumir la cola
+    catalogo_criterios.obtener()
+    modelos.precargar(modelos.modelos_a_precargar() or None)
+    pool = cola_analisis.PoolAnalisis(num_workers=hilos)
+    pool.iniciar()
+    pool.esperar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de la cola de análisis NOPRO")
+    parser.add_argument("--procesos", type=int, default=1, help="Procesos worker (análisis en paralelo real)")
+    parser.add_argument("--hilos", type=int, default=1, help="Hilos por proceso")
+    args = parser.parse_args()
+
+    # Validamos el catálogo antes de levantar procesos: si es inválido no arranca ninguno
+    catalogo_criterios.cargar()
+    Base.metadata.create_all(bind=engine)
+    aplicar_migraciones(engine)
+    # Trabajos que quedaron "procesando" de un worker que murió o se apagó a medias
+    cola_analisis.liberar_abandonados()
+    # Las conexiones abiertas no deben heredarse a los procesos hijos
+    engine.dispose()
+
+    if args.procesos == 1:
+        _ejecutar_worker(args.hilos)
+        return
+
+    procesos = [
+        multiprocessing.Process(target=_ejecutar_worker, args=(args.hilos,), name=f"worker-analisis-{i+1}")
+        for i in range(args.procesos)
+    ]
+    for p in procesos:
+        p.start()
+    print(f"🚀 {args.procesos} procesos worker de análisis en ejecución.")
+    for p in procesos:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
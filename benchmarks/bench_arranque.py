@@ -0,0 +1,57 @@
+# benchmarks/bench_arranque.py
+# Desglose del tiempo de arranque: cada import se mide en un proceso nuevo
+# (sin caché de módulos) y después se mide la carga bajo demanda de cada modelo.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_arranque
+import subprocess
+import sys
+
+MODULOS = [
+    "backend.services.ia_vision",
+    "backend.services.ia_analisis",
+    "backend.services.pdf_report",
+    "backend.routers.documentos",
+    "backend.routers.productos",
+]
+
+SCRIPT_IMPORT = "import time; t=time.perf_counter(); import {modulo}; print(time.perf_counter()-t)"
+
+SCRIPT_MODELOS = """
+import time
+from backend.services import ia_analisis, modelos
+for nombre in list(modelos.estado()):
+    t = time.perf_counter()
+    try:
+        modelos.obtener(nombre)
+        print(nombre, time.perf_counter() - t)
+    except Exception as e:
+        print(nombre, "error", type(e).__name__)
+"""
+
+
+def main():
+    print("Import en frío (proceso nuevo por módulo):")
+    for modulo in MODULOS:
+        salida = subprocess.run(
+            [sys.executable, "-c", SCRIPT_IMPORT.format(modulo=modulo)],
+            capture_output=True, text=True
+        )
+        lineas = salida.stdout.strip().splitlines()
+        if salida.returncode == 0 and lineas:
+            print(f"  {modulo:36} {float(lineas[-1]) * 1000:>8.0f} ms")
+        else:
+            print(f"  {modulo:36}    error: {salida.stderr.strip().splitlines()[-1:]}")
+
+    print("\nCarga bajo demanda (primer uso / precarga):")
+    salida = subprocess.run([sys.executable, "-c", SCRIPT_MODELOS], capture_output=True, text=True)
+    for linea in salida.stdout.strip().splitlines():
+        partes = linea.split()
+        if len(partes) == 2 and partes[0] in ("spacy", "yolo"):
+            print(f"  {partes[0]:36} {float(partes[1]) * 1000:>8.0f} ms")
+        elif len(partes) == 3 and partes[1] == "error":
+            print(f"  {partes[0]:36}    error: {partes[2]}")
+
+
+if __name__ == "__main__":
+    main()
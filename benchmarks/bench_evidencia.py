@@ -0,0 +1,102 @@
+# benchmarks/bench_evidencia.py
+# Micro-benchmark de la imagen de evidencia de ia_vision:
+#   antes:   pixmap -> np.frombuffer/reshape -> Image.fromarray, dibujar sobre
+#            la página de 200 dpi, LANCZOS a 800 px, JPEG y base64 (str)
+#   después: pixmap RGB -> Image.frombuffer, reducir primero, dibujar sobre la
+#            imagen chica, JPEG/WebP y bytes crudos
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_evidencia [etiqueta.pdf] [--repeticiones 10]
+import argparse
+import base64
+import io
+import os
+import time
+
+import fitz
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from backend.services import ia_vision
+
+PDF_POR_DEFECTO = os.path.join("backend", "uploads", "WhatsApp Image 2025-11-14 at 10.34.03 PM.pdf")
+
+# Cajas de ejemplo (coordenadas de la página a 200 dpi)
+OBJETOS = [
+    {"label": "NOM", "score": 0.91, "box": [120, 200, 520, 480], "source": "YOLO"},
+    {"label": "Samsung", "score": 0.88, "box": [700, 150, 1300, 400], "source": "Google"},
+    {"label": "doble aislamiento", "score": 0.77, "box": [300, 900, 600, 1200], "source": "YOLO"},
+]
+
+
+def antes(pix):
+    """Copia fiel del camino anterior (desde el pixmap ya renderizado)."""
+    if pix.alpha:
+        img_data = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, 4))
+        pil_image = Image.fromarray(img_data[:, :, :3], 'RGB')
+    else:
+        img_data = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, 3))
+        pil_image = Image.fromarray(img_data, 'RGB')
+
+    draw = ImageDraw.Draw(pil_image)
+    try:
+        font = ImageFont.truetype("arial.ttf", 30)
+    except OSError:
+        font = ImageFont.load_default()
+    for obj in OBJETOS:
+        box = obj["box"]
+        color = ia_vision.get_color_for_label(obj["label"])
+        draw.rectangle(box, outline=color, width=5)
+        text = f"{obj['label']} {obj['score']:.2f}"
+        text_bbox = draw.textbbox((box[0], box[1]), text, font=font)
+        text_y = box[1] - 35 if box[1] > 35 else box[1]
+        draw.rectangle([text_bbox[0]-5, text_y, text_bbox[2]+5, text_y+35], fill=color)
+        draw.text((text_bbox[0], text_y), text, fill="white", font=font)
+
+    base_width = 800
+    w_percent = (base_width / float(pil_image.width))
+    h_size = int((float(pil_image.height) * float(w_percent)))
+    pil_image = pil_image.resize((base_width, h_size), Image.Resampling.LANCZOS)
+    buffered = io.BytesIO()
+    pil_image.save(buffered, format="JPEG", quality=85)
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+
+def despues(pix, formato):
+    pil_image = ia_vision._pixmap_a_pil(pix)
+    datos, _ = ia_vision.renderizar_evidencia(pil_image, OBJETOS, formato=formato)
+    return datos
+
+
+def medir(nombre, funcion, repeticiones):
+    funcion()  # calentamiento
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        salida = funcion()
+    dt = (time.perf_counter() - t0) / repeticiones
+    print(f"{nombre:22} {dt * 1000:>8.1f} ms   salida={len(salida) / 1024:>7.1f} KB ({type(salida).__name__})")
+    return dt
+
+
+def main(ruta_pdf, repeticiones):
+    # El render a 200 dpi es igual en ambos caminos; se mide aparte
+    with fitz.open(ruta_pdf) as doc:
+        page = doc.load_page(0)
+        t0 = time.perf_counter()
+        pix = page.get_pixmap(dpi=200, alpha=False)
+        t_render = time.perf_counter() - t0
+    print(f"📄 {os.path.basename(ruta_pdf)}  {pix.width}x{pix.height}  render={t_render * 1000:.1f} ms  "
+          f"({repeticiones} repeticiones, sin contar el render)")
+
+    base = medir("antes (jpeg+base64)", lambda: antes(pix), repeticiones)
+    for formato in ("jpeg", "webp"):
+        dt = medir(f"después ({formato}, bytes)", lambda: despues(pix, formato), repeticiones)
+        print(f"{'':22} speedup {base / dt:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark de la imagen de evidencia")
+    parser.add_argument("pdf", nargs="?", default=PDF_POR_DEFECTO)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+    main(args.pdf, args.repeticiones)
@@ -0,0 +1,56 @@
+# benchmarks/bench_extraccion.py
+# Tiempo por página y memoria pico de la extracción de texto:
+#   - antes:   extraer_documento_spacy (pdfplumber + nlp() por página, Docs en memoria)
+#   - después: extraer_paginas_texto   (pdfplumber + normalización, en streaming)
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_extraccion [manual_grande.pdf]
+import os
+import sys
+import time
+import tracemalloc
+
+from backend.services import ia_analisis
+
+MANUAL_POR_DEFECTO = os.path.join("backend", "uploads", "manual laptop.pdf")
+
+
+def medir(nombre, funcion):
+    # 1) Tiempo sin tracemalloc (tracemalloc distorsiona mucho los tiempos)
+    t0 = time.perf_counter()
+    paginas = funcion()
+    dt = time.perf_counter() - t0
+
+    # 2) Memoria pico en una segunda pasada
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    por_pagina = dt / max(paginas, 1) * 1000
+    print(f"{nombre:32} páginas={paginas:>4}  total={dt:>7.2f}s  "
+          f"por página={por_pagina:>7.2f}ms  memoria pico={pico / 1024 / 1024:>7.1f} MB")
+
+
+def antes(ruta_pdf):
+    # Se retienen los Docs igual que en el flujo previo de analizar_documento
+    docs = ia_analisis.extraer_documento_spacy(ruta_pdf)
+    return len(docs)
+
+
+def despues(ruta_pdf):
+    # El consumidor procesa cada página y la descarta
+    total = 0
+    for _ in ia_analisis.extraer_paginas_texto(ruta_pdf):
+        total += 1
+    return total
+
+
+def main(ruta_pdf):
+    print(f"📄 {ruta_pdf}")
+    medir("antes (spaCy por página)", lambda: antes(ruta_pdf))
+    medir("después (texto ligero)", lambda: despues(ruta_pdf))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else MANUAL_POR_DEFECTO)
@@ -0,0 +1,50 @@
+# benchmarks/bench_extraccion_paralela.py
+# Escalamiento de la extracción de texto con el número de procesos
+# (ia_analisis.extraer_paginas_texto con workers = 1, 2, 4, ...).
+# Verifica además que el resultado sea idéntico al secuencial.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_extraccion_paralela [manual_grande.pdf] [--max-workers N]
+import argparse
+import os
+import time
+
+from backend.services import ia_analisis
+
+MANUAL_POR_DEFECTO = os.path.join("backend", "uploads", "manual laptop.pdf")
+
+
+def extraer(ruta_pdf, workers):
+    return [(p["pagina"], p["texto"]) for p in ia_analisis.extraer_paginas_texto(ruta_pdf, workers=workers)]
+
+
+def main(ruta_pdf, max_workers):
+    # Forzamos el modo paralelo aunque el PDF sea chico
+    ia_analisis.EXTRACCION_MIN_PAGINAS = 1
+    print(f"📄 {ruta_pdf}  (núcleos disponibles: {os.cpu_count()})")
+
+    t0 = time.perf_counter()
+    referencia = extraer(ruta_pdf, 1)
+    base = time.perf_counter() - t0
+    print(f"workers= 1  total={base:>7.2f}s  speedup= 1.00x  páginas con texto={len(referencia)}")
+
+    workers = 2
+    while workers <= max_workers:
+        # Calentamos el pool (arranque de procesos + imports) fuera de la medición
+        extraer(ruta_pdf, workers)
+        t0 = time.perf_counter()
+        paginas = extraer(ruta_pdf, workers)
+        dt = time.perf_counter() - t0
+        igual = "OK" if paginas == referencia else "DIFERENTE"
+        print(f"workers={workers:>2}  total={dt:>7.2f}s  speedup={base / dt:>5.2f}x  resultado={igual}")
+        workers *= 2
+
+    ia_analisis.cerrar_pool_extraccion()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escalamiento de la extracción paralela de páginas")
+    parser.add_argument("pdf", nargs="?", default=MANUAL_POR_DEFECTO)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    main(args.pdf, max(args.max_workers, 2))
@@ -0,0 +1,91 @@
+# benchmarks/bench_extractores.py
+# Compara los backends de extracción de texto (services/extraccion_texto.py):
+#   - hallazgos: corre el motor de criterios de TODAS las combinaciones
+#     categoría/tipo sobre el texto de cada backend y reporta diferencias
+#     en (Norma, Categoria, Pagina) respecto al de referencia (pdfplumber).
+#   - throughput: páginas por segundo de cada backend.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_extractores [carpeta_o_pdfs ...]
+import glob
+import os
+import sys
+import time
+
+from backend.services import catalogo_criterios, extraccion_texto, ia_analisis
+
+CORPUS_POR_DEFECTO = os.path.join("backend", "uploads")
+REFERENCIA = "pdfplumber"
+
+
+def listar_pdfs(rutas):
+    pdfs = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            pdfs.extend(sorted(glob.glob(os.path.join(ruta, "*.pdf"))))
+        else:
+            pdfs.append(ruta)
+    return pdfs
+
+
+def extraer(ruta_pdf, extractor):
+    return [
+        (p["pagina"], p["texto"])
+        for p in ia_analisis.extraer_paginas_texto(ruta_pdf, workers=1, extractor=extractor)
+    ]
+
+
+def hallazgos(paginas):
+    """{(categoria, tipo): set((norma, categoria_criterio, pagina))} para todas las combinaciones."""
+    salida = {}
+    for categoria, tipos in catalogo_criterios.obtener().productos.items():
+        for tipo in tipos:
+            conjunto = ia_analisis.obtener_conjunto_criterios(categoria, tipo)
+            salida[(categoria, tipo)] = {
+                (criterio.norma, criterio.categoria, pagina)
+                for criterio, pagina, _, _ in conjunto.buscar(paginas)
+            }
+    return salida
+
+
+def main(rutas):
+    pdfs = listar_pdfs(rutas)
+    backends = list(extraccion_texto.EXTRACTORES)
+    tiempos = {b: 0.0 for b in backends}
+    total_paginas = 0
+    docs_diferentes = 0
+
+    for ruta_pdf in pdfs:
+        num_paginas = extraccion_texto.contar_paginas(ruta_pdf, REFERENCIA)
+        total_paginas += num_paginas
+        por_backend = {}
+        for backend in backends:
+            t0 = time.perf_counter()
+            paginas = extraer(ruta_pdf, backend)
+            tiempos[backend] += time.perf_counter() - t0
+            por_backend[backend] = hallazgos(paginas)
+
+        diferencias = []
+        for backend in backends:
+            if backend == REFERENCIA:
+                continue
+            for combinacion, ref in por_backend[REFERENCIA].items():
+                otro = por_backend[backend][combinacion]
+                if ref != otro:
+                    diferencias.append((backend, combinacion, ref - otro, otro - ref))
+
+        estado = "IGUAL" if not diferencias else f"{len(diferencias)} combinaciones distintas"
+        print(f"{os.path.basename(ruta_pdf)[:45]:45} páginas={num_paginas:>4}  {estado}")
+        for backend, (categoria, tipo), faltan, sobran in diferencias:
+            print(f"    {backend} {categoria}/{tipo}: solo en {REFERENCIA}={sorted(faltan)}  solo en {backend}={sorted(sobran)}")
+        docs_diferentes += bool(diferencias)
+
+    print()
+    print(f"Documentos: {len(pdfs)}  páginas: {total_paginas}  con diferencias: {docs_diferentes}")
+    for backend in backends:
+        pps = total_paginas / tiempos[backend] if tiempos[backend] else float("inf")
+        print(f"{backend:12} total={tiempos[backend]:>7.2f}s  páginas/s={pps:>8.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or [CORPUS_POR_DEFECTO])
@@ -0,0 +1,96 @@
+# benchmarks/bench_motor_criterios.py
+# Compara el ciclo anidado original (patrones x páginas) contra el motor
+# precompilado de motor_criterios y verifica que ambos den los mismos hallazgos.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_motor_criterios [archivo.pdf ...]
+import glob
+import os
+import re
+import sys
+import time
+
+from backend.services import catalogo_criterios, motor_criterios
+from backend.services.ia_analisis import crear_hallazgo_texto, extraer_paginas_texto
+
+REPETICIONES = 3
+
+
+def leer_paginas(ruta_pdf):
+    """Texto normalizado por página, tal como lo recibe analizar_documento."""
+    return [(p["pagina"], p["texto"]) for p in extraer_paginas_texto(ruta_pdf)]
+
+
+def ciclo_original(normas_a_buscar, paginas):
+    """Copia fiel del ciclo anidado previo: compila y recorre páginas por patrón."""
+    resultados = []
+    for norma, categorias in normas_a_buscar.items():
+        for categoria, lista_patrones in categorias.items():
+            for patron_str in lista_patrones:
+                try:
+                    regex_compilado = re.compile(patron_str, re.IGNORECASE)
+                except re.error:
+                    continue
+                for numero, texto in paginas:
+                    match = regex_compilado.search(texto)
+                    if match:
+                        resultados.append(crear_hallazgo_texto(norma, categoria, patron_str, numero, texto, match))
+                        break
+    return resultados
+
+
+def ciclo_motor(conjunto, paginas):
+    return [
+        crear_hallazgo_texto(c.norma, c.categoria, c.patron, pagina, texto, match)
+        for c, pagina, texto, match in conjunto.buscar(paginas)
+    ]
+
+
+def medir(funcion, *args):
+    mejor = None
+    resultado = None
+    for _ in range(REPETICIONES):
+        t0 = time.perf_counter()
+        resultado = funcion(*args)
+        dt = time.perf_counter() - t0
+        mejor = dt if mejor is None else min(mejor, dt)
+    return mejor, resultado
+
+
+def main(rutas):
+    documentos = []
+    for ruta in rutas:
+        paginas = leer_paginas(ruta)
+        if paginas:
+            documentos.append((os.path.basename(ruta), paginas))
+
+    print(f"{'Documento':40} {'Criterios':18} {'Pág.':>5} {'Original':>10} {'Motor':>10} {'x':>6}  Igual")
+    total_orig = total_motor = 0.0
+    todo_igual = True
+
+    for nombre, paginas in documentos:
+        for categoria, tipos in catalogo_criterios.obtener().productos.items():
+            for tipo_doc, normas in tipos.items():
+                t0 = time.perf_counter()
+                conjunto = motor_criterios.compilar_conjunto(normas)
+                t_compilar = time.perf_counter() - t0
+
+                t_orig, r_orig = medir(ciclo_original, normas, paginas)
+                t_motor, r_motor = medir(ciclo_motor, conjunto, paginas)
+                igual = r_orig == r_motor
+                todo_igual = todo_igual and igual
+                total_orig += t_orig
+                total_motor += t_motor
+
+                print(f"{nombre[:40]:40} {categoria + '/' + tipo_doc:18} {len(paginas):>5} "
+                      f"{t_orig * 1000:>8.1f}ms {t_motor * 1000:>8.1f}ms {t_orig / max(t_motor, 1e-9):>5.1f}x  "
+                      f"{'✅' if igual else '❌'}  (compilación única: {t_compilar * 1000:.1f}ms)")
+
+    print(f"\nTOTAL original: {total_orig:.3f}s | motor: {total_motor:.3f}s | "
+          f"aceleración: {total_orig / max(total_motor, 1e-9):.1f}x | resultados idénticos: {todo_igual}")
+    return 0 if todo_igual else 1
+
+
+if __name__ == "__main__":
+    rutas = sys.argv[1:] or sorted(glob.glob(os.path.join("backend", "uploads", "*.pdf")))
+    sys.exit(main(rutas))
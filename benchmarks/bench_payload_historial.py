@@ -0,0 +1,49 @@
+# benchmarks/bench_payload_historial.py
+# Tamaño de la respuesta de /productos/me para un cliente, con las imágenes
+# embebidas en base64 (antes) y con referencias al almacén (después).
+# No escribe nada en la BD ni en el almacén.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_payload_historial <id_cliente>
+import sys
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from backend import crud, schemas
+from backend.database import SessionLocal
+from backend.services import artefactos
+
+
+def serializar(productos):
+    t0 = time.perf_counter()
+    cuerpo = "[" + ",".join(schemas.ProductoOut.model_validate(p).model_dump_json() for p in productos) + "]"
+    return len(cuerpo.encode("utf-8")), time.perf_counter() - t0
+
+
+def main(id_cliente):
+    db = SessionLocal()
+    try:
+        productos = crud.get_productos_by_cliente(db, cliente_id=id_cliente)
+        antes, t_antes = serializar(productos)
+
+        # Simulación en memoria: mismas filas con las imágenes externalizadas
+        for p in productos:
+            for d in p.documentos:
+                if d.analisis_ia:
+                    d.analisis_ia, _ = artefactos.externalizar_resultados(d.analisis_ia, escribir=False)
+        despues, t_despues = serializar(productos)
+        db.rollback()
+    finally:
+        db.close()
+
+    print(f"/productos/me cliente {id_cliente}: {len(productos)} productos")
+    print(f"  antes:   {antes / 1024:>10.1f} KB  (serialización {t_antes * 1000:.1f} ms)")
+    print(f"  después: {despues / 1024:>10.1f} KB  (serialización {t_despues * 1000:.1f} ms)")
+    if antes:
+        print(f"  reducción: {100 * (1 - despues / antes):.1f}%")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]))
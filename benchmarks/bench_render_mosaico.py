@@ -0,0 +1,66 @@
+# benchmarks/bench_render_mosaico.py
+# Costo en memoria y latencia de cada política de render/inferencia de ia_vision:
+#   fijo-200      -> 200 dpi fijos, una pasada de YOLO (comportamiento anterior)
+#   auto          -> DPI según tamaño de página (NOPRO_RENDER_DPI=auto)
+#   auto+mosaico  -> DPI automático + recortes con solape y fusión de cajas
+# La memoria se reporta como bytes del pixmap RGB (lo que domina el pico) y
+# como número de entradas que procesa YOLO.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_render_mosaico [pdf ...] [--modelo ruta.pt]
+import argparse
+import glob
+import os
+import time
+
+from backend.services import ia_vision, modelos
+from benchmarks.bench_yolo_lotes import cargar_modelo
+
+MODOS = [
+    ("fijo-200", 200, False),
+    ("auto", "auto", False),
+    ("auto+mosaico", "auto", True),
+]
+
+
+def medir(ruta_pdf, dpi, mosaico):
+    t0 = time.perf_counter()
+    paginas = list(ia_vision.renderizar_paginas(ruta_pdf, max_paginas=1, dpi=dpi))
+    t_render = time.perf_counter() - t0
+    _, imagen = paginas[0]
+
+    entradas = 1 + (len(ia_vision.recortes_mosaico(imagen.width, imagen.height)) if mosaico else 0)
+    t0 = time.perf_counter()
+    objetos, _ = ia_vision.detectar_yolo_lote([imagen], mosaico=mosaico)[0]
+    t_yolo = time.perf_counter() - t0
+    return {
+        "px": f"{imagen.width}x{imagen.height}",
+        "mb": imagen.width * imagen.height * 3 / 1024 / 1024,
+        "render": t_render,
+        "yolo": t_yolo,
+        "entradas": entradas,
+        "detecciones": len(objetos),
+    }
+
+
+def main(pdfs, ruta_modelo):
+    modelo = cargar_modelo(ruta_modelo)
+    modelos.registrar("yolo", lambda: modelo)
+    # Calentamiento de torch
+    medir(pdfs[0], 72, False)
+
+    for ruta_pdf in pdfs:
+        print(f"📄 {os.path.basename(ruta_pdf)}")
+        for nombre, dpi, mosaico in MODOS:
+            r = medir(ruta_pdf, dpi, mosaico)
+            print(f"   {nombre:13} {r['px']:>10}  pixmap={r['mb']:>6.1f} MB  render={r['render'] * 1000:>6.0f} ms  "
+                  f"yolo={r['yolo'] * 1000:>6.0f} ms ({r['entradas']:>2} entradas)  detecciones={r['detecciones']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memoria y latencia por política de render/mosaico")
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--modelo", default=None)
+    args = parser.parse_args()
+    pdfs = args.pdfs or sorted(glob.glob(os.path.join("backend", "uploads", "*.pdf")))[:4]
+    main(pdfs, args.modelo)
@@ -0,0 +1,111 @@
+# benchmarks/bench_reporte_general.py
+# Reporte general (pdf_report.generar_pdf_reporte_general) con 1, 10 y 50
+# documentos:
+#   completo:        una sola historia y un doc.build (modo anterior)
+#   secciones frío:  cada documento por separado, sin caché, con N procesos
+#   secciones caché: todas las secciones ya renderizadas (solo la unión con PyMuPDF)
+#   un cambio:       caché caliente salvo un documento con análisis nuevo
+#
+# Los documentos son sintéticos (hallazgos de texto y una imagen de evidencia
+# cada uno); la caché y las imágenes van a un directorio temporal.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_reporte_general [--documentos 1 10 50] [--workers 4] [--hallazgos 12]
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+
+_TMP = tempfile.mkdtemp(prefix="bench-reporte-")
+os.environ["NOPRO_ARTEFACTOS_DIR"] = _TMP
+
+import fitz
+from PIL import Image, ImageDraw
+
+from backend.services import artefactos, cache_reportes, catalogo_criterios, pdf_report
+
+TIPOS = ["Ficha técnica", "Manual de usuario", "Etiqueta"]
+
+
+def _imagen_evidencia(i):
+    imagen = Image.new("RGB", (800, 500), (240, 240, 240))
+    dibujo = ImageDraw.Draw(imagen)
+    dibujo.rectangle([40 + i % 50, 40, 500, 300], outline=(220, 38, 38), width=5)
+    dibujo.text((60, 320), f"Evidencia {i}", fill=(30, 41, 59))
+    buffer = io.BytesIO()
+    imagen.save(buffer, "JPEG", quality=85)
+    return artefactos.guardar_imagen(buffer.getvalue(), "jpg")
+
+
+def documentos_sinteticos(n, hallazgos, categoria="Laptop"):
+    catalogo = catalogo_criterios.obtener()
+    lista = []
+    for i in range(n):
+        nombre = f"{TIPOS[i % len(TIPOS)]} {i + 1}"
+        tipo, _ = pdf_report._tipo_documento(nombre)
+        requisitos = [(norma, req) for norma, reqs in catalogo.criterios(categoria, tipo).items() for req in reqs]
+        resultados = []
+        for j in range(hallazgos):
+            norma, req = requisitos[j % len(requisitos)] if requisitos else ("NOM-024-SCFI-2013", "Información comercial")
+            resultados.append({
+                "Norma": norma, "Categoria": req, "Hallazgo": f"patron {j}", "Pagina": j + 1,
+                "Contexto": f"... texto de contexto del documento {i + 1}, hallazgo {j + 1}, "
+                            "con suficiente longitud para ocupar un par de líneas en la tabla ...",
+            })
+        resultados[0].update(artefactos.referencia_evidencia(_imagen_evidencia(i)))
+        lista.append({"doc": SimpleNamespace(nombre=nombre), "resultados": resultados})
+    return lista
+
+
+def medir(funcion):
+    t0 = time.perf_counter()
+    buffer = funcion()
+    segundos = time.perf_counter() - t0
+    with fitz.open(stream=buffer.getvalue(), filetype="pdf") as pdf:
+        paginas = pdf.page_count
+    return segundos, paginas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del reporte general por secciones")
+    parser.add_argument("--documentos", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--hallazgos", type=int, default=12, help="Hallazgos por documento")
+    args = parser.parse_args()
+
+    print(f"CPU: {os.cpu_count()} | workers: {args.workers} | hallazgos por documento: {args.hallazgos}\n")
+    print(f"{'Docs':>5} {'Págs':>5} {'Completo':>10} {'Secc. 1p':>10} {f'Secc. {args.workers}p':>10} "
+          f"{'Caché':>10} {'1 cambio':>10}")
+
+    def generar(lista, **kwargs):
+        return lambda: pdf_report.generar_pdf_reporte_general(lista, "Laptop", "Marca", "Modelo", **kwargs)
+
+    try:
+        # Calentamiento: arranque del pool (spawn) y fuentes de ReportLab
+        calentar = documentos_sinteticos(2, 2)
+        generar(calentar, por_secciones=True, workers=args.workers)()
+        for n in args.documentos:
+            lista = documentos_sinteticos(n, args.hallazgos)
+            completo, paginas = medir(generar(lista, por_secciones=False))
+
+            shutil.rmtree(cache_reportes.SECCIONES_DIR, ignore_errors=True)
+            uno, paginas_secciones = medir(generar(lista, por_secciones=True, workers=1))
+            shutil.rmtree(cache_reportes.SECCIONES_DIR, ignore_errors=True)
+            paralelo, _ = medir(generar(lista, por_secciones=True, workers=args.workers))
+            cache, _ = medir(generar(lista, por_secciones=True, workers=args.workers))
+
+            lista[-1]["resultados"] = lista[-1]["resultados"] + [dict(lista[-1]["resultados"][-1], Pagina=999)]
+            cambio, _ = medir(generar(lista, por_secciones=True, workers=args.workers))
+
+            assert paginas == paginas_secciones, (paginas, paginas_secciones)
+            print(f"{n:>5} {paginas:>5} {completo:>9.2f}s {uno:>9.2f}s {paralelo:>9.2f}s {cache:>9.3f}s {cambio:>9.3f}s")
+    finally:
+        pdf_report.cerrar_pool_reportes()
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
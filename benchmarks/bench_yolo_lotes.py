@@ -0,0 +1,55 @@
+# benchmarks/bench_yolo_lotes.py
+# Throughput de YOLO en CPU según el tamaño de lote (imágenes por pasada),
+# usando las páginas renderizadas de un PDF igual que ia_vision.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_yolo_lotes [etiqueta.pdf] [--paginas 8] [--lotes 1,2,4,8] [--modelo ruta.pt]
+#
+# Sin --modelo se usa backend/models/best.pt; si no existe se construye
+# yolov8n desde su .yaml (pesos aleatorios: sirve para medir tiempos, no detecciones).
+import argparse
+import os
+import time
+
+from backend.services import ia_vision, modelos
+
+PDF_POR_DEFECTO = os.path.join("backend", "uploads", "A7GV ES.pdf")
+
+
+def cargar_modelo(ruta):
+    from ultralytics import YOLO
+    if ruta:
+        return YOLO(ruta)
+    if os.path.exists(ia_vision.MODEL_PATH):
+        return YOLO(ia_vision.MODEL_PATH)
+    print("⚠️ No hay best.pt: se usa yolov8n.yaml con pesos aleatorios (solo tiempos).")
+    return YOLO("yolov8n.yaml")
+
+
+def main(ruta_pdf, num_paginas, lotes, ruta_modelo):
+    modelo = cargar_modelo(ruta_modelo)
+    modelos.registrar("yolo", lambda: modelo)
+
+    imagenes = [img for _, img in ia_vision.renderizar_paginas(ruta_pdf, num_paginas)]
+    print(f"📄 {ruta_pdf}: {len(imagenes)} páginas a {ia_vision.DPI_ETIQUETA} dpi")
+
+    # Calentamiento (primera pasada: inicialización de torch)
+    ia_vision.detectar_yolo_lote(imagenes[:1])
+
+    for tamano in lotes:
+        t0 = time.perf_counter()
+        for inicio in range(0, len(imagenes), tamano):
+            ia_vision.detectar_yolo_lote(imagenes[inicio:inicio + tamano])
+        dt = time.perf_counter() - t0
+        print(f"lote={tamano:>2}  total={dt:>6.2f}s  páginas/s={len(imagenes) / dt:>6.2f}  "
+              f"ms/página={dt / len(imagenes) * 1000:>7.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput de YOLO por tamaño de lote")
+    parser.add_argument("pdf", nargs="?", default=PDF_POR_DEFECTO)
+    parser.add_argument("--paginas", type=int, default=8)
+    parser.add_argument("--lotes", default="1,2,4,8")
+    parser.add_argument("--modelo", default=None)
+    args = parser.parse_args()
+    main(args.pdf, args.paginas, [int(x) for x in args.lotes.split(",")], args.modelo)
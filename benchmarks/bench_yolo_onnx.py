@@ -0,0 +1,101 @@
+# benchmarks/bench_yolo_onnx.py
+# Paridad y latencia del detector YOLO según el backend de inferencia:
+#   torch (models/best.pt)  vs  onnx (best.onnx)  vs  onnx-int8 (best.int8.onnx)
+# Paridad: sobre páginas reales de etiquetas, qué fracción de las cajas de
+# torch encuentra cada backend (misma clase, IoU >= 0.5), diferencia media
+# de confianza y si coincide el conjunto de clases que reporta ia_vision.
+#
+# Requiere haber corrido antes: python -m backend.exportar_modelo --int8
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_yolo_onnx [pdf ...] [--paginas 12] [--conf 0.25] [--repeticiones 3]
+import argparse
+import glob
+import os
+import time
+
+from backend.services import ia_vision
+
+REFERENCIA = "torch"
+
+
+def iou(a, b):
+    ancho = min(a[2], b[2]) - max(a[0], b[0])
+    alto = min(a[3], b[3]) - max(a[1], b[1])
+    if ancho <= 0 or alto <= 0:
+        return 0.0
+    inter = ancho * alto
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+def emparejar(referencia, otras, umbral=0.5):
+    """Retorna (encontradas, total_referencia, [diferencias de confianza])."""
+    libres = list(otras)
+    encontradas = 0
+    difs = []
+    for cls_id, conf, box in referencia:
+        mejor = max(
+            ((iou(box, o[2]), o) for o in libres if o[0] == cls_id),
+            key=lambda par: par[0], default=(0.0, None)
+        )
+        if mejor[0] >= umbral:
+            encontradas += 1
+            difs.append(abs(conf - mejor[1][1]))
+            libres.remove(mejor[1])
+    return encontradas, len(referencia), difs
+
+
+def detectar(modelo, imagenes, conf):
+    resultados = modelo(imagenes, conf=conf, verbose=False)
+    return [ia_vision._cajas_yolo(r) for r in resultados]
+
+
+def main(pdfs, num_paginas, conf, repeticiones):
+    imagenes = []
+    for ruta_pdf in pdfs:
+        imagenes.extend(img for _, img in ia_vision.renderizar_paginas(ruta_pdf, max_paginas=2))
+        if len(imagenes) >= num_paginas:
+            break
+    imagenes = imagenes[:num_paginas]
+    print(f"🖼️ {len(imagenes)} páginas de etiquetas, conf >= {conf}")
+
+    backends = [b for b, ruta in ia_vision.RUTAS_BACKEND_YOLO.items() if os.path.exists(ruta)]
+    if REFERENCIA not in backends:
+        raise SystemExit(f"❌ No existe {ia_vision.MODEL_PATH}")
+
+    cajas = {}
+    latencias = {}
+    for backend in backends:
+        modelo = ia_vision._cargar_yolo(backend)
+        detectar(modelo, imagenes[:1], conf)  # calentamiento
+        t0 = time.perf_counter()
+        for _ in range(repeticiones):
+            cajas[backend] = [detectar(modelo, [img], conf)[0] for img in imagenes]
+        latencias[backend] = (time.perf_counter() - t0) / (repeticiones * len(imagenes))
+
+    print()
+    print(f"{'backend':10} {'ms/página':>10} {'speedup':>8} {'recall':>8} {'Δconf':>7} {'clases=':>8}")
+    for backend in backends:
+        encontradas = total = clases_iguales = 0
+        difs = []
+        for ref, otra in zip(cajas[REFERENCIA], cajas[backend]):
+            e, t, d = emparejar(ref, otra)
+            encontradas += e
+            total += t
+            difs.extend(d)
+            clases_iguales += {c for c, _, _ in ref} == {c for c, _, _ in otra}
+        recall = encontradas / total if total else 1.0
+        dconf = sum(difs) / len(difs) if difs else 0.0
+        print(f"{backend:10} {latencias[backend] * 1000:>10.1f} {latencias[REFERENCIA] / latencias[backend]:>7.2f}x "
+              f"{recall:>8.3f} {dconf:>7.3f} {clases_iguales:>4}/{len(imagenes)}")
+    print(f"\n(recall sobre {sum(len(c) for c in cajas[REFERENCIA])} cajas de {REFERENCIA})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paridad y latencia torch vs ONNX Runtime")
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--paginas", type=int, default=12)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+    pdfs = args.pdfs or sorted(glob.glob(os.path.join("backend", "uploads", "*.pdf")))
+    main(pdfs, args.paginas, args.conf, args.repeticiones)
@@ -7,7 +7,7 @@ from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
 from datetime import datetime
 
 # Importamos los criterios
-from backend.services.ia_analisis import CRITERIOS_POR_PRODUCTO
+from backend.services import catalogo_criterios
 
 # --- BASE DE DATOS DE INFORMACIÓN ADICIONAL ---
 INFO_ADICIONAL = {
@@ -85,7 +85,7 @@ def generar_pdf_reporte(documento_db, resultados_ia, categoria_producto, tipo_do
     story.append(Spacer(1, 10))
 
     # Obtenemos los criterios teóricos que DEBERÍA cumplir
-    criterios_teoricos = CRITERIOS_POR_PRODUCTO.get(categoria_producto, {}).get(tipo_documento, {})
+    criterios_teoricos = catalogo_criterios.obtener().criterios(categoria_producto, tipo_documento)
     
     if not criterios_teoricos:
         story.append(Paragraph("No se encontraron criterios de referencia para este tipo de documento.", estilo_normal))
@@ -459,7 +459,7 @@ const TablaHallazgos = ({ analisis }) => {
         </thead>
         <tbody>
           {analisis.map((item, index) => {
-            if (item.ImagenBase64) {
+            if (item.ImagenBase64 || item.ImagenUrl) {
               return (
                 <tr key={index}>
                   <td
@@ -491,7 +491,11 @@ const TablaHallazgos = ({ analisis }) => {
                         </span>
                       </div>
                       <img
-                        src={`data:image/jpeg;base64,${item.ImagenBase64}`}
+                        src={
+                          item.ImagenUrl
+                            ? `http://localhost:8000${item.ImagenUrl}`
+                            : `data:image/jpeg;base64,${item.ImagenBase64}`
+                        }
                         alt="Evidencia"
                         style={{
                           maxWidth: "250px",
@@ -612,6 +616,17 @@ function ResultadosAnalisis() {
         );
       }
 
+      // Si el reporte tarda, el servidor responde 202 con el id del trabajo:
+      // se consulta su url hasta que el PDF esté listo (200) o falle (4xx/5xx)
+      while (response.status === 202) {
+        const trabajo = await response.json();
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        response = await fetch(`http://localhost:8000${trabajo.url}`, {
+          method: "GET",
+          headers: { Authorization: `Bearer ${token}` },
+        });
+      }
+
       if (!response.ok) {
         const errorData = await response.json();
         throw new Error(errorData.detail || "Error en el servidor");